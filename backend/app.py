@@ -1,16 +1,33 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+# Apply the thread budget before numpy/sklearn/librosa create their thread pools
+from thread_budget import apply_thread_budget, resolve_thread_budget
+THREAD_BUDGET = resolve_thread_budget()
+apply_thread_budget(THREAD_BUDGET)
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
 import tempfile
+import hashlib
 import os
+import shutil
 from pathlib import Path
 import numpy as np
 import subprocess
 import sys  # <-- eklendi
+import copy
+import threading
+import time
 
 from audio_processor import AudioProcessor
 from model_manager import ModelManager
+from dataset_catalog import DatasetCatalog
+from prediction_batcher import PredictionBatcher
+from diarization import diarize
+from prediction_log import PredictionLog, STATUS_OK, STATUS_ERROR
+from evaluation import HoldoutEvaluator
+from audio_probe import probe_file, STATUS_FLAGGED, STATUS_REJECTED
 
 app = FastAPI(
     title="Speaker ID API",
@@ -27,9 +44,146 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Resampling tier for decoded uploads ('high', 'medium', 'low', 'fast' or any
+# librosa res_type, passed on to train_model.py as is), see
+# benchmark_resampling.py for the accuracy/speed trade-off
+RESAMPLE_QUALITY = os.environ.get("SPEAKER_ID_RESAMPLE_QUALITY", "high")
+
+# Feature computation: 'librosa' (reference) or 'numpy' (same features without
+# importing librosa/numba), see compare_feature_backends.py
+FEATURE_BACKEND = os.environ.get("SPEAKER_ID_FEATURE_BACKEND", "librosa")
+
+# Upload limits: files are streamed to disk in fixed-size chunks, never read whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+MAX_UPLOAD_BYTES = int(float(os.environ.get("SPEAKER_ID_MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+MAX_REQUEST_BYTES = int(float(os.environ.get("SPEAKER_ID_MAX_REQUEST_MB", "200")) * 1024 * 1024)
+
+# Micro-batching of concurrent /predict calls (batch size 1 disables it)
+BATCH_MAX_SIZE = int(os.environ.get("SPEAKER_ID_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("SPEAKER_ID_BATCH_MAX_WAIT_MS", "5"))
+
+# Model types that /train updates with partial_fit instead of a full retrain
+ONLINE_MODEL_TYPES = ['ncm']
+
+# Model types exported as TorchScript (.pt) by train_model.py; they need MFCC frames
+TORCH_MODEL_TYPES = ['tdnn']
+
+# Serve distilled students (train_model.py --distill) in place of their teacher when
+# they lose at most this much test accuracy, e.g. 0.01; unset keeps the teachers
+STUDENT_MAX_DROP = os.environ.get("SPEAKER_ID_STUDENT_MAX_DROP")
+STUDENT_MAX_DROP = float(STUDENT_MAX_DROP) if STUDENT_MAX_DROP else None
+
+# Serve compiled array predictors of SVM / random forest models (compile_models.py)
+# when they are up to date with the model file; 0 always serves the pickled models
+USE_COMPILED = os.environ.get("SPEAKER_ID_USE_COMPILED", "1") != "0"
+
+# Re-score loaded models on the cached test split features whenever a model or the
+# test split changes; best-model selection and /metrics use those numbers (0 disables)
+HOLDOUT_EVALUATION = os.environ.get("SPEAKER_ID_HOLDOUT_EVALUATION", "1") != "0"
+
+# Append-only binary audit log of /predict calls (empty value disables it)
+PREDICTION_LOG_PATH = os.environ.get("SPEAKER_ID_PREDICTION_LOG", "../logs/predictions.bin")
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """Reject oversized requests from Content-Length before reading the body."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request too large (limit {MAX_REQUEST_BYTES} bytes)"}
+        )
+    return await call_next(request)
+
+
+async def save_upload(
+    upload: UploadFile,
+    destination: Path,
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[int, str]:
+    """
+    Stream an uploaded file to disk in fixed-size chunks.
+    
+    Args:
+        upload: Uploaded file
+        destination: Target file path
+        max_bytes: Maximum allowed file size
+        
+    Returns:
+        Number of bytes written and SHA-256 of the content
+    """
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(destination, 'wb') as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File {upload.filename} too large (limit {max_bytes} bytes)"
+                    )
+                f.write(chunk)
+                digest.update(chunk)
+    except BaseException:
+        if os.path.exists(destination):
+            os.unlink(destination)
+        raise
+    return size, digest.hexdigest()
+
 # Initialize processors
-audio_processor = AudioProcessor()
-model_manager = ModelManager(models_dir="../models")
+audio_processor = AudioProcessor(resample_quality=RESAMPLE_QUALITY, feature_backend=FEATURE_BACKEND)
+model_manager = ModelManager(
+    models_dir="../models", n_jobs=THREAD_BUDGET, student_max_drop=STUDENT_MAX_DROP, use_compiled=USE_COMPILED
+)
+dataset_catalog = DatasetCatalog(data_dir="../data/raw")
+
+# Catalogue an existing data/raw tree once, before the first upload creates the manifest
+if len(dataset_catalog) == 0:
+    print(f"Catalogued {dataset_catalog.sync()} existing audio file(s)")
+
+prediction_batcher = PredictionBatcher(
+    model_manager, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS
+)
+prediction_log = PredictionLog(PREDICTION_LOG_PATH) if PREDICTION_LOG_PATH else None
+
+
+@app.on_event("shutdown")
+def flush_prediction_log():
+    """Write out queued audit records before the worker exits."""
+    if prediction_log is not None:
+        prediction_log.close()
+
+# Models trained with other feature settings (see sweep_features.py) get their
+# own processor, created on first use and keyed by the settings
+feature_processors: Dict[Tuple, AudioProcessor] = {
+    tuple(sorted(audio_processor.feature_config().items())): audio_processor
+}
+feature_processors_lock = threading.Lock()
+
+
+def get_audio_processor(model_name: Optional[str]) -> AudioProcessor:
+    """Processor that extracts features with the settings a model was trained on."""
+    feature_config = model_manager.get_feature_config(model_name)
+    key = tuple(sorted(feature_config.items()))
+    processor = feature_processors.get(key)
+    if processor is None:
+        with feature_processors_lock:
+            processor = feature_processors.get(key)
+            if processor is None:
+                processor = AudioProcessor.from_config(
+                    feature_config, resample_quality=RESAMPLE_QUALITY, feature_backend=FEATURE_BACKEND
+                )
+                feature_processors[key] = processor
+    return processor
+
+# Warm up the feature code (librosa's JIT compilation, filter caches) so the
+# first request (or online enrollment) doesn't pay for it
+audio_processor.extract_features(audio_processor.preprocess_audio(np.zeros(1, dtype=np.float32)))
 
 # Load speaker labels and model if available
 model_manager.load_speaker_labels()
@@ -50,6 +204,20 @@ if len(model_manager.models) == 0:
     except Exception as e:
         print(f"Error loading default model: {e}")
 
+holdout_evaluator = HoldoutEvaluator(
+    model_manager, dataset_catalog, get_audio_processor,
+    cache_dir="../data/features/holdout", max_workers=THREAD_BUDGET
+) if HOLDOUT_EVALUATION else None
+
+
+def schedule_evaluation():
+    """Re-score changed models on the holdout in the background."""
+    if holdout_evaluator is not None:
+        holdout_evaluator.schedule()
+
+
+schedule_evaluation()
+
 
 @app.get("/")
 def root():
@@ -58,7 +226,8 @@ def root():
         "name": "Speaker ID API",
         "version": "0.1.0",
         "status": "running",
-        "endpoints": ["/health", "/predict", "/train", "/models", "/audio-stats"]
+        "endpoints": ["/health", "/predict", "/train", "/models", "/audio-stats", "/dataset", "/diarize",
+                      "/analytics/predictions", "/evaluation"]
     }
 
 
@@ -66,15 +235,15 @@ def root():
 def health_check():
     """Health check endpoint."""
     best_model = model_manager.get_best_model()
-    best_model_accuracy = None
-    if best_model and best_model in model_manager.model_metadata:
-        best_model_accuracy = model_manager.model_metadata[best_model].get('test_accuracy')
+    best_model_accuracy = model_manager.get_model_accuracy(best_model) if best_model else None
     
     return {
         "status": "ok",
         "message": "Backend is running",
         "loaded_models": len(model_manager.models),
         "speaker_count": len(model_manager.speakers),
+        "thread_budget": THREAD_BUDGET,
+        "feature_backend": audio_processor.features.name,
         "best_model": best_model,
         "best_model_accuracy": best_model_accuracy
     }
@@ -89,6 +258,36 @@ def list_models():
     }
 
 
+@app.put("/models/{model_name}/cascade")
+def configure_cascade(
+    model_name: str,
+    stage_model: str = None,
+    min_confidence: float = 0.9,
+    min_margin: float = 0.0
+):
+    """
+    Serve a model through a confidence-gated cascade.
+    
+    Requests for model_name are first answered by stage_model; model_name
+    only runs when the stage's top-1 confidence is below min_confidence or
+    its top-1/top-2 margin is below min_margin. Stored in the model's .meta.
+    
+    Args:
+        model_name: Expensive model
+        stage_model: Cheap model with the same features (omit to remove the cascade)
+        min_confidence: Minimum stage top-1 probability
+        min_margin: Minimum stage top-1 minus top-2 probability
+        
+    Returns:
+        The model's cascade configuration
+    """
+    try:
+        model_manager.set_cascade(model_name, stage_model, min_confidence, min_margin)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"model_name": model_name, "cascade": model_manager.model_metadata[model_name].get("cascade")}
+
+
 @app.get("/metrics")
 def get_model_metrics():
     """Get detailed metrics for all models."""
@@ -109,15 +308,62 @@ def get_model_metrics():
                 "f1_weighted": metadata.get("f1_weighted"),
                 "num_speakers": metadata.get("num_speakers"),
                 "confusion_matrix": metadata.get("confusion_matrix"),
-                "speakers": metadata.get("speakers", [])
+                "speakers": metadata.get("speakers", []),
+                "cascade": metadata.get("cascade"),
+                "hierarchy": metadata.get("hierarchy"),
+                "backend": model_manager.model_backends.get(model_name),
+                "holdout": model_manager.get_holdout_result(model_name)
             }
     
     return {
         "models": metrics,
-        "best_model": model_manager.get_best_model()
+        "best_model": model_manager.get_best_model(),
+        "batching": prediction_batcher.get_stats(),
+        "cascade": model_manager.get_cascade_stats(),
+        "evaluation": holdout_evaluator.get_status() if holdout_evaluator is not None else None
     }
 
 
+@app.post("/evaluation")
+async def run_evaluation(force: bool = False):
+    """
+    Re-score loaded models on the holdout (test split) now.
+    
+    Args:
+        force: Re-score every model, not only those whose model file or holdout changed
+        
+    Returns:
+        Evaluation status and the current holdout results per model
+    """
+    if holdout_evaluator is None:
+        raise HTTPException(status_code=404, detail="Holdout evaluation is disabled")
+    results = await run_in_threadpool(holdout_evaluator.refresh, force)
+    return {"evaluation": holdout_evaluator.get_status(), "results": results}
+
+
+@app.get("/dataset")
+def get_dataset_stats():
+    """Get per-speaker corpus statistics from the dataset manifest."""
+    return dataset_catalog.get_stats()
+
+
+@app.get("/analytics/predictions")
+def get_prediction_analytics(since: float = None, model_name: str = None):
+    """
+    Aggregate statistics from the prediction audit log.
+    
+    Args:
+        since: Only include predictions after this unix timestamp
+        model_name: Only include predictions served by this model
+        
+    Returns:
+        Per-speaker/per-model counts, confidence distribution and stage latency percentiles
+    """
+    if prediction_log is None:
+        raise HTTPException(status_code=404, detail="Prediction log is disabled")
+    return prediction_log.get_stats(since=since, model=model_name)
+
+
 @app.post("/audio-stats")
 async def get_audio_stats(audio_file: UploadFile = File(...)):
     """
@@ -128,13 +374,15 @@ async def get_audio_stats(audio_file: UploadFile = File(...)):
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            content = await audio_file.read()
-            tmp_file.write(content)
             tmp_path = tmp_file.name
+        await save_upload(audio_file, tmp_path)
         
         # Load and process audio
         audio = audio_processor.load_audio(tmp_path)
         stats = audio_processor.get_audio_stats(audio)
+        probe = probe_file(
+            tmp_path, audio_processor.target_length_ms, audio_processor.sample_rate, audio_file.filename
+        )
         
         # Cleanup
         if tmp_path and os.path.exists(tmp_path):
@@ -143,18 +391,35 @@ async def get_audio_stats(audio_file: UploadFile = File(...)):
         return JSONResponse({
             "filename": audio_file.filename,
             "stats": stats,
-            "preprocessed_length_ms": len(audio_processor.preprocess_audio(audio))
+            "preprocessed_length_ms": len(audio_processor.preprocess_audio(audio)),
+            "probe": probe
         })
+    except HTTPException:
+        raise
     except Exception as e:
         if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _extract_prediction_features(file_path: str, feature_type: str, processor: AudioProcessor):
+    """Load audio and extract features for prediction; returns (features, audio stats)."""
+    # Pooled features accept any length, fixed-size features only decode
+    # the middle window they keep
+    if processor.is_length_independent(feature_type):
+        audio = processor.load_audio(file_path)
+    else:
+        audio = processor.load_audio(file_path, target_length_ms=processor.target_length_ms)
+        audio = processor.preprocess_audio(audio)
+    
+    features = processor.extract_features(audio, feature_type=feature_type)
+    return features, processor.get_audio_stats(audio)
+
+
 @app.post("/predict")
 async def predict_speaker(
     audio_file: UploadFile = File(...),
-    feature_type: str = "mfcc",
+    feature_type: str = None,
     top_k: int = 3,
     model_name: str = None
 ):
@@ -163,7 +428,8 @@ async def predict_speaker(
     
     Args:
         audio_file: Audio file (WAV format recommended)
-        feature_type: Type of features to extract ('mfcc' or 'mel')
+        feature_type: Type of features to extract ('mfcc', 'mfcc_stats' or 'mel').
+            Defaults to the feature type the selected model was trained on.
         top_k: Number of top predictions to return
         model_name: Name of model to use (optional, uses first available if not specified)
         
@@ -171,31 +437,62 @@ async def predict_speaker(
         Dictionary with predictions and metadata
     """
     tmp_path = None
+    started_at = time.perf_counter()
+    audio_bytes, audio_sha256 = 0, ""
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            content = await audio_file.read()
-            tmp_file.write(content)
             tmp_path = tmp_file.name
+        audio_bytes, audio_sha256 = await save_upload(audio_file, tmp_path)
+        upload_done_at = time.perf_counter()
         
-        # Load and preprocess audio
-        audio = audio_processor.load_audio(tmp_path)
-        audio = audio_processor.preprocess_audio(audio)
+        # Resolve model up front so features match what it was trained on
+        if model_name is None:
+            model_name = model_manager.get_best_model()
+        if feature_type is None:
+            feature_type = model_manager.get_feature_type(model_name)
+        processor = get_audio_processor(model_name)
         
-        # Extract features
-        features = audio_processor.extract_features(audio, feature_type=feature_type)
+        # Decode and extract features off the event loop so concurrent
+        # requests can reach the batcher together
+        features, stats = await run_in_threadpool(_extract_prediction_features, tmp_path, feature_type, processor)
+        features_done_at = time.perf_counter()
         
-        # Get statistics
-        stats = audio_processor.get_audio_stats(audio)
+        # Predict (use specified model or automatically select best model);
+        # concurrent requests for the same model share one batched inference
+        if BATCH_MAX_SIZE > 1:
+            prediction = await prediction_batcher.predict(features, model_name=model_name, top_k=top_k)
+        else:
+            prediction = await run_in_threadpool(
+                model_manager.predict, features, model_name=model_name, top_k=top_k
+            )
         
-        # Predict (use specified model or automatically select best model)
-        # model_manager.predict() will automatically use best model if model_name is None
-        prediction = model_manager.predict(features, model_name=model_name, top_k=top_k)
+        finished_at = time.perf_counter()
         
         # Cleanup
         if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
         
+        if prediction_log is not None:
+            queue_ms = prediction.get("queue_wait_ms", 0.0)
+            used_model = prediction.get("model_used", model_name)
+            prediction_log.log(
+                model=used_model,
+                predictions=prediction.get("predictions", []),
+                model_version=model_manager.model_versions.get(used_model, ""),
+                feature_type=feature_type,
+                audio_sha256=audio_sha256,
+                audio_bytes=audio_bytes,
+                duration_ms=stats["duration_ms"],
+                batch_size=prediction.get("batch_size", 1),
+                status=STATUS_ERROR if "error" in prediction else STATUS_OK,
+                upload_ms=(upload_done_at - started_at) * 1000,
+                features_ms=(features_done_at - upload_done_at) * 1000,
+                queue_ms=queue_ms,
+                inference_ms=(finished_at - features_done_at) * 1000 - queue_ms,
+                total_ms=(finished_at - started_at) * 1000
+            )
+        
         return JSONResponse({
             "filename": audio_file.filename,
             "feature_type": feature_type,
@@ -204,23 +501,132 @@ async def predict_speaker(
             "prediction": prediction
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Cleanup on error
         if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
-        # Log detailed error
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in predict_speaker: {error_detail}")
+        if prediction_log is not None:
+            prediction_log.log(
+                model=model_name, predictions=[], feature_type=feature_type or "",
+                audio_sha256=audio_sha256, audio_bytes=audio_bytes, status=STATUS_ERROR,
+                total_ms=(time.perf_counter() - started_at) * 1000
+            )
+        # The failure is recorded in the prediction log; no synchronous
+        # traceback formatting or stdout write on the request path
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/diarize")
+async def diarize_recording(
+    audio_file: UploadFile = File(...),
+    model_name: str = None,
+    step_ms: int = 500,
+    smoothing: int = 5,
+    min_confidence: float = 0.0,
+    min_segment_ms: int = 1000
+):
+    """
+    Timeline of who spoke when in a long recording.
+    
+    Features are computed once for the whole file and all overlapping
+    3 second windows are scored in a single batched model call.
+    
+    Args:
+        audio_file: Recording (any length)
+        model_name: Name of model to use (optional, uses best model if not specified)
+        step_ms: Hop between analysis windows
+        smoothing: Moving-average width (in windows) over the class probabilities
+        min_confidence: Windows below this confidence are labelled 'unknown'
+        min_segment_ms: Shorter segments are merged into a neighbour
+        
+    Returns:
+        Dictionary with speaker segments and per-speaker speaking time
+    """
+    if step_ms <= 0 or smoothing < 1:
+        raise HTTPException(status_code=400, detail="step_ms and smoothing must be positive")
+    
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
+            tmp_path = tmp_file.name
+        await save_upload(audio_file, tmp_path)
+        
+        if model_name is None:
+            model_name = model_manager.get_best_model()
+        feature_type = model_manager.get_feature_type(model_name)
+        processor = get_audio_processor(model_name)
+        
+        audio = await run_in_threadpool(processor.load_audio, tmp_path)
+        timeline = await run_in_threadpool(
+            diarize, processor, model_manager, audio, model_name,
+            feature_type=feature_type, step_ms=step_ms, smoothing=smoothing,
+            min_confidence=min_confidence, min_segment_ms=min_segment_ms
+        )
+        
+        return JSONResponse({
+            "filename": audio_file.filename,
+            "feature_type": feature_type,
+            **timeline
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _probe_uploads(processor: AudioProcessor, file_paths: List[Path], filenames: List[str]) -> List[dict]:
+    """Ingestion probe of staged uploads (header plus a bounded decode each) for processor's settings."""
+    return [
+        probe_file(str(path), processor.target_length_ms, processor.sample_rate, filename)
+        for path, filename in zip(file_paths, filenames)
+    ]
+
+
+def _enroll_online(model_name: str, speaker_name: str, file_paths: List[Path], feature_type: str) -> dict:
+    """Add new samples to an online model with partial_fit and persist it."""
+    start = time.perf_counter()
+    processor = get_audio_processor(model_name)
+    features = []
+    for file_path in file_paths:
+        try:
+            features.append(processor.process_file(str(file_path), feature_type=feature_type).flatten())
+        except Exception as e:
+            print(f"Warning: Failed to process {file_path.name}: {e}")
+    
+    if features:
+        # Update a copy so concurrent predictions keep using a consistent model;
+        # the lock makes concurrent enrollments build on each other's updates
+        with model_manager.model_lock(model_name):
+            model = copy.deepcopy(model_manager.models[model_name])
+            model.partial_fit(np.array(features), [speaker_name] * len(features))
+            speakers = [str(c) for c in model.classes_]
+            model_manager.update_model(model_name, model, {
+                'num_speakers': len(speakers),
+                'speakers': speakers,
+                'n_samples_seen': int(model.n_samples_seen_),
+                'updated_at': time.time()
+            })
+            model_manager.save_speaker_labels(sorted(set(model_manager.speakers) | set(speakers)))
+    schedule_evaluation()
+    
+    return {
+        'samples_added': len(features),
+        'update_ms': (time.perf_counter() - start) * 1000
+    }
+
+
 @app.post("/train")
 async def train_model(
     speaker_name: str = Form(...),
     audio_files: List[UploadFile] = File(...),
     model_type: str = Form("svm"),
-    feature_type: str = Form("mfcc")  # Default to MFCC, Mel support removed from UI
+    feature_type: str = Form("mfcc"),  # Default to MFCC, Mel support removed from UI
+    reject_flagged: bool = Form(False)
 ):
     """
     Train or retrain speaker identification model with new data.
@@ -228,11 +634,14 @@ async def train_model(
     Args:
         speaker_name: Name/ID of the speaker
         audio_files: List of audio files for training
-        model_type: Type of model to train ('svm', 'random_forest', 'neural_network', 'adaboost')
+        model_type: Type of model to train ('svm', 'random_forest', 'neural_network', 'adaboost', 'ncm', 'sgd', 'tdnn',
+            'hierarchical'). An existing 'ncm' model is updated incrementally instead of retrained;
+            for 'hierarchical' only the speaker cluster the new files belong to is retrained.
         feature_type: Type of features to extract (default: 'mfcc', Mel removed from UI)
+        reject_flagged: Also drop files the ingestion probe flagged (short, clipped, mostly silent, ...)
         
     Returns:
-        Training results and statistics
+        Training results, statistics and the probe result of every upload (/audio-stats form)
     """
     try:
         # Validate inputs
@@ -242,38 +651,117 @@ async def train_model(
         if len(audio_files) < 3:
             raise HTTPException(status_code=400, detail="At least 3 audio files required")
         
-        # Create speaker directory
-        speaker_dir = Path("../data/raw") / speaker_name
-        speaker_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Save uploaded files
-        saved_files = []
-        for audio_file in audio_files:
-            # Generate unique filename
-            file_ext = os.path.splitext(audio_file.filename)[1] or '.wav'
-            unique_filename = f"train_{len(saved_files)+1:03d}{file_ext}"
-            file_path = speaker_dir / unique_filename
-            
-            # Save file
-            content = await audio_file.read()
-            with open(file_path, 'wb') as f:
-                f.write(content)
-            
-            saved_files.append(unique_filename)
-        
         # Validate model type
-        valid_model_types = ['svm', 'random_forest', 'neural_network', 'adaboost']
+        valid_model_types = (
+            ['svm', 'random_forest', 'neural_network', 'adaboost', 'sgd', 'hierarchical']
+            + ONLINE_MODEL_TYPES + TORCH_MODEL_TYPES
+        )
         if model_type not in valid_model_types:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid model_type. Must be one of: {', '.join(valid_model_types)}"
             )
         
-        # Validate feature type (only MFCC supported now)
-        if feature_type not in ['mfcc']:
-            # Force MFCC if something else is provided
+        # Validate feature type (MFCC based features only)
+        if feature_type not in ['mfcc', 'mfcc_stats'] or model_type in TORCH_MODEL_TYPES:
+            # Force MFCC if something else is provided (TDNN works on MFCC frames)
             feature_type = 'mfcc'
         
+        # Determine model filename based on model_type (same naming as train_model.py)
+        backend_type = "pytorch" if model_type in TORCH_MODEL_TYPES else "sklearn"
+        extension = ".pt" if backend_type == "pytorch" else ".pkl"
+        model_filename = f"{model_type}_speaker_model{extension}"
+        if feature_type != 'mfcc':
+            model_filename = f"{model_type}_speaker_model_{feature_type}{extension}"
+        
+        # Stage uploads (streamed, within per-file and per-request limits) next
+        # to the corpus so they can be moved in once the whole batch arrived
+        dataset_catalog.data_dir.mkdir(parents=True, exist_ok=True)
+        staging_dir = Path(tempfile.mkdtemp(dir=dataset_catalog.data_dir.parent, prefix=".upload_"))
+        try:
+            staged = []
+            request_bytes = 0
+            for i, audio_file in enumerate(audio_files):
+                file_ext = os.path.splitext(audio_file.filename)[1] or '.wav'
+                staged_path = staging_dir / f"{i:03d}{file_ext}"
+                remaining = MAX_REQUEST_BYTES - request_bytes
+                size, file_hash = await save_upload(
+                    audio_file, staged_path, max_bytes=min(MAX_UPLOAD_BYTES, remaining)
+                )
+                request_bytes += size
+                staged.append((staged_path, file_ext, file_hash))
+            
+            # Probe before anything enters the corpus: undecodable, too short or
+            # silent files are rejected here instead of being dropped (or
+            # degrading the model) only after a full retrain. Clip length and
+            # sample rate are checked against the model's feature settings.
+            probes = await run_in_threadpool(
+                _probe_uploads, get_audio_processor(model_filename),
+                [path for path, _, _ in staged], [f.filename for f in audio_files]
+            )
+            rejected = {STATUS_REJECTED, STATUS_FLAGGED} if reject_flagged else {STATUS_REJECTED}
+            rejected_files = [probe['filename'] for probe in probes if probe['status'] in rejected]
+            usable = [(item, probe) for item, probe in zip(staged, probes) if probe['status'] not in rejected]
+            if len(usable) < 3:
+                raise HTTPException(status_code=400, detail={
+                    "message": f"At least 3 usable audio files required ({len(rejected_files)} rejected by the ingestion probe)",
+                    "rejected_files": rejected_files,
+                    "probe": probes
+                })
+            
+            # Add to the content-addressed catalog (identical content is kept once)
+            saved_files = []
+            train_files = []  # files in the manifest's train split (the rest are holdout)
+            duplicate_files = []
+            for (staged_path, file_ext, file_hash), probe in usable:
+                entry = await run_in_threadpool(
+                    dataset_catalog.add_file, staged_path, speaker_name, file_ext, file_hash, probe
+                )
+                if entry.get('duplicate'):
+                    duplicate_files.append(entry['path'])
+                else:
+                    saved_files.append(entry['path'])
+                    if entry['split'] == 'train':
+                        train_files.append(entry['path'])
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        # Online models are updated in memory with the new files only;
+        # a full retrain is only needed when no such model exists yet.
+        # Files assigned to the test split stay out, they are the holdout.
+        if model_type in ONLINE_MODEL_TYPES and model_filename in model_manager.models:
+            new_files = [dataset_catalog.data_dir / path for path in train_files]
+            update = {'samples_added': 0, 'update_ms': 0.0}
+            if new_files:
+                update = await run_in_threadpool(
+                    _enroll_online, model_filename, speaker_name, new_files, feature_type
+                )
+            model_updated = update['samples_added'] > 0
+            if model_updated:
+                message = (f"Added {update['samples_added']} samples for {speaker_name} to {model_type} model "
+                           f"in {update['update_ms']:.0f} ms ({len(saved_files) - len(train_files)} file(s) "
+                           f"kept for the holdout)")
+            else:
+                message = (f"{speaker_name} was not enrolled in the {model_type} model: no usable train-split "
+                           f"file among the {len(saved_files)} new file(s) (test-split files are kept for the "
+                           f"holdout); upload more files")
+            return JSONResponse({
+                "status": "success",
+                "speaker_name": speaker_name,
+                "files_added": len(saved_files),
+                "duplicate_files": duplicate_files,
+                "rejected_files": rejected_files,
+                "probe": probes,
+                "accuracy": model_manager.model_metadata.get(model_filename, {}).get('test_accuracy', 0.0),
+                "model_type": model_type,
+                "feature_type": feature_type,
+                "message": message,
+                "model_retrained": False,
+                "model_updated": model_updated,
+                "samples_added": update['samples_added'],
+                "update_ms": update['update_ms']
+            })
+        
         # Retrain model using train_model.py script
         try:
             # Paths & env so that we use venv's Python and can import backend modules
@@ -283,8 +771,22 @@ async def train_model(
             env = os.environ.copy()
             env["PYTHONPATH"] = str(PROJECT_ROOT / "backend") + os.pathsep + env.get("PYTHONPATH", "")
 
+            # Re-distill existing students so they never lag behind their teacher
+            student_filenames = [
+                name for name, metadata in model_manager.model_metadata.items()
+                if metadata.get('distilled_from') == model_filename
+            ]
+            train_args = [sys.executable, str(TRAIN_SCRIPT), "--model", model_type, "--feature", feature_type,
+                          "--resample-quality", RESAMPLE_QUALITY]
+            if student_filenames:
+                train_args.append("--distill")
+            # Keep the feature settings the model was trained with
+            feature_config = model_manager.get_feature_config(model_filename)
+            for option, value in feature_config.items():
+                train_args += ["--" + option.replace("_", "-"), str(value)]
+            
             result = subprocess.run(
-                [sys.executable, str(TRAIN_SCRIPT), "--model", model_type, "--feature", feature_type],
+                train_args,
                 cwd=str(PROJECT_ROOT),                # proje kökü
                 capture_output=True,
                 text=True,
@@ -306,15 +808,9 @@ async def train_model(
             
             # Reload models in memory
             try:
-                # Determine model filename based on model_type (only MFCC supported)
-                model_filenames = {
-                    'svm': 'svm_speaker_model.pkl',
-                    'random_forest': 'random_forest_speaker_model.pkl',
-                    'neural_network': 'neural_network_speaker_model.pkl',
-                    'adaboost': 'adaboost_speaker_model.pkl'
-                }
-                model_filename = model_filenames.get(model_type, 'svm_speaker_model.pkl')
-                model_manager.load_model(model_filename, model_type="sklearn")
+                model_manager.load_model(model_filename, model_type=backend_type)
+                for student_filename in student_filenames:
+                    model_manager.load_model(student_filename, model_type="sklearn")
                 model_manager.load_speaker_labels()
             except Exception as e:
                 print(f"Warning: Could not reload model: {e}")
@@ -323,6 +819,7 @@ async def train_model(
                     model_manager.load_all_available_models()
                 except Exception as e2:
                     print(f"Warning: Could not reload any models: {e2}")
+            schedule_evaluation()
             
             # Parse accuracy from output
             accuracy = 0.0
@@ -339,6 +836,9 @@ async def train_model(
                 "status": "success",
                 "speaker_name": speaker_name,
                 "files_added": len(saved_files),
+                "duplicate_files": duplicate_files,
+                "rejected_files": rejected_files,
+                "probe": probes,
                 "accuracy": accuracy,
                 "model_type": model_type,
                 "feature_type": feature_type,
@@ -0,0 +1,201 @@
+"""
+In-process audio decoding.
+soundfile (libsndfile) reads WAV/FLAC/OGG and, from libsndfile 1.1, MP3.
+Containers it can't read (WebM/Opus from the browser recorder, M4A/AAC)
+are decoded with PyAV, which links the FFmpeg libraries into the process,
+instead of librosa/audioread spawning an ffmpeg subprocess per file.
+Only when neither can decode a file do the feature backends fall back to
+librosa.load. probe_header and decode_window serve the ingestion probe:
+container headers only, and a bounded decode of part of a file.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+# PCM scale of audioread's 16-bit output (what librosa.load used for these formats)
+S16_SCALE = 1.0 / 32768.0
+
+
+class AVDecoder:
+    """
+    PyAV decoder that keeps its sample format converters between files.
+    
+    Frames are converted to interleaved 16-bit PCM at their native rate
+    and layout (as the ffmpeg subprocess behind audioread produced them),
+    so decoded audio matches the previous path; resampling to the model
+    rate is left to the feature backend. A converter is created once per
+    input format, layout and rate and per thread, and reused for later
+    requests: at the native rate the conversion buffers no samples, so it
+    never needs flushing.
+    """
+    
+    def __init__(self):
+        import av
+        self._av = av
+        self._local = threading.local()
+    
+    def _converter(self, frame):
+        """Cached s16 converter for frames like this one (per thread)."""
+        converters: Dict[Tuple[str, str, int], object] = getattr(self._local, "converters", None)
+        if converters is None:
+            converters = self._local.converters = {}
+        key = (frame.format.name, frame.layout.name, frame.sample_rate)
+        if key not in converters:
+            converters[key] = self._av.AudioResampler(
+                format="s16", layout=frame.layout.name, rate=frame.sample_rate
+            )
+        return converters[key]
+    
+    def decode(
+        self,
+        file_path: str,
+        offset_s: float = 0.0,
+        max_duration_s: Optional[float] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Decode the first audio stream of a file.
+        
+        Args:
+            file_path: Path to audio file
+            offset_s: Seek to this position first (nearest preceding frame)
+            max_duration_s: Stop after this much audio (None decodes to the end)
+        
+        Returns:
+            Audio (channels, samples) as float32 in [-1, 1) and the native sample rate
+        """
+        with self._av.open(file_path) as container:
+            stream = container.streams.audio[0]
+            n_channels = stream.codec_context.channels
+            sample_rate = stream.codec_context.sample_rate
+            if offset_s > 0 and stream.time_base:
+                container.seek(int(offset_s / stream.time_base), stream=stream)
+            max_samples = None if max_duration_s is None else int(max_duration_s * sample_rate) * n_channels
+            chunks, n_samples = [], 0
+            for frame in container.decode(stream):
+                for converted in self._converter(frame).resample(frame):
+                    chunks.append(converted.to_ndarray().reshape(-1))
+                    n_samples += len(chunks[-1])
+                if max_samples is not None and n_samples >= max_samples:
+                    break
+        if not chunks:
+            return np.zeros((n_channels, 0), dtype=np.float32), sample_rate
+        pcm = np.concatenate(chunks)[:max_samples].reshape(-1, n_channels).T
+        return pcm.astype(np.float32) * np.float32(S16_SCALE), sample_rate
+    
+    def header(self, file_path: str) -> Dict:
+        """Duration, sample rate, channels and container format without decoding."""
+        with self._av.open(file_path) as container:
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base:
+                duration_s = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration_s = container.duration / self._av.time_base
+            else:
+                duration_s = None
+            return {
+                "duration_s": duration_s,
+                "sample_rate": stream.codec_context.sample_rate,
+                "channels": stream.codec_context.channels,
+                "format": container.format.name
+            }
+
+
+_av_decoder: Optional[AVDecoder] = None
+_av_lock = threading.Lock()
+
+
+def get_av_decoder() -> Optional[AVDecoder]:
+    """Process-wide PyAV decoder, or None if PyAV isn't installed."""
+    global _av_decoder
+    if _av_decoder is None:
+        with _av_lock:
+            if _av_decoder is None:
+                try:
+                    _av_decoder = AVDecoder()
+                except ImportError:
+                    return None
+    return _av_decoder
+
+
+def decode_file(file_path: str) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode a file in-process: soundfile first, then PyAV.
+    
+    Args:
+        file_path: Path to audio file
+    
+    Returns:
+        Audio (channels, samples) as float32 and the native sample rate,
+        or None if neither decoder can read the file
+    """
+    try:
+        audio, native_sr = sf.read(file_path, dtype="float32", always_2d=True)
+        return audio.T, native_sr
+    except sf.SoundFileRuntimeError:
+        pass
+    decoder = get_av_decoder()
+    if decoder is None:
+        return None
+    try:
+        return decoder.decode(file_path)
+    except (decoder._av.FFmpegError, IndexError):
+        # Not a media file PyAV understands, or no audio stream
+        return None
+
+
+def probe_header(file_path: str) -> Optional[Dict]:
+    """
+    Read duration, sample rate, channels and format from the container header.
+    
+    Returns:
+        Header fields (duration_s may be None for streams without one),
+        or None if neither decoder can open the file
+    """
+    try:
+        info = sf.info(file_path)
+        return {
+            "duration_s": float(info.duration),
+            "sample_rate": int(info.samplerate),
+            "channels": int(info.channels),
+            "format": info.format
+        }
+    except sf.SoundFileRuntimeError:
+        pass
+    decoder = get_av_decoder()
+    if decoder is None:
+        return None
+    try:
+        return decoder.header(file_path)
+    except (decoder._av.FFmpegError, IndexError):
+        return None
+
+
+def decode_window(file_path: str, offset_s: float, duration_s: float) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode at most duration_s seconds starting at offset_s.
+    
+    Seekable soundfile formats read just that range; PyAV seeks to the
+    nearest frame before offset_s and stops decoding once enough audio
+    has been produced.
+    
+    Returns:
+        Audio (channels, samples) as float32 and the native sample rate,
+        or None if neither decoder can read the file
+    """
+    try:
+        with sf.SoundFile(file_path) as f:
+            if f.seekable():
+                f.seek(min(int(offset_s * f.samplerate), max(f.frames - 1, 0)))
+            audio = f.read(int(duration_s * f.samplerate), dtype="float32", always_2d=True)
+            return audio.T, f.samplerate
+    except sf.SoundFileRuntimeError:
+        pass
+    decoder = get_av_decoder()
+    if decoder is None:
+        return None
+    try:
+        return decoder.decode(file_path, offset_s=offset_s, max_duration_s=duration_s)
+    except (decoder._av.FFmpegError, IndexError):
+        return None
@@ -0,0 +1,145 @@
+"""
+Ingestion probe for uploaded audio.
+Reads the container header and decodes a bounded window from the middle
+of the file (a few seconds at the native sample rate) to check duration,
+sample rate, clipping and silence before a file enters the corpus. Files
+that can't be decoded, are too short or carry no signal are rejected;
+files that would be padded, upsampled, are clipped or mostly silent are
+flagged. Results use the /audio-stats form so they can be returned as-is.
+"""
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_decoder import decode_window, probe_header
+
+# Seconds decoded from the middle of the file
+PROBE_WINDOW_S = 5.0
+
+# Below this a clip is mostly padding and is rejected (flagged below target_length_ms)
+MIN_DURATION_MS = 1000
+
+# |sample| at or above this counts as clipped
+CLIP_LEVEL = 0.999
+MAX_CLIPPED_RATIO = 0.01
+
+# 20 ms frames quieter than this (dBFS RMS) count as silence
+SILENCE_FRAME_MS = 20
+SILENCE_DBFS = -60.0
+MAX_SILENCE_RATIO = 0.7  # flagged above this
+REJECT_SILENCE_RATIO = 0.95  # rejected at or above this
+
+STATUS_OK = "ok"
+STATUS_FLAGGED = "flagged"
+STATUS_REJECTED = "rejected"
+
+
+def _dbfs(value: float) -> float:
+    return float(20 * np.log10(max(value, 1e-10)))
+
+
+def signal_stats(audio: np.ndarray, sample_rate: int) -> Dict:
+    """
+    Level, clipping and silence statistics of a mono signal.
+    
+    Returns:
+        Dictionary with mean, std, max, rms_dbfs, clipped_ratio and silence_ratio
+    """
+    if len(audio) == 0:
+        return {"mean": 0.0, "std": 0.0, "max": 0.0, "rms_dbfs": _dbfs(0.0),
+                "clipped_ratio": 0.0, "silence_ratio": 1.0}
+    frame = max(1, int(sample_rate * SILENCE_FRAME_MS / 1000))
+    n_frames = max(1, len(audio) // frame)
+    frames = audio[:n_frames * frame].reshape(n_frames, -1)
+    frame_rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return {
+        "mean": float(np.mean(audio)),
+        "std": float(np.std(audio)),
+        "max": float(np.max(np.abs(audio))),
+        "rms_dbfs": _dbfs(float(np.sqrt(np.mean(np.square(audio, dtype=np.float64))))),
+        "clipped_ratio": float(np.mean(np.abs(audio) >= CLIP_LEVEL)),
+        "silence_ratio": float(np.mean(frame_rms < 10 ** (SILENCE_DBFS / 20)))
+    }
+
+
+def probe_file(
+    file_path: str,
+    target_length_ms: int = 3000,
+    model_sample_rate: int = 16000,
+    filename: Optional[str] = None
+) -> Dict:
+    """
+    Probe one audio file without decoding all of it.
+    
+    Args:
+        file_path: Path to audio file
+        target_length_ms: Clip length the models use (shorter clips are padded)
+        model_sample_rate: Sample rate the models use (lower rates are upsampled)
+        filename: Name reported in the result (default: the file name)
+    
+    Returns:
+        {"filename", "status" ('ok', 'flagged' or 'rejected'), "issues", "stats", "probe_ms"}
+    """
+    start = time.perf_counter()
+    issues: List[Dict] = []
+    stats: Dict = {}
+    
+    def issue(code: str, message: str, reject: bool = False):
+        issues.append({"code": code, "message": message, "reject": reject})
+    
+    header = probe_header(str(file_path))
+    decoded = None
+    if header is None:
+        issue("undecodable", "No readable audio stream", reject=True)
+    else:
+        duration_s = header["duration_s"]
+        offset_s = max(0.0, (duration_s - PROBE_WINDOW_S) / 2) if duration_s else 0.0
+        decoded = decode_window(str(file_path), offset_s, PROBE_WINDOW_S)
+        if decoded is None or decoded[0].size == 0:
+            issue("undecodable", "Audio stream could not be decoded", reject=True)
+            decoded = None
+    
+    if decoded is not None:
+        audio, sample_rate = decoded
+        decoded_s = audio.shape[1] / sample_rate
+        # Headerless streams (e.g. recorded WebM): a window that ended early is the whole clip
+        if not header["duration_s"] and decoded_s < PROBE_WINDOW_S:
+            header["duration_s"] = decoded_s
+        duration_ms = header["duration_s"] * 1000 if header["duration_s"] else None
+        stats = {
+            "duration_ms": duration_ms,
+            "sample_rate": sample_rate,
+            "channels": header["channels"],
+            "format": header["format"],
+            "decoded_ms": decoded_s * 1000,
+            **signal_stats(np.mean(audio, axis=0), sample_rate)
+        }
+        
+        if duration_ms is not None and duration_ms < MIN_DURATION_MS:
+            issue("too_short", f"{duration_ms:.0f} ms (minimum {MIN_DURATION_MS} ms)", reject=True)
+        elif duration_ms is not None and duration_ms < target_length_ms:
+            issue("short", f"{duration_ms:.0f} ms is padded to {target_length_ms} ms")
+        if sample_rate < model_sample_rate:
+            issue("low_sample_rate", f"{sample_rate} Hz is upsampled to {model_sample_rate} Hz")
+        if stats["clipped_ratio"] > MAX_CLIPPED_RATIO:
+            issue("clipping", f"{stats['clipped_ratio']:.1%} of samples clipped")
+        if stats["max"] == 0.0 or stats["silence_ratio"] >= REJECT_SILENCE_RATIO:
+            issue("silent", f"{stats['silence_ratio']:.0%} silence (below {SILENCE_DBFS:.0f} dBFS)", reject=True)
+        elif stats["silence_ratio"] > MAX_SILENCE_RATIO:
+            issue("mostly_silent", f"{stats['silence_ratio']:.0%} silence (below {SILENCE_DBFS:.0f} dBFS)")
+    
+    if any(i["reject"] for i in issues):
+        status = STATUS_REJECTED
+    elif issues:
+        status = STATUS_FLAGGED
+    else:
+        status = STATUS_OK
+    return {
+        "filename": filename or Path(file_path).name,
+        "status": status,
+        "issues": issues,
+        "stats": stats,
+        "probe_ms": (time.perf_counter() - start) * 1000
+    }
@@ -1,11 +1,38 @@
 """
 Audio processing utilities for speaker identification.
-Handles feature extraction (MFCC, Mel-spectrograms) using Librosa.
+Handles feature extraction (MFCC, Mel-spectrograms) using Librosa
+or the librosa-compatible NumPy/SciPy backend (see feature_backend.py).
 """
-import librosa
+import math
 import numpy as np
 import soundfile as sf
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
+
+from feature_backend import get_feature_backend
+
+# Feature types pooled over time (no padding/cropping required)
+LENGTH_INDEPENDENT_FEATURES = ("mfcc_stats",)
+
+# Resampling quality tiers -> librosa res_type, fastest last (benchmark_resampling.py:
+# about 4.0, 3.8, 3.8 and 2.3 ms per file including decoding)
+RESAMPLE_QUALITY = {
+    "high": "soxr_hq",      # librosa.load default
+    "medium": "soxr_mq",
+    "low": "soxr_lq",
+    "fast": "soxr_qq",      # quick cubic interpolation, no anti-aliasing filter
+}
+
+
+def normalize_feature_config(feature_config: Optional[Dict] = None) -> Dict[str, int]:
+    """Complete feature settings with the AudioProcessor defaults."""
+    config = {
+        "sample_rate": AudioProcessor.SAMPLE_RATE,
+        "n_mfcc": AudioProcessor.N_MFCC,
+        "hop_length": AudioProcessor.HOP_LENGTH,
+        "target_length_ms": AudioProcessor.TARGET_LENGTH_MS
+    }
+    config.update({key: int(value) for key, value in (feature_config or {}).items() if key in config})
+    return config
 
 
 class AudioProcessor:
@@ -16,46 +43,154 @@ class AudioProcessor:
     N_MFCC = 13  # Number of MFCC coefficients
     N_MELS = 40  # Mel filter banks
     HOP_LENGTH = 512  # FFT hop length
+    TARGET_LENGTH_MS = 3000  # Clip length used by fixed-size features
+    RESAMPLE_MARGIN_MS = 100  # Extra context decoded around a window for the resampler
     
-    def __init__(self, sample_rate: int = SAMPLE_RATE):
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        resample_quality: str = "high",
+        feature_backend: str = "librosa",
+        n_mfcc: int = N_MFCC,
+        hop_length: int = HOP_LENGTH,
+        target_length_ms: int = TARGET_LENGTH_MS
+    ):
+        """
+        Args:
+            sample_rate: Target sample rate
+            resample_quality: Quality tier ('high', 'medium', 'low', 'fast')
+                or any librosa res_type
+            feature_backend: 'librosa' or 'numpy' (same features without
+                importing librosa)
+            n_mfcc: Number of MFCC coefficients
+            hop_length: FFT hop length
+            target_length_ms: Clip length used by fixed-size features
+        """
         self.sample_rate = sample_rate
+        self.res_type = RESAMPLE_QUALITY.get(resample_quality, resample_quality)
+        self.features = get_feature_backend(feature_backend)
+        self.n_mfcc = n_mfcc
+        self.hop_length = hop_length
+        self.target_length_ms = target_length_ms
     
-    def load_audio(self, file_path: str) -> np.ndarray:
+    @classmethod
+    def from_config(cls, feature_config: Optional[Dict] = None, **kwargs) -> "AudioProcessor":
+        """
+        Processor for a model's feature configuration.
+        
+        Args:
+            feature_config: Settings saved in model metadata (see feature_config);
+                missing keys (models trained before it was recorded) use the defaults
+            **kwargs: Other constructor arguments (resample_quality, feature_backend)
+        """
+        return cls(**normalize_feature_config(feature_config), **kwargs)
+    
+    def feature_config(self) -> Dict[str, int]:
+        """Feature settings a model trained on this processor's output depends on."""
+        return {
+            "sample_rate": self.sample_rate,
+            "n_mfcc": self.n_mfcc,
+            "hop_length": self.hop_length,
+            "target_length_ms": self.target_length_ms
+        }
+    
+    def load_audio(
+        self,
+        file_path: str,
+        target_length_ms: Optional[int] = None
+    ) -> np.ndarray:
         """
         Load audio file and convert to mono.
         
+        When target_length_ms is given only the middle window that
+        preprocess_audio would keep is decoded (seeking containers only);
+        the result is the same as loading everything and cropping.
+        
         Args:
             file_path: Path to audio file
+            target_length_ms: Only decode the middle window of this length
             
         Returns:
             Audio data as numpy array
         """
-        audio, sr = librosa.load(file_path, sr=self.sample_rate, mono=True)
+        if target_length_ms is not None:
+            audio = self._load_middle_window(file_path, target_length_ms)
+            if audio is not None:
+                return audio
+        return self.features.load(file_path, self.sample_rate, self.res_type)
+    
+    def _load_middle_window(
+        self,
+        file_path: str,
+        target_length_ms: int
+    ) -> Optional[np.ndarray]:
+        """
+        Decode only the middle window of a file via soundfile seeks.
+        
+        Returns None when the container can't be read by soundfile or the
+        file is short enough that a full load is just as cheap.
+        """
+        try:
+            info = sf.info(file_path)
+        except Exception:
+            return None
+        native_sr = info.samplerate
+        if native_sr <= 0 or info.frames <= 0:
+            return None
+        
+        # Length librosa.load would produce, and the crop preprocess_audio takes from it
+        n_out = int(math.ceil(info.frames * self.sample_rate / native_sr))
+        target_samples = int(self.sample_rate * target_length_ms / 1000)
+        margin = int(self.sample_rate * self.RESAMPLE_MARGIN_MS / 1000)
+        if n_out <= target_samples + 2 * margin:
+            return None
+        start = n_out // 2 - target_samples // 2
+        
+        # Align the decode offset so native and resampled sample grids coincide
+        g = math.gcd(native_sr, self.sample_rate)
+        step_native, step_out = native_sr // g, self.sample_rate // g
+        begin_out = max(0, start - margin) // step_out * step_out
+        end_out = min(n_out, start + target_samples + margin)
+        begin_native = begin_out // step_out * step_native
+        end_native = min(info.frames, int(math.ceil(end_out * native_sr / self.sample_rate)))
+        
+        try:
+            with sf.SoundFile(file_path) as f:
+                if not f.seekable():
+                    return None
+                f.seek(begin_native)
+                window = f.read(end_native - begin_native, dtype='float32', always_2d=True)
+        except Exception:
+            return None
+        
+        window = self.features.to_mono(window.T)
+        if native_sr != self.sample_rate:
+            window = self.features.resample(window, native_sr, self.sample_rate, self.res_type)
+        
+        offset = start - begin_out
+        audio = window[offset:offset + target_samples]
+        if len(audio) != target_samples:
+            return None
         return audio
     
     def extract_mfcc(
         self, 
         audio: np.ndarray, 
-        n_mfcc: int = N_MFCC,
-        hop_length: int = HOP_LENGTH
+        n_mfcc: Optional[int] = None,
+        hop_length: Optional[int] = None
     ) -> np.ndarray:
         """
         Extract MFCC features from audio signal.
         
         Args:
             audio: Audio signal array
-            n_mfcc: Number of MFCC coefficients
-            hop_length: FFT hop length
+            n_mfcc: Number of MFCC coefficients (default: self.n_mfcc)
+            hop_length: FFT hop length (default: self.hop_length)
             
         Returns:
             MFCC features (n_frames, n_mfcc)
         """
-        mfccs = librosa.feature.mfcc(
-            y=audio,
-            sr=self.sample_rate,
-            n_mfcc=n_mfcc,
-            hop_length=hop_length
-        )
+        mfccs = self.features.mfcc(audio, self.sample_rate, n_mfcc or self.n_mfcc, hop_length or self.hop_length)
         # Transpose to get (time_steps, features)
         return mfccs.T
     
@@ -63,7 +198,7 @@ class AudioProcessor:
         self, 
         audio: np.ndarray,
         n_mels: int = N_MELS,
-        hop_length: int = HOP_LENGTH
+        hop_length: Optional[int] = None
     ) -> np.ndarray:
         """
         Extract Mel-spectrogram features from audio signal.
@@ -71,21 +206,55 @@ class AudioProcessor:
         Args:
             audio: Audio signal array
             n_mels: Number of Mel filter banks
-            hop_length: FFT hop length
+            hop_length: FFT hop length (default: self.hop_length)
             
         Returns:
             Mel-spectrogram features (n_frames, n_mels)
         """
-        mel_spec = librosa.feature.melspectrogram(
-            y=audio,
-            sr=self.sample_rate,
-            n_mels=n_mels,
-            hop_length=hop_length
-        )
+        mel_spec = self.features.melspectrogram(audio, self.sample_rate, n_mels, hop_length or self.hop_length)
         # Convert to log scale
-        mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
+        mel_spec_db = self.features.power_to_db(mel_spec, ref=np.max)
         return mel_spec_db.T
     
+    def extract_mfcc_stats(
+        self,
+        audio: np.ndarray,
+        n_mfcc: Optional[int] = None,
+        hop_length: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Extract utterance-level MFCC statistics.
+        
+        Mean and standard deviation of the MFCCs and of their first and
+        second order deltas are pooled over time, so the vector size does
+        not depend on the clip length.
+        
+        Args:
+            audio: Audio signal array (any length)
+            n_mfcc: Number of MFCC coefficients (default: self.n_mfcc)
+            hop_length: FFT hop length (default: self.hop_length)
+            
+        Returns:
+            Pooled statistics (6 * n_mfcc,)
+        """
+        mfccs = self.features.mfcc(audio, self.sample_rate, n_mfcc or self.n_mfcc, hop_length or self.hop_length)
+        
+        # librosa.feature.delta needs an odd window no wider than the clip
+        n_frames = mfccs.shape[1]
+        width = min(9, n_frames if n_frames % 2 == 1 else n_frames - 1)
+        if width >= 3:
+            delta = self.features.delta(mfccs, width=width, order=1)
+            delta2 = self.features.delta(mfccs, width=width, order=2)
+        else:
+            delta = np.zeros_like(mfccs)
+            delta2 = np.zeros_like(mfccs)
+        
+        return np.concatenate([
+            mfccs.mean(axis=1), mfccs.std(axis=1),
+            delta.mean(axis=1), delta.std(axis=1),
+            delta2.mean(axis=1), delta2.std(axis=1)
+        ])
+    
     def extract_features(
         self, 
         audio: np.ndarray,
@@ -96,7 +265,7 @@ class AudioProcessor:
         
         Args:
             audio: Audio signal array
-            feature_type: Type of features ('mfcc' or 'mel')
+            feature_type: Type of features ('mfcc', 'mel' or 'mfcc_stats')
             
         Returns:
             Feature array
@@ -105,24 +274,54 @@ class AudioProcessor:
             return self.extract_mfcc(audio)
         elif feature_type.lower() == "mel":
             return self.extract_mel_spectrogram(audio)
+        elif feature_type.lower() == "mfcc_stats":
+            return self.extract_mfcc_stats(audio)
         else:
             raise ValueError(f"Unknown feature type: {feature_type}")
     
+    @staticmethod
+    def is_length_independent(feature_type: str) -> bool:
+        """Whether a feature type can be computed on clips of any length."""
+        return feature_type.lower() in LENGTH_INDEPENDENT_FEATURES
+    
+    def process_file(self, file_path: str, feature_type: str = "mfcc") -> np.ndarray:
+        """
+        Load an audio file and extract features the way models are trained.
+        
+        Fixed-size features are computed on the middle target_length_ms
+        crop (only that window is decoded); length-independent features
+        use the whole clip.
+        
+        Args:
+            file_path: Path to audio file
+            feature_type: Type of features to extract
+            
+        Returns:
+            Feature array
+        """
+        if self.is_length_independent(feature_type):
+            audio = self.load_audio(file_path)
+        else:
+            audio = self.load_audio(file_path, target_length_ms=self.target_length_ms)
+            audio = self.preprocess_audio(audio)
+        return self.extract_features(audio, feature_type=feature_type)
+    
     def preprocess_audio(
         self, 
         audio: np.ndarray,
-        target_length_ms: int = 3000  # 3 seconds
+        target_length_ms: Optional[int] = None
     ) -> np.ndarray:
         """
         Preprocess audio: padding or trimming to target length.
         
         Args:
             audio: Audio signal array
-            target_length_ms: Target length in milliseconds
+            target_length_ms: Target length in milliseconds (default: self.target_length_ms)
             
         Returns:
             Preprocessed audio
         """
+        target_length_ms = target_length_ms or self.target_length_ms
         target_samples = int(self.sample_rate * target_length_ms / 1000)
         
         if len(audio) > target_samples:
@@ -0,0 +1,493 @@
+"""
+Compiled array-based predictors for trained SVM and random forest models.
+A saved sklearn model is converted once into flat NumPy arrays: forests
+into packed node arrays walked for all trees at once, SVMs into a
+support-vector matrix, a one-vs-one coefficient matrix and the Platt
+parameters, evaluated with one kernel matrix product per batch. The
+predictors expose predict_proba/predict/classes_ like the sklearn models,
+without per-call input validation or per-tree Python loops.
+See compile_models.py for the compile step and parity check, and
+tests/test_compiled_model.py for the parity tests against sklearn.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Sibling file of the model: svm_speaker_model.pkl -> svm_speaker_model.pkl.compiled
+COMPILED_SUFFIX = ".compiled"
+
+# Bump when the array layout changes
+COMPILED_FORMAT = 1
+
+# Largest probability difference to the sklearn model a compiled predictor may have
+PARITY_TOLERANCE = 1e-4
+
+# Rows additionally checked one at a time (the single-row code path)
+PARITY_SINGLE_ROWS = 32
+
+# libsvm's bounds on the pairwise Platt probabilities
+MIN_PROB = 1e-7
+
+# Up to this many rows the probability coupling runs as plain Python per
+# row, which is cheaper than the per-step overhead of the batched version
+SMALL_BATCH = 8
+
+
+def file_version(path: Path) -> str:
+    """Short SHA-256 of a model file, identifies the exact model that served a request."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def compiled_path(model_path: Path) -> Path:
+    """Path of the compiled predictor of a model file."""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name + COMPILED_SUFFIX)
+
+
+class CompiledForest:
+    """
+    Random forest as packed node arrays.
+    
+    The nodes of all trees are concatenated; leaves point to themselves,
+    so walking max_depth steps from every root lands each (sample, tree)
+    pair on its leaf without per-tree branching. Leaf values are the
+    normalized class fractions, averaged over the trees like
+    RandomForestClassifier.predict_proba.
+    """
+    
+    kind = "forest"
+    
+    def __init__(
+        self,
+        classes: np.ndarray,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        max_depth: int
+    ):
+        self.classes_ = classes
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.max_depth = int(max_depth)
+    
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Pack the fitted trees of a RandomForestClassifier or ExtraTreesClassifier."""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            index = np.arange(n)
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, index, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, index, tree.children_right) + offset)
+            value = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+        return cls(
+            classes=_plain_classes(model.classes_),
+            roots=np.array(roots, dtype=np.int32),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values),
+            max_depth=max_depth
+        )
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities.
+        
+        Args:
+            X: Array-like of shape (n_samples, n_features)
+        
+        Returns:
+            Probabilities (n_samples, n_classes)
+        """
+        # Trees compare float32 inputs against float64 thresholds, like sklearn
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=1) / len(self.roots)
+    
+    def predict(self, X) -> np.ndarray:
+        """Most probable class per sample."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "roots": self.roots,
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "max_depth": np.array(self.max_depth)
+        }
+    
+    @classmethod
+    def from_arrays(cls, classes: np.ndarray, arrays) -> "CompiledForest":
+        return cls(
+            classes=classes,
+            roots=arrays["roots"],
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            value=arrays["value"],
+            max_depth=int(arrays["max_depth"])
+        )
+
+
+class CompiledSVC:
+    """
+    SVC with Platt-scaled one-vs-one probabilities as dense arrays.
+    
+    The kernel between a batch and all support vectors is one matrix
+    product (float32 by default); a coefficient matrix with one column
+    per class pair turns it into all one-vs-one decision values at once.
+    Pairwise probabilities and their coupling into class probabilities
+    follow libsvm's svm_predict_probability, vectorized over samples.
+    """
+    
+    kind = "svc"
+    
+    def __init__(
+        self,
+        classes: np.ndarray,
+        support_vectors: np.ndarray,
+        pair_coef: np.ndarray,
+        intercept: np.ndarray,
+        prob_a: np.ndarray,
+        prob_b: np.ndarray,
+        kernel: str,
+        gamma: float,
+        coef0: float,
+        degree: int
+    ):
+        self.classes_ = classes
+        self.support_vectors = support_vectors
+        self.sv_norms = np.einsum(
+            'ij,ij->i', support_vectors.astype(np.float64), support_vectors.astype(np.float64)
+        )
+        self.pair_coef = pair_coef
+        self.intercept = intercept
+        self.prob_a = prob_a
+        self.prob_b = prob_b
+        self.kernel = kernel
+        self.gamma = float(gamma)
+        self.coef0 = float(coef0)
+        self.degree = int(degree)
+        n_classes = len(classes)
+        self.pairs = np.array(
+            [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)], dtype=np.int64
+        ).reshape(-1, 2)
+    
+    @classmethod
+    def from_sklearn(cls, model, dtype=np.float32) -> "CompiledSVC":
+        """
+        Convert a fitted sklearn SVC.
+        
+        Args:
+            model: SVC trained with probability=True
+            dtype: Storage and kernel precision of the support vectors
+        """
+        if model.kernel not in ('linear', 'poly', 'rbf', 'sigmoid'):
+            raise ValueError(f"SVC kernel '{model.kernel}' can't be compiled")
+        if not getattr(model, 'probability', False) or len(model._probA) == 0:
+            raise ValueError("SVC was trained without probability=True")
+        
+        # libsvm's own (unflipped) coefficients: decision = sum(coef * K) - rho
+        dual_coef = np.asarray(model._dual_coef_, dtype=np.float64)
+        n_support = np.asarray(model._n_support, dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(n_support)])
+        n_classes = len(n_support)
+        pair_coef = np.zeros((dual_coef.shape[1], n_classes * (n_classes - 1) // 2))
+        p = 0
+        for i in range(n_classes):
+            for j in range(i + 1, n_classes):
+                pair_coef[starts[i]:starts[i + 1], p] = dual_coef[j - 1, starts[i]:starts[i + 1]]
+                pair_coef[starts[j]:starts[j + 1], p] = dual_coef[i, starts[j]:starts[j + 1]]
+                p += 1
+        return cls(
+            classes=_plain_classes(model.classes_),
+            support_vectors=np.asarray(model.support_vectors_, dtype=dtype),
+            pair_coef=pair_coef,
+            intercept=np.asarray(model._intercept_, dtype=np.float64),
+            prob_a=np.asarray(model._probA, dtype=np.float64),
+            prob_b=np.asarray(model._probB, dtype=np.float64),
+            kernel=model.kernel,
+            gamma=model._gamma,
+            coef0=model.coef0,
+            degree=model.degree
+        )
+    
+    def _kernel(self, X: np.ndarray) -> np.ndarray:
+        """Kernel matrix (n_samples, n_support_vectors) in float64."""
+        Xc = np.asarray(X, dtype=self.support_vectors.dtype)
+        dot = (Xc @ self.support_vectors.T).astype(np.float64)
+        if self.kernel == 'linear':
+            return dot
+        if self.kernel == 'rbf':
+            X64 = Xc.astype(np.float64)
+            sq_dist = np.einsum('ij,ij->i', X64, X64)[:, None] + self.sv_norms[None, :] - 2.0 * dot
+            np.maximum(sq_dist, 0.0, out=sq_dist)
+            return np.exp(-self.gamma * sq_dist)
+        if self.kernel == 'poly':
+            return (self.gamma * dot + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dot + self.coef0)
+    
+    def decision_values(self, X) -> np.ndarray:
+        """One-vs-one decision values (n_samples, n_pairs) in libsvm's pair order."""
+        return self._kernel(X) @ self.pair_coef + self.intercept
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities.
+        
+        Args:
+            X: Array-like of shape (n_samples, n_features)
+        
+        Returns:
+            Probabilities (n_samples, n_classes)
+        """
+        decision = self.decision_values(X)
+        # Platt sigmoid per pair, written to avoid cancellation like libsvm
+        f = decision * self.prob_a + self.prob_b
+        e = np.exp(-np.abs(f))
+        pairwise = np.where(f >= 0, e / (1.0 + e), 1.0 / (1.0 + e))
+        pairwise = np.clip(pairwise, MIN_PROB, 1.0 - MIN_PROB)
+        
+        n_classes = len(self.classes_)
+        r = np.zeros((len(decision), n_classes, n_classes))
+        i, j = self.pairs[:, 0], self.pairs[:, 1]
+        r[:, i, j] = pairwise
+        r[:, j, i] = 1.0 - pairwise
+        return _multiclass_probability(r)
+    
+    def predict(self, X) -> np.ndarray:
+        """One-vs-one voting (what SVC.predict returns, not the argmax of predict_proba)."""
+        decision = self.decision_values(X)
+        votes = np.zeros((len(decision), len(self.classes_)), dtype=np.int64)
+        rows = np.arange(len(decision))
+        for p, (i, j) in enumerate(self.pairs):
+            winner = np.where(decision[:, p] > 0, i, j)
+            np.add.at(votes, (rows, winner), 1)
+        return self.classes_[np.argmax(votes, axis=1)]
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "support_vectors": self.support_vectors,
+            "pair_coef": self.pair_coef,
+            "intercept": self.intercept,
+            "prob_a": self.prob_a,
+            "prob_b": self.prob_b,
+            "kernel": np.array(self.kernel),
+            "params": np.array([self.gamma, self.coef0, self.degree], dtype=np.float64)
+        }
+    
+    @classmethod
+    def from_arrays(cls, classes: np.ndarray, arrays) -> "CompiledSVC":
+        gamma, coef0, degree = arrays["params"]
+        return cls(
+            classes=classes,
+            support_vectors=arrays["support_vectors"],
+            pair_coef=arrays["pair_coef"],
+            intercept=arrays["intercept"],
+            prob_a=arrays["prob_a"],
+            prob_b=arrays["prob_b"],
+            kernel=str(arrays["kernel"]),
+            gamma=gamma,
+            coef0=coef0,
+            degree=int(degree)
+        )
+
+
+COMPILED_KINDS = {CompiledForest.kind: CompiledForest, CompiledSVC.kind: CompiledSVC}
+
+
+def _plain_classes(classes) -> np.ndarray:
+    """Class labels as a non-object array (storable without pickle)."""
+    classes = np.asarray(classes)
+    return classes.astype(str) if classes.dtype == object else classes
+
+
+def _multiclass_probability(r: np.ndarray) -> np.ndarray:
+    """
+    Couple pairwise probabilities into class probabilities.
+    
+    libsvm's multiclass_probability (Wu, Lin and Weng, method 2) for a
+    batch: each sample stops updating once its own error is below eps.
+    Also used for two classes, as sklearn's libsvm does.
+    
+    Args:
+        r: Pairwise probabilities (n_samples, k, k), r[:, i, j] = P(i | i or j)
+    
+    Returns:
+        Probabilities (n_samples, k)
+    """
+    n, k, _ = r.shape
+    rt = r.transpose(0, 2, 1)
+    Q = -rt * r
+    diagonal = np.arange(k)
+    Q[:, diagonal, diagonal] = (rt ** 2).sum(axis=2) - rt[:, diagonal, diagonal] ** 2
+    eps = 0.005 / k
+    if n <= SMALL_BATCH:
+        return np.array([_couple_row(Q_row, k, eps) for Q_row in Q.tolist()]).reshape(n, k)
+    p = np.full((n, k), 1.0 / k)
+    for _ in range(max(100, k)):
+        Qp = np.einsum('ntj,nj->nt', Q, p)
+        pQp = (p * Qp).sum(axis=1)
+        active = np.abs(Qp - pQp[:, None]).max(axis=1) >= eps
+        if not active.any():
+            break
+        for t in range(k):
+            diff = np.where(active, (-Qp[:, t] + pQp) / Q[:, t, t], 0.0)
+            p[:, t] += diff
+            pQp = (pQp + diff * (diff * Q[:, t, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Q[:, t, :]) / (1 + diff)[:, None]
+            p /= (1 + diff)[:, None]
+    return p
+
+
+def _couple_row(Q: list, k: int, eps: float) -> list:
+    """_multiclass_probability for a single row, on Python floats."""
+    p = [1.0 / k] * k
+    for _ in range(max(100, k)):
+        Qp = [sum(Q[t][j] * p[j] for j in range(k)) for t in range(k)]
+        pQp = sum(p[t] * Qp[t] for t in range(k))
+        if max(abs(Qp[t] - pQp) for t in range(k)) < eps:
+            break
+        for t in range(k):
+            diff = (-Qp[t] + pQp) / Q[t][t]
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q[t][t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            for j in range(k):
+                Qp[j] = (Qp[j] + diff * Q[t][j]) / (1 + diff)
+                p[j] /= (1 + diff)
+    return p
+
+
+def compile_model(model, dtype=np.float32):
+    """
+    Compile a fitted sklearn model.
+    
+    Args:
+        model: SVC (probability=True), RandomForestClassifier or ExtraTreesClassifier
+        dtype: Support-vector precision for SVMs (forests always use float32 inputs)
+    
+    Returns:
+        CompiledSVC or CompiledForest
+    
+    Raises:
+        ValueError: If the model type or configuration can't be compiled
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.svm import SVC
+    if isinstance(model, SVC):
+        return CompiledSVC.from_sklearn(model, dtype=dtype)
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return CompiledForest.from_sklearn(model)
+    raise ValueError(f"Can't compile {type(model).__name__} (supported: SVC, RandomForestClassifier)")
+
+
+def check_parity(model, compiled, X, tolerance: float = PARITY_TOLERANCE) -> Dict:
+    """
+    Compare a compiled predictor with the sklearn model it was compiled from.
+    
+    Batched and single-row probabilities must be within tolerance of the
+    model's, and every predicted label must match.
+    
+    Args:
+        model: Fitted sklearn model
+        compiled: Result of compile_model(model)
+        X: Input rows
+        tolerance: Largest allowed absolute probability difference
+    
+    Returns:
+        Dictionary with max_diff, same_labels (fraction) and ok
+    """
+    X = np.asarray(X)
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    single = np.vstack([compiled.predict_proba(X[i:i + 1]) for i in range(min(len(X), PARITY_SINGLE_ROWS))])
+    max_diff = max(
+        float(np.max(np.abs(expected - actual))),
+        float(np.max(np.abs(expected[:len(single)] - single)))
+    )
+    same_labels = float(np.mean(model.predict(X) == compiled.predict(X)))
+    return {
+        "max_diff": max_diff,
+        "same_labels": same_labels,
+        "ok": max_diff <= tolerance and same_labels == 1.0
+    }
+
+
+def save_compiled(compiled, path: Path, source_version: str):
+    """
+    Write a compiled predictor (written to a temporary file, then renamed).
+    
+    Args:
+        compiled: CompiledSVC or CompiledForest
+        path: Output file (see compiled_path)
+        source_version: file_version of the model it was compiled from
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            format=np.array(COMPILED_FORMAT),
+            kind=np.array(compiled.kind),
+            source_version=np.array(source_version),
+            classes=compiled.classes_,
+            **compiled.to_arrays()
+        )
+    os.replace(tmp_path, path)
+
+
+def load_compiled(path: Path) -> Tuple[object, str]:
+    """
+    Read a compiled predictor.
+    
+    Returns:
+        The predictor and the file_version of the model it was compiled from
+    
+    Raises:
+        ValueError: If the file has an unknown format or kind
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        if int(arrays["format"]) != COMPILED_FORMAT:
+            raise ValueError(f"Unsupported compiled model format: {int(arrays['format'])}")
+        kind = str(arrays["kind"])
+        if kind not in COMPILED_KINDS:
+            raise ValueError(f"Unknown compiled model kind: {kind}")
+        arrays = {name: arrays[name] for name in arrays.files}
+    return COMPILED_KINDS[kind].from_arrays(arrays["classes"], arrays), str(arrays["source_version"])
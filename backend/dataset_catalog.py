@@ -0,0 +1,263 @@
+"""
+Content-addressed dataset catalog for speaker identification.
+Keeps an append-only manifest (JSON lines) with one entry per audio file:
+content hash, speaker, path, duration, sample rate and train/test split,
+plus the ingestion probe verdict for uploaded files (see audio_probe.py).
+Training, evaluation and stats read the manifest instead of walking data/raw.
+"""
+import hashlib
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import soundfile as sf
+
+# Audio formats accepted in data/raw
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.webm', '.ogg')
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+def hash_file(file_path: Path) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def assign_split(file_hash: str, test_fraction: float = 0.2) -> str:
+    """Deterministic train/test assignment from the content hash."""
+    return 'test' if int(file_hash[:8], 16) % 1000 < test_fraction * 1000 else 'train'
+
+
+def assign_shard(file_hash: str, num_shards: int) -> int:
+    """Deterministic shard number from the content hash (independent of the split)."""
+    return int(file_hash[8:16], 16) % num_shards
+
+
+def probe_audio_info(file_path: Path) -> Dict:
+    """
+    Read duration and sample rate from the container header.
+
+    Falls back to a full decode with librosa for formats soundfile can't read.
+    """
+    try:
+        info = sf.info(str(file_path))
+        return {'duration_s': float(info.duration), 'sample_rate': int(info.samplerate)}
+    except Exception:
+        pass
+    try:
+        import librosa
+        return {
+            'duration_s': float(librosa.get_duration(path=str(file_path))),
+            'sample_rate': int(librosa.get_samplerate(str(file_path)))
+        }
+    except Exception:
+        return {'duration_s': None, 'sample_rate': None}
+
+
+class DatasetCatalog:
+    """Manifest of the audio corpus, updated incrementally as files arrive."""
+
+    def __init__(
+        self,
+        data_dir: str = "data/raw",
+        manifest_path: Optional[str] = None,
+        test_fraction: float = 0.2
+    ):
+        """
+        Args:
+            data_dir: Root directory with one folder per speaker
+            manifest_path: Manifest file (defaults to <data_dir>/../manifest.jsonl)
+            test_fraction: Fraction of files assigned to the test split
+        """
+        self.data_dir = Path(data_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else self.data_dir.parent / "manifest.jsonl"
+        self.test_fraction = test_fraction
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._loaded_size = 0
+        self.load()
+
+    def load(self):
+        """Read new manifest lines (the manifest is append-only)."""
+        if not self.manifest_path.exists():
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            f.seek(self._loaded_size)
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry['hash']] = entry
+            self._loaded_size = f.tell()
+
+    def _append(self, entries: List[Dict]):
+        """Append entries to the manifest file and the in-memory index."""
+        if not entries:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._loaded_size = f.tell()
+        for entry in entries:
+            self._entries[entry['hash']] = entry
+
+    def _make_entry(self, file_path: Path, file_hash: str, speaker: str, probe: Optional[Dict] = None) -> Dict:
+        """Build a manifest entry for a file already inside data_dir (header fields from probe if given)."""
+        entry = {
+            'hash': file_hash,
+            'speaker': speaker,
+            'path': file_path.relative_to(self.data_dir).as_posix(),
+            'size_bytes': file_path.stat().st_size,
+            'split': assign_split(file_hash, self.test_fraction),
+            'added_at': time.time()
+        }
+        if probe is not None and probe.get('stats'):
+            entry['duration_s'] = probe['stats']['duration_ms'] / 1000 if probe['stats']['duration_ms'] else None
+            entry['sample_rate'] = probe['stats']['sample_rate']
+            entry['quality'] = {'status': probe['status'], 'issues': [i['code'] for i in probe['issues']]}
+        else:
+            entry.update(probe_audio_info(file_path))
+        return entry
+
+    def add_file(self, src_path: str, speaker: str, extension: Optional[str] = None,
+                 file_hash: Optional[str] = None, probe: Optional[Dict] = None) -> Dict:
+        """
+        Move a new audio file into the corpus under its content hash.
+
+        Files whose content is already catalogued are dropped, so repeated
+        uploads never overwrite or duplicate existing data.
+
+        Args:
+            src_path: Path of the file to add (moved into data_dir)
+            speaker: Speaker label
+            extension: File extension (defaults to the source extension)
+            file_hash: Precomputed SHA-256 of the content
+            probe: audio_probe.probe_file result (recorded instead of reading the header again)
+
+        Returns:
+            Manifest entry (with 'duplicate': True if it was already present)
+        """
+        src_path = Path(src_path)
+        file_hash = file_hash or hash_file(src_path)
+        extension = (extension or src_path.suffix or '.wav').lower()
+
+        with self._lock:
+            self.load()
+            existing = self._entries.get(file_hash)
+            if existing is not None:
+                src_path.unlink(missing_ok=True)
+                return dict(existing, duplicate=True)
+
+            speaker_dir = self.data_dir / speaker
+            speaker_dir.mkdir(parents=True, exist_ok=True)
+            dest_path = speaker_dir / f"{file_hash[:16]}{extension}"
+            shutil.move(str(src_path), str(dest_path))
+
+            entry = self._make_entry(dest_path, file_hash, speaker, probe)
+            self._append([entry])
+            return entry
+
+    def sync(self) -> int:
+        """
+        Catalogue files in data_dir that are not in the manifest yet.
+
+        Only needed once for an existing tree (or after files were copied
+        in by hand); normal ingestion goes through add_file.
+
+        Returns:
+            Number of new entries
+        """
+        with self._lock:
+            self.load()
+            known_paths = {entry['path'] for entry in self._entries.values()}
+            new_entries = []
+            if self.data_dir.exists():
+                for speaker_dir in sorted(d for d in self.data_dir.iterdir() if d.is_dir()):
+                    for file_path in sorted(speaker_dir.iterdir()):
+                        if file_path.suffix.lower() not in AUDIO_EXTENSIONS:
+                            continue
+                        rel_path = file_path.relative_to(self.data_dir).as_posix()
+                        if rel_path in known_paths:
+                            continue
+                        file_hash = hash_file(file_path)
+                        if file_hash in self._entries:
+                            continue
+                        entry = self._make_entry(file_path, file_hash, speaker_dir.name)
+                        self._entries[file_hash] = entry
+                        new_entries.append(entry)
+            self._append(new_entries)
+            return len(new_entries)
+
+    def entries(self, split: Optional[str] = None, speakers: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        List catalogued files, ordered by speaker and path.
+
+        Args:
+            split: Only return 'train' or 'test' entries
+            speakers: Only return entries of these speakers
+
+        Returns:
+            Manifest entries
+        """
+        self.load()
+        speakers = set(speakers) if speakers is not None else None
+        selected = [
+            entry for entry in list(self._entries.values())  # may grow while the evaluator reads it
+            if (split is None or entry['split'] == split)
+            and (speakers is None or entry['speaker'] in speakers)
+        ]
+        return sorted(selected, key=lambda entry: (entry['speaker'], entry['path']))
+
+    def file_path(self, entry: Dict) -> Path:
+        """Absolute path of a manifest entry."""
+        return self.data_dir / entry['path']
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-speaker corpus statistics from the manifest.
+
+        Returns:
+            Dictionary with file counts, durations, splits and flagged uploads per speaker
+        """
+        speakers: Dict[str, Dict] = {}
+        for entry in self.entries():
+            stats = speakers.setdefault(entry['speaker'], {
+                'files': 0, 'train_files': 0, 'test_files': 0, 'flagged_files': 0, 'duration_s': 0.0,
+                'sample_rates': []
+            })
+            stats['files'] += 1
+            stats[f"{entry['split']}_files"] += 1
+            if entry.get('quality', {}).get('status') == 'flagged':
+                stats['flagged_files'] += 1
+            stats['duration_s'] += entry.get('duration_s') or 0.0
+            if entry.get('sample_rate') and entry['sample_rate'] not in stats['sample_rates']:
+                stats['sample_rates'].append(entry['sample_rate'])
+        return {
+            'total_files': sum(s['files'] for s in speakers.values()),
+            'total_duration_s': sum(s['duration_s'] for s in speakers.values()),
+            'speakers': speakers
+        }
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build or update the dataset manifest')
+    parser.add_argument('--data-dir', type=str, default='data/raw', help='Audio data directory')
+    parser.add_argument('--manifest', type=str, default=None, help='Manifest path')
+    args = parser.parse_args()
+
+    catalog = DatasetCatalog(args.data_dir, args.manifest)
+    added = catalog.sync()
+    print(f"Catalogued {added} new file(s), {len(catalog)} total in {catalog.manifest_path}")
@@ -0,0 +1,229 @@
+"""
+Speaker diarization for long recordings.
+Features are computed once for the whole file; the overlapping analysis
+windows are strided views into that frame matrix and are scored with a
+single batched predict_proba call, then smoothed and merged into segments.
+"""
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import dct
+from scipy.ndimage import uniform_filter1d
+
+from audio_processor import AudioProcessor
+from feature_backend import N_MELS_MFCC
+
+
+def _window_mfccs(
+    processor: AudioProcessor,
+    audio: np.ndarray,
+    frames_per_window: int,
+    step_frames: int,
+    chunk_size: int = 256
+) -> Iterator[np.ndarray]:
+    """
+    Per-window MFCCs from a single STFT of the whole recording.
+    
+    librosa.feature.mfcc clips the log-mel spectrogram to 80 dB below the
+    clip's own maximum, so that floor is applied per window before the
+    DCT. Windows are processed in chunks to bound memory on long files.
+    
+    Yields:
+        MFCC blocks of shape (n_windows_in_chunk, n_mfcc, frames_per_window)
+    """
+    mel = processor.features.melspectrogram(
+        audio, processor.sample_rate, N_MELS_MFCC, processor.hop_length
+    )
+    log_mel = processor.features.power_to_db(mel, top_db=None)
+    # (n_mels, n_windows, frames_per_window) strided view, no copy
+    windows = sliding_window_view(log_mel, frames_per_window, axis=1)[:, ::step_frames]
+    
+    for begin in range(0, windows.shape[1], chunk_size):
+        block = windows[:, begin:begin + chunk_size].transpose(1, 0, 2).copy()
+        floor = block.max(axis=(1, 2)) - 80.0
+        np.maximum(block, floor[:, None, None], out=block)
+        yield dct(block, type=2, norm="ortho", axis=1)[:, :processor.n_mfcc]
+
+
+def window_features(
+    processor: AudioProcessor,
+    audio: np.ndarray,
+    feature_type: str = "mfcc",
+    window_ms: Optional[int] = None,
+    step_ms: int = 500
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Feature rows for overlapping windows of a recording.
+    
+    The STFT and mel spectrogram are computed once; each window is a view
+    of consecutive frames and yields the same features as a clip of
+    window_ms processed on its own, up to the STFT padding at clip edges.
+    
+    Args:
+        processor: Audio processor (sample rate, hop length, MFCC settings)
+        audio: Whole recording
+        feature_type: 'mfcc' (flattened frames) or 'mfcc_stats' (pooled statistics)
+        window_ms: Analysis window length (default: processor.target_length_ms)
+        step_ms: Hop between window starts
+    
+    Returns:
+        Feature matrix (n_windows, n_features) and window start times in seconds
+    """
+    if feature_type not in ("mfcc", "mfcc_stats"):
+        raise ValueError(f"Diarization does not support feature type: {feature_type}")
+    
+    window_ms = window_ms or processor.target_length_ms
+    window_samples = int(processor.sample_rate * window_ms / 1000)
+    if len(audio) < window_samples:
+        audio = processor.preprocess_audio(audio, target_length_ms=window_ms)
+    
+    hop_length = processor.hop_length
+    frames_per_window = 1 + window_samples // hop_length
+    step_frames = max(1, int(round(step_ms / 1000 * processor.sample_rate / hop_length)))
+    
+    blocks = []
+    for mfccs in _window_mfccs(processor, audio, frames_per_window, step_frames):
+        if feature_type == "mfcc":
+            # Frame-major rows, like extract_mfcc(clip).flatten()
+            blocks.append(mfccs.transpose(0, 2, 1).reshape(len(mfccs), -1))
+        else:
+            # Same pooling as AudioProcessor.extract_mfcc_stats
+            delta = processor.features.delta(mfccs, width=9, order=1)
+            delta2 = processor.features.delta(mfccs, width=9, order=2)
+            blocks.append(np.concatenate([
+                mfccs.mean(axis=2), mfccs.std(axis=2),
+                delta.mean(axis=2), delta.std(axis=2),
+                delta2.mean(axis=2), delta2.std(axis=2)
+            ], axis=1))
+    features = np.concatenate(blocks)
+    
+    starts = np.arange(len(features)) * step_frames * hop_length / processor.sample_rate
+    return features, starts
+
+
+def merge_segments(
+    labels: np.ndarray,
+    confidences: np.ndarray,
+    starts: np.ndarray,
+    window_s: float,
+    duration_s: float,
+    min_segment_s: float = 0.0
+) -> List[Dict]:
+    """
+    Merge per-window labels into contiguous speaker segments.
+    
+    Each window is attributed the span around its center up to the
+    midpoints with its neighbours. Segments shorter than min_segment_s are
+    absorbed into the preceding segment (the following one at the start),
+    shortest first.
+    
+    Returns:
+        Segments with speaker, start_s, end_s and mean confidence
+    """
+    centers = starts + window_s / 2
+    bounds = np.concatenate([[0.0], (centers[1:] + centers[:-1]) / 2, [duration_s]])
+    
+    segments = []
+    for i, label in enumerate(labels):
+        if segments and segments[-1]["speaker"] == label:
+            segments[-1]["end_s"] = bounds[i + 1]
+            segments[-1]["_confidences"].append(confidences[i])
+        else:
+            segments.append({
+                "speaker": label,
+                "start_s": bounds[i],
+                "end_s": bounds[i + 1],
+                "_confidences": [confidences[i]]
+            })
+    
+    while len(segments) > 1:
+        i = min(range(len(segments)), key=lambda j: segments[j]["end_s"] - segments[j]["start_s"])
+        if segments[i]["end_s"] - segments[i]["start_s"] >= min_segment_s:
+            break
+        short = segments.pop(i)
+        # Absorb into a neighbour, then join the neighbours if they now match
+        j = i - 1 if i > 0 else 0
+        segments[j]["start_s"] = min(segments[j]["start_s"], short["start_s"])
+        segments[j]["end_s"] = max(segments[j]["end_s"], short["end_s"])
+        segments[j]["_confidences"].extend(short["_confidences"])
+        if j + 1 < len(segments) and segments[j + 1]["speaker"] == segments[j]["speaker"]:
+            following = segments.pop(j + 1)
+            segments[j]["end_s"] = following["end_s"]
+            segments[j]["_confidences"].extend(following["_confidences"])
+    
+    return [
+        {
+            "speaker": str(segment["speaker"]),
+            "start_s": round(float(segment["start_s"]), 3),
+            "end_s": round(float(segment["end_s"]), 3),
+            "confidence": float(np.mean(segment.pop("_confidences")))
+        }
+        for segment in segments
+    ]
+
+
+def diarize(
+    processor: AudioProcessor,
+    model_manager,
+    audio: np.ndarray,
+    model_name: str,
+    feature_type: str = "mfcc",
+    step_ms: int = 500,
+    smoothing: int = 5,
+    min_confidence: float = 0.0,
+    min_segment_ms: int = 0
+) -> Dict:
+    """
+    Build a "who spoke when" timeline for a recording.
+    
+    Args:
+        processor: Audio processor used for feature extraction
+        model_manager: ModelManager holding the classifier
+        audio: Whole recording at processor.sample_rate
+        model_name: Model to score windows with
+        feature_type: Feature type the model was trained on
+        step_ms: Hop between analysis windows
+        smoothing: Moving-average width (in windows) applied to the probabilities
+        min_confidence: Windows below this smoothed confidence are labelled 'unknown'
+        min_segment_ms: Segments shorter than this are merged into a neighbour
+    
+    Returns:
+        Dictionary with segments, per-speaker talk time and timings
+    """
+    start = time.perf_counter()
+    features, starts = window_features(processor, audio, feature_type, step_ms=step_ms)
+    features_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    probabilities, classes, model_used = model_manager.predict_proba(features, model_name)
+    inference_ms = (time.perf_counter() - start) * 1000
+    
+    if smoothing > 1 and len(probabilities) > 1:
+        probabilities = uniform_filter1d(probabilities, size=smoothing, axis=0, mode="nearest")
+    best = np.argmax(probabilities, axis=1)
+    confidences = probabilities[np.arange(len(best)), best]
+    labels = np.where(confidences >= min_confidence, classes[best].astype(str), "unknown")
+    
+    duration_s = max(len(audio), 1) / processor.sample_rate
+    window_s = processor.target_length_ms / 1000
+    segments = merge_segments(
+        labels, confidences, starts, window_s, duration_s, min_segment_s=min_segment_ms / 1000
+    )
+    
+    speaking_time = {}
+    for segment in segments:
+        speaking_time[segment["speaker"]] = round(
+            speaking_time.get(segment["speaker"], 0.0) + segment["end_s"] - segment["start_s"], 3
+        )
+    
+    return {
+        "model_used": model_used,
+        "duration_s": round(duration_s, 3),
+        "window_count": len(features),
+        "segments": segments,
+        "speaking_time_s": speaking_time,
+        "features_ms": features_ms,
+        "inference_ms": inference_ms
+    }
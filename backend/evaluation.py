@@ -0,0 +1,315 @@
+"""
+Holdout evaluation of loaded models.
+The catalog's test split is the holdout. Its features are cached in one
+FeatureStore per feature setting; when files are added, the store is
+rebuilt and rows of unchanged files are copied, not decoded again. Every
+loaded model is re-scored on the holdout with batched inference whenever
+its model file or the holdout changes. That way accuracy, confusion
+matrices and latency are measured on the same files for all models,
+unlike the training-time numbers in the .meta files. Models that weren't
+trained on the manifest split (split_source != 'manifest') may have seen
+holdout files and are not scored.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
+
+from feature_store import FeatureStore, feature_settings
+
+RESULTS_FILE = "results.json"
+
+# Rows per predict_proba call while scoring
+BATCH_SIZE = 256
+
+# Single-row calls timed per model for the latency figure
+LATENCY_REPEATS = 20
+
+
+def holdout_version(entries: List[Dict]) -> str:
+    """Short SHA-256 of the holdout file set (content hashes, independent of feature settings)."""
+    digest = hashlib.sha256()
+    for file_hash in sorted(entry['hash'] for entry in entries):
+        digest.update(file_hash.encode())
+    return digest.hexdigest()[:12]
+
+
+def score_predictions(y_true: np.ndarray, probabilities: np.ndarray, classes: np.ndarray) -> Dict:
+    """
+    Accuracy, macro/weighted precision, recall and F1 and the confusion matrix.
+    
+    Holdout speakers a model was not trained on count as errors.
+    
+    Returns:
+        Metrics dictionary (JSON-serializable)
+    """
+    classes = np.asarray(classes).astype(str)
+    y_true = np.asarray(y_true).astype(str)
+    y_pred = classes[np.argmax(probabilities, axis=1)]
+    speakers = sorted(set(y_true))
+    labels = sorted(set(y_true) | set(y_pred))
+    metrics = {
+        'accuracy': float(np.mean(y_pred == y_true)),
+        'mean_confidence': float(np.mean(np.max(probabilities, axis=1)))
+    }
+    for average in ('macro', 'weighted'):
+        precision, recall, f1, _ = precision_recall_fscore_support(
+            y_true, y_pred, labels=speakers, average=average, zero_division=0
+        )
+        metrics[f'precision_{average}'] = float(precision)
+        metrics[f'recall_{average}'] = float(recall)
+        metrics[f'f1_{average}'] = float(f1)
+    metrics['confusion_matrix'] = confusion_matrix(y_true, y_pred, labels=labels).tolist()
+    metrics['confusion_labels'] = labels
+    metrics['unknown_speakers'] = sorted(set(speakers) - set(classes))
+    return metrics
+
+
+class HoldoutEvaluator:
+    """Re-score loaded models on a cached holdout feature set."""
+    
+    def __init__(
+        self,
+        model_manager,
+        catalog,
+        processor_for: Callable[[str], object],
+        cache_dir: str = "../data/features/holdout",
+        max_workers: Optional[int] = None,
+        batch_size: int = BATCH_SIZE
+    ):
+        """
+        Args:
+            model_manager: ModelManager whose loaded models are evaluated
+            catalog: DatasetCatalog providing the test split
+            processor_for: Returns the AudioProcessor a model's features are extracted with
+            cache_dir: Directory for the holdout feature stores and results
+            max_workers: Models scored in parallel (default: number of CPUs)
+            batch_size: Rows per predict_proba call
+        """
+        self.model_manager = model_manager
+        self.catalog = catalog
+        self.processor_for = processor_for
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.results: Dict[str, Dict] = self._load_results()
+        self.status: Dict = {"state": "idle", "holdout_version": None, "last_run": None,
+                             "duration_ms": None, "evaluated": [], "skipped": [], "error": None}
+        self._lock = threading.Lock()  # guards results and status
+        self._run_lock = threading.Lock()  # one evaluation at a time
+        self._pending = False
+        self._worker: Optional[threading.Thread] = None
+    
+    def _load_results(self) -> Dict[str, Dict]:
+        """Results persisted by an earlier process (reused while versions match)."""
+        path = self.cache_dir / RESULTS_FILE
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read {path}: {e}")
+            return {}
+    
+    def _save_results(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / RESULTS_FILE
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.results, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def _holdout_independent(self, model_name: str) -> bool:
+        """Whether the model was trained on the manifest split, i.e. never on holdout files."""
+        return self.model_manager.model_metadata.get(model_name, {}).get('split_source') == 'manifest'
+    
+    def _is_current(self, model_name: str, version: str) -> bool:
+        result = self.results.get(model_name)
+        return (
+            result is not None
+            and self._holdout_independent(model_name)
+            and result.get('holdout_version') == version
+            and result.get('model_version') == self.model_manager.model_versions.get(model_name)
+        )
+    
+    def holdout_store(self, entries: List[Dict], processor, feature_type: str) -> FeatureStore:
+        """
+        Holdout features for one feature setting, extracted only when the holdout changed.
+        
+        Args:
+            entries: Test split manifest entries
+            processor: AudioProcessor with the model's feature settings
+            feature_type: Feature type of the model
+        
+        Returns:
+            FeatureStore with one row per decodable holdout file
+        """
+        settings = feature_settings(processor, feature_type)
+        name = f"{feature_type}_{hashlib.sha256(settings.encode()).hexdigest()[:12]}"
+        store = FeatureStore(str(self.cache_dir / name))
+        if not store.matches(entries, processor, feature_type):
+            store = FeatureStore.build(
+                str(self.cache_dir / name), self.catalog, entries, processor, feature_type=feature_type,
+                on_error=lambda entry, e: print(f"Warning: Holdout file {entry['path']} skipped: {e}")
+            )
+        return store
+    
+    def _score(self, model, X: np.ndarray, y: np.ndarray) -> Dict:
+        """Batched inference over the holdout and its metrics."""
+        start = time.perf_counter()
+        probabilities = np.vstack([
+            model.predict_proba(X[i:i + self.batch_size]) for i in range(0, len(X), self.batch_size)
+        ])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return {
+            **score_predictions(y, probabilities, model.classes_),
+            'inference_ms_per_sample_batched': elapsed_ms / len(X)
+        }
+    
+    @staticmethod
+    def _single_latency(model, X: np.ndarray) -> float:
+        """Median single-row predict_proba time (ms)."""
+        times = []
+        for i in range(LATENCY_REPEATS):
+            row = X[i % len(X):i % len(X) + 1]
+            start = time.perf_counter()
+            model.predict_proba(row)
+            times.append((time.perf_counter() - start) * 1000)
+        return float(np.median(times))
+    
+    def refresh(self, force: bool = False) -> Dict[str, Dict]:
+        """
+        Re-score loaded models whose model file or holdout changed.
+        
+        Models are scored in parallel; single-row latency is measured
+        afterwards one model at a time, so the figures don't include
+        contention between models.
+        
+        Args:
+            force: Re-score every loaded model
+        
+        Returns:
+            Current results of the loaded models
+        """
+        with self._run_lock:
+            started = time.perf_counter()
+            with self._lock:
+                self.status.update(state="running", error=None)
+            try:
+                entries = self.catalog.entries(split='test')
+                version = holdout_version(entries)
+                evaluated = self._refresh(entries, version, force) if entries else []
+                skipped = [name for name in list(self.model_manager.models) if not self._holdout_independent(name)]
+                error = None if entries else "Holdout (test split) is empty"
+            except Exception as e:
+                print(f"Warning: Holdout evaluation failed: {e}")
+                version, evaluated, skipped, error = self.status.get("holdout_version"), [], [], str(e)
+            
+            current = self.current_results(version)
+            self.model_manager.set_holdout_results(current)
+            with self._lock:
+                self.status.update(
+                    state="idle", holdout_version=version, last_run=time.time(),
+                    duration_ms=(time.perf_counter() - started) * 1000, evaluated=evaluated, skipped=skipped,
+                    error=error
+                )
+            return current
+    
+    def _refresh(self, entries: List[Dict], version: str, force: bool) -> List[str]:
+        # Snapshot model and version together; a model swapped during the run
+        # keeps the old version in its result and is re-scored next time
+        tasks = []
+        stores: Dict[str, FeatureStore] = {}
+        data: Dict[str, tuple] = {}
+        for model_name in list(self.model_manager.models):
+            model = self.model_manager.models.get(model_name)
+            if model is None or not hasattr(model, 'predict_proba') or not self._holdout_independent(model_name):
+                continue
+            if not force and self._is_current(model_name, version):
+                continue
+            feature_type = self.model_manager.get_feature_type(model_name)
+            processor = self.processor_for(model_name)
+            settings = feature_settings(processor, feature_type)
+            if settings not in stores:
+                stores[settings] = self.holdout_store(entries, processor, feature_type)
+                store = stores[settings]
+                if store.n_rows:
+                    data[settings] = (np.asarray(store.features(), dtype=np.float64), np.asarray(store.speakers))
+            if settings not in data:
+                continue
+            tasks.append((model_name, model, self.model_manager.model_versions.get(model_name), settings))
+        if not tasks:
+            return []
+        
+        def score(task):
+            model_name, model, _, settings = task
+            try:
+                return self._score(model, *data[settings])
+            except Exception as e:
+                print(f"Warning: Could not evaluate {model_name}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            scores = list(executor.map(score, tasks))
+        
+        for (_, model, _, settings), metrics in zip(tasks, scores):
+            if metrics is not None:
+                metrics['inference_ms_single'] = self._single_latency(model, data[settings][0])
+        
+        evaluated = []
+        with self._lock:
+            for (model_name, _, model_version, settings), metrics in zip(tasks, scores):
+                if metrics is None:
+                    continue
+                self.results[model_name] = {
+                    **metrics,
+                    'n_samples': len(data[settings][0]),
+                    'model_version': model_version,
+                    'holdout_version': version,
+                    'feature_settings': settings,
+                    'evaluated_at': time.time()
+                }
+                evaluated.append(model_name)
+            self._save_results()
+        return evaluated
+    
+    def current_results(self, version: Optional[str] = None) -> Dict[str, Dict]:
+        """Results of loaded models that match their model file and the holdout."""
+        if version is None:
+            version = self.status.get("holdout_version")
+        with self._lock:
+            return {
+                model_name: dict(self.results[model_name])
+                for model_name in list(self.model_manager.models)
+                if self._is_current(model_name, version)
+            }
+    
+    def schedule(self):
+        """Run refresh() in a background thread (coalescing requests made while it runs)."""
+        with self._lock:
+            self._pending = True
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run_pending, name="holdout-evaluation", daemon=True)
+            self._worker.start()
+    
+    def _run_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                self._pending = False
+            self.refresh()
+    
+    def get_status(self) -> Dict:
+        with self._lock:
+            return dict(self.status)
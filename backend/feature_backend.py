@@ -0,0 +1,251 @@
+"""
+Feature computation backends for AudioProcessor.
+
+LibrosaFeatures wraps librosa (the reference implementation used for
+training). NumpyFeatures reproduces the same resample, STFT, mel, dB,
+MFCC and delta computations with soxr and NumPy/SciPy and precomputed
+filter matrices, so a serving process doesn't have to import librosa
+(and numba) or pay for its JIT warm-up. Both decode files in-process
+(see audio_decoder.py).
+See compare_feature_backends.py for the parity check.
+"""
+import math
+from typing import Callable, Dict, Tuple, Union
+
+import numpy as np
+
+from audio_decoder import decode_file
+
+N_FFT = 2048  # librosa default frame length
+N_MELS_MFCC = 128  # librosa.feature.mfcc default mel bands
+AMIN = 1e-10  # power_to_db floor
+
+
+class LibrosaFeatures:
+    """Reference backend, delegates to librosa."""
+    
+    name = "librosa"
+    
+    def __init__(self):
+        import librosa
+        self._librosa = librosa
+    
+    def load(self, file_path: str, sample_rate: int, res_type: str) -> np.ndarray:
+        """
+        Decode a whole file to mono float32 at sample_rate.
+        
+        Same steps as librosa.load, but compressed containers are decoded
+        in-process; librosa.load (audioread) is only used as a last resort.
+        """
+        decoded = decode_file(file_path)
+        if decoded is None:
+            audio, _ = self._librosa.load(file_path, sr=sample_rate, mono=True, res_type=res_type)
+            return audio
+        audio, native_sr = decoded
+        return self.resample(self.to_mono(audio), native_sr, sample_rate, res_type)
+    
+    def to_mono(self, audio: np.ndarray) -> np.ndarray:
+        """Average channels of a (channels, samples) array."""
+        return self._librosa.to_mono(audio)
+    
+    def resample(self, audio: np.ndarray, orig_sr: int, target_sr: int, res_type: str) -> np.ndarray:
+        """Resample a 1D signal."""
+        return self._librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+    
+    def melspectrogram(self, audio: np.ndarray, sample_rate: int, n_mels: int, hop_length: int) -> np.ndarray:
+        """Mel power spectrogram (n_mels, n_frames)."""
+        return self._librosa.feature.melspectrogram(
+            y=audio, sr=sample_rate, n_mels=n_mels, hop_length=hop_length
+        )
+    
+    def power_to_db(
+        self,
+        spectrogram: np.ndarray,
+        ref: Union[float, Callable] = 1.0,
+        top_db: float = 80.0
+    ) -> np.ndarray:
+        """Convert a power spectrogram to decibels."""
+        return self._librosa.power_to_db(spectrogram, ref=ref, top_db=top_db)
+    
+    def mfcc(self, audio: np.ndarray, sample_rate: int, n_mfcc: int, hop_length: int) -> np.ndarray:
+        """MFCCs (n_mfcc, n_frames)."""
+        return self._librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=n_mfcc, hop_length=hop_length)
+    
+    def delta(self, data: np.ndarray, width: int, order: int) -> np.ndarray:
+        """Savitzky-Golay derivative along the last axis."""
+        return self._librosa.feature.delta(data, width=width, order=order)
+
+
+class NumpyFeatures:
+    """librosa-compatible features computed with NumPy/SciPy only."""
+    
+    name = "numpy"
+    
+    # Frames transformed per block (bounds the STFT working memory)
+    BLOCK_FRAMES = 1024
+    
+    def __init__(self):
+        # scipy.signal is heavy to import and only needed for deltas and
+        # polyphase resampling, so it is imported on first use
+        import scipy.fft
+        self._fft = scipy.fft
+        self._windows: Dict[int, np.ndarray] = {}
+        self._mel_bases: Dict[Tuple[int, int, int], np.ndarray] = {}
+    
+    # Decoding ---------------------------------------------------------------
+    
+    def load(self, file_path: str, sample_rate: int, res_type: str) -> np.ndarray:
+        """
+        Decode a whole file to mono float32 at sample_rate (like librosa.load).
+        
+        Files neither soundfile nor PyAV can read fall back to librosa.
+        """
+        decoded = decode_file(file_path)
+        if decoded is None:
+            return LibrosaFeatures().load(file_path, sample_rate, res_type)
+        audio, native_sr = decoded
+        return self.resample(self.to_mono(audio), native_sr, sample_rate, res_type)
+    
+    def to_mono(self, audio: np.ndarray) -> np.ndarray:
+        """Average channels of a (channels, samples) array."""
+        if audio.ndim > 1:
+            audio = np.mean(audio, axis=tuple(range(audio.ndim - 1)))
+        return audio
+    
+    def resample(self, audio: np.ndarray, orig_sr: int, target_sr: int, res_type: str) -> np.ndarray:
+        """Resample a 1D signal with soxr or scipy (same calls librosa makes)."""
+        if orig_sr == target_sr:
+            return audio
+        n_samples = int(math.ceil(len(audio) * target_sr / orig_sr))
+        if res_type.startswith("soxr"):
+            import soxr
+            resampled = soxr.resample(audio, orig_sr, target_sr, quality=res_type)
+        elif res_type == "polyphase":
+            from scipy.signal import resample_poly
+            g = math.gcd(int(orig_sr), int(target_sr))
+            resampled = resample_poly(audio, target_sr // g, orig_sr // g)
+        else:
+            return LibrosaFeatures().resample(audio, orig_sr, target_sr, res_type)
+        # Same length fix-up as librosa.resample(fix=True)
+        if len(resampled) > n_samples:
+            resampled = resampled[:n_samples]
+        elif len(resampled) < n_samples:
+            resampled = np.pad(resampled, (0, n_samples - len(resampled)))
+        return np.asarray(resampled, dtype=audio.dtype)
+    
+    # Spectral features ------------------------------------------------------
+    
+    def _window(self, n_fft: int) -> np.ndarray:
+        """Periodic Hann window (scipy.signal.get_window('hann', fftbins=True))."""
+        if n_fft not in self._windows:
+            self._windows[n_fft] = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        return self._windows[n_fft]
+    
+    def _mel_basis(self, sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+        """Slaney-style mel filter matrix (n_mels, 1 + n_fft // 2), as librosa.filters.mel."""
+        key = (sample_rate, n_fft, n_mels)
+        if key not in self._mel_bases:
+            fft_freqs = np.fft.rfftfreq(n=n_fft, d=1.0 / sample_rate)
+            mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel(0.0), _hz_to_mel(sample_rate / 2.0), n_mels + 2))
+            fdiff = np.diff(mel_freqs)
+            ramps = np.subtract.outer(mel_freqs, fft_freqs)
+            lower = -ramps[:-2] / fdiff[:-1, None]
+            upper = ramps[2:] / fdiff[1:, None]
+            weights = np.maximum(0, np.minimum(lower, upper))
+            weights *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, None]
+            self._mel_bases[key] = weights.astype(np.float32)
+        return self._mel_bases[key]
+    
+    def melspectrogram(self, audio: np.ndarray, sample_rate: int, n_mels: int, hop_length: int) -> np.ndarray:
+        """
+        Mel power spectrogram (n_mels, n_frames).
+        
+        Centered STFT with zero padding and a Hann window, computed in
+        blocks of frames that are projected onto the mel basis right away.
+        """
+        n_fft = N_FFT
+        audio = np.asarray(audio, dtype=np.float32)
+        padded = np.pad(audio, n_fft // 2, mode="constant")
+        frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop_length]
+        window = self._window(n_fft)
+        mel_basis = self._mel_basis(sample_rate, n_fft, n_mels)
+        
+        mel = np.empty((n_mels, len(frames)), dtype=np.float32)
+        for begin in range(0, len(frames), self.BLOCK_FRAMES):
+            block = self._fft.rfft(frames[begin:begin + self.BLOCK_FRAMES] * window, axis=1)
+            power = block.real ** 2 + block.imag ** 2
+            mel[:, begin:begin + len(block)] = mel_basis @ power.T
+        return mel
+    
+    def power_to_db(
+        self,
+        spectrogram: np.ndarray,
+        ref: Union[float, Callable] = 1.0,
+        top_db: float = 80.0
+    ) -> np.ndarray:
+        """Convert a power spectrogram to decibels (librosa.power_to_db semantics)."""
+        ref_value = ref(spectrogram) if callable(ref) else np.abs(ref)
+        log_spec = 10.0 * np.log10(np.maximum(AMIN, spectrogram))
+        log_spec -= 10.0 * np.log10(np.maximum(AMIN, ref_value))
+        if top_db is not None:
+            log_spec = np.maximum(log_spec, log_spec.max() - top_db)
+        return log_spec
+    
+    def mfcc(self, audio: np.ndarray, sample_rate: int, n_mfcc: int, hop_length: int) -> np.ndarray:
+        """MFCCs (n_mfcc, n_frames): DCT-II of the log-mel spectrogram."""
+        log_mel = self.power_to_db(self.melspectrogram(audio, sample_rate, N_MELS_MFCC, hop_length))
+        return self._fft.dct(log_mel, type=2, norm="ortho", axis=-2)[:n_mfcc]
+    
+    def delta(self, data: np.ndarray, width: int, order: int) -> np.ndarray:
+        """Savitzky-Golay derivative along the last axis (librosa.feature.delta)."""
+        from scipy.signal import savgol_filter
+        return savgol_filter(data, width, deriv=order, polyorder=order, axis=-1, mode="interp")
+
+
+def _hz_to_mel(frequencies):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above."""
+    frequencies = np.asanyarray(frequencies, dtype=np.float64)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(
+        frequencies >= min_log_hz,
+        min_log_mel + np.log(np.maximum(frequencies, min_log_hz) / min_log_hz) / logstep,
+        frequencies / f_sp
+    )
+
+
+def _mel_to_hz(mels):
+    """Inverse of _hz_to_mel."""
+    mels = np.asanyarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(
+        mels >= min_log_mel,
+        min_log_hz * np.exp(logstep * (mels - min_log_mel)),
+        f_sp * mels
+    )
+
+
+FEATURE_BACKENDS = {
+    "librosa": LibrosaFeatures,
+    "numpy": NumpyFeatures,
+}
+
+
+def get_feature_backend(name: str = "librosa"):
+    """
+    Create a feature backend by name.
+    
+    Args:
+        name: 'librosa' (reference) or 'numpy'
+    
+    Returns:
+        Backend instance
+    """
+    if name not in FEATURE_BACKENDS:
+        raise ValueError(f"Unknown feature backend: {name} (choose from {', '.join(FEATURE_BACKENDS)})")
+    return FEATURE_BACKENDS[name]()
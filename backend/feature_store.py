@@ -0,0 +1,363 @@
+"""
+On-disk feature cache for training.
+Feature rows are appended to a raw float32 file as they are extracted and
+read back through np.memmap in chunks, so neither extraction nor
+out-of-core training needs the whole matrix in memory. Speaker, split and
+content hash of every row are stored alongside, with a JSON header that
+identifies the corpus and feature settings the cache was built from.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+FEATURES_FILE = "features.f32"
+ROWS_FILE = "rows.npz"
+META_FILE = "meta.json"
+
+# Bump when the on-disk layout or the feature computation changes
+STORE_VERSION = 1
+
+
+def feature_settings(processor, feature_type: str) -> str:
+    """Settings that determine the feature values of a file."""
+    return (
+        f"{STORE_VERSION}:{feature_type}:{processor.sample_rate}:{processor.res_type}:{processor.features.name}:"
+        f"{processor.n_mfcc}:{processor.hop_length}:{processor.target_length_ms}"
+    )
+
+
+def corpus_fingerprint(file_hashes: Iterable[str], settings: str) -> str:
+    """Identify a set of files (by content hash) together with the feature settings."""
+    digest = hashlib.sha256(settings.encode())
+    for file_hash in sorted(file_hashes):
+        digest.update(file_hash.encode())
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """Feature matrix on disk (float32 rows) with per-row speaker, split and hash."""
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Store directory
+        """
+        self.path = Path(path)
+        self.meta: Optional[Dict] = None
+        self._rows: Optional[Dict[str, np.ndarray]] = None
+        meta_path = self.path / META_FILE
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+    
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        catalog,
+        entries: List[Dict],
+        processor,
+        feature_type: str = "mfcc",
+        on_error: Optional[Callable[[Dict, Exception], None]] = None,
+        extra_meta: Optional[Dict] = None
+    ) -> "FeatureStore":
+        """
+        Extract features for manifest entries and write them to a store.
+        
+        Rows are written in content-hash order, which interleaves speakers,
+        so consecutive chunks are usable as training batches. Only one
+        feature vector is held in memory at a time. Rows of files already
+        in an existing store with the same settings are copied instead of
+        being extracted again.
+        
+        Args:
+            path: Store directory (replaced if it exists)
+            catalog: DatasetCatalog resolving entry paths
+            entries: Manifest entries to extract
+            processor: AudioProcessor used for feature extraction
+            feature_type: Feature type passed to processor.process_file
+            on_error: Called with (entry, exception) for files that fail
+            extra_meta: Additional header fields (e.g. shard number)
+        
+        Returns:
+            The new store
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        settings = feature_settings(processor, feature_type)
+        
+        previous = cls(str(path))
+        previous_rows, previous_features = {}, None
+        if previous.exists and previous.meta.get('settings') == settings and previous.n_rows:
+            previous_rows = {file_hash: i for i, file_hash in enumerate(previous.hashes)}
+            previous_features = previous.features()
+        (path / META_FILE).unlink(missing_ok=True)
+        
+        ordered = sorted(entries, key=lambda entry: entry['hash'])
+        speakers, splits, hashes, failed = [], [], [], []
+        n_features = None
+        reused = 0
+        checksum = hashlib.sha256()
+        tmp_path = path / (FEATURES_FILE + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            for entry in ordered:
+                try:
+                    if entry['hash'] in previous_rows:
+                        row = np.array(previous_features[previous_rows[entry['hash']]])
+                        reused += 1
+                    else:
+                        features = processor.process_file(str(catalog.file_path(entry)), feature_type=feature_type)
+                        row = np.ascontiguousarray(features, dtype='<f4').ravel()
+                    if n_features is None:
+                        n_features = len(row)
+                    elif len(row) != n_features:
+                        raise ValueError(f"Feature size {len(row)} does not match {n_features}")
+                except Exception as e:
+                    failed.append(entry['hash'])
+                    if on_error is not None:
+                        on_error(entry, e)
+                    continue
+                data = row.tobytes()
+                f.write(data)
+                checksum.update(data)
+                speakers.append(entry['speaker'])
+                splits.append(entry['split'])
+                hashes.append(entry['hash'])
+        del previous_features  # release the old mapping before replacing the file
+        os.replace(tmp_path, path / FEATURES_FILE)
+        
+        meta = {
+            'feature_type': feature_type,
+            'sample_rate': processor.sample_rate,
+            'res_type': processor.res_type,
+            'feature_backend': processor.features.name,
+            'feature_config': processor.feature_config(),
+            'settings': settings,
+            'fingerprint': corpus_fingerprint((entry['hash'] for entry in entries), settings),
+            'n_features': n_features or 0,
+            'sha256': checksum.hexdigest(),
+            'failed': failed,
+            'reused_rows': reused,
+            **(extra_meta or {})
+        }
+        return cls._finish(path, meta, speakers, splits, hashes)
+    
+    @classmethod
+    def merge(cls, path: str, stores: List["FeatureStore"]) -> "FeatureStore":
+        """
+        Combine stores (e.g. shards of a corpus) into one store.
+        
+        Every input is verified against its checksum and all inputs must
+        share the same feature settings. Rows are merged in content-hash
+        order, so the result is identical to a store built from all
+        entries at once.
+        
+        Args:
+            path: Output store directory (replaced if it exists)
+            stores: Stores to combine
+        
+        Returns:
+            The merged store
+        
+        Raises:
+            ValueError: If a store is incomplete, corrupted or incompatible
+        """
+        for store in stores:
+            if not store.exists:
+                raise ValueError(f"Incomplete feature store: {store.path}")
+            if not store.verify():
+                raise ValueError(f"Checksum mismatch in feature store: {store.path}")
+        settings = {store.meta['settings'] for store in stores}
+        if len(settings) != 1:
+            raise ValueError(f"Feature stores were built with different settings: {sorted(settings)}")
+        n_features = {store.n_features for store in stores if store.n_rows}
+        if len(n_features) > 1:
+            raise ValueError(f"Feature stores have different feature sizes: {sorted(n_features)}")
+        
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / META_FILE).unlink(missing_ok=True)
+        
+        rows = heapq.merge(*[
+            zip(store.hashes, itertools.repeat(k), range(store.n_rows))
+            for k, store in enumerate(stores)
+        ])
+        features = [store.features() for store in stores]
+        speakers, splits, hashes = [], [], []
+        checksum = hashlib.sha256()
+        tmp_path = path / (FEATURES_FILE + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            for file_hash, k, i in rows:
+                data = np.array(features[k][i]).tobytes()
+                f.write(data)
+                checksum.update(data)
+                speakers.append(stores[k].speakers[i])
+                splits.append(stores[k].splits[i])
+                hashes.append(file_hash)
+        del features
+        os.replace(tmp_path, path / FEATURES_FILE)
+        
+        failed = [file_hash for store in stores for file_hash in store.meta['failed']]
+        first = stores[0].meta
+        meta = {
+            'feature_type': first['feature_type'],
+            'sample_rate': first['sample_rate'],
+            'res_type': first['res_type'],
+            'feature_backend': first['feature_backend'],
+            'feature_config': first.get('feature_config'),
+            'settings': first['settings'],
+            'fingerprint': corpus_fingerprint(hashes + failed, first['settings']),
+            'n_features': n_features.pop() if n_features else 0,
+            'sha256': checksum.hexdigest(),
+            'failed': failed,
+            'merged_from': [{'path': str(store.path), 'sha256': store.meta['sha256']} for store in stores]
+        }
+        return cls._finish(path, meta, speakers, splits, hashes)
+    
+    @classmethod
+    def _finish(cls, path: Path, meta: Dict, speakers: List[str], splits: List[str],
+                hashes: List[str]) -> "FeatureStore":
+        """Write the per-row arrays and the header of a store whose features are on disk."""
+        np.savez(
+            path / ROWS_FILE,
+            speakers=np.array(speakers, dtype=str),
+            splits=np.array(splits, dtype=str),
+            hashes=np.array(hashes, dtype=str)
+        )
+        meta = {
+            'version': STORE_VERSION,
+            **meta,
+            'n_rows': len(hashes),
+            'dtype': '<f4',
+            'created_at': time.time()
+        }
+        # Written last: a store without a header is incomplete
+        with open(path / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        return cls(str(path))
+    
+    @property
+    def exists(self) -> bool:
+        return self.meta is not None
+    
+    @property
+    def n_rows(self) -> int:
+        return self.meta['n_rows']
+    
+    @property
+    def n_features(self) -> int:
+        return self.meta['n_features']
+    
+    def matches(self, entries: List[Dict], processor, feature_type: str) -> bool:
+        """Whether the store was built from exactly these entries and settings."""
+        return self.exists and self.meta.get('fingerprint') == corpus_fingerprint(
+            (entry['hash'] for entry in entries), feature_settings(processor, feature_type)
+        )
+    
+    def _load_rows(self) -> Dict[str, np.ndarray]:
+        if self._rows is None:
+            with np.load(self.path / ROWS_FILE) as rows:
+                self._rows = {name: rows[name] for name in rows.files}
+        return self._rows
+    
+    @property
+    def speakers(self) -> np.ndarray:
+        return self._load_rows()['speakers']
+    
+    @property
+    def splits(self) -> np.ndarray:
+        return self._load_rows()['splits']
+    
+    @property
+    def hashes(self) -> np.ndarray:
+        return self._load_rows()['hashes']
+    
+    def features(self) -> np.ndarray:
+        """Read-only memory map of the feature matrix (n_rows, n_features)."""
+        if self.n_rows == 0:
+            return np.zeros((0, self.n_features), dtype=np.float32)
+        return np.memmap(
+            self.path / FEATURES_FILE, dtype=self.meta['dtype'], mode='r',
+            shape=(self.n_rows, self.n_features)
+        )
+    
+    def _read_rows(self, begin: int, end: int) -> np.ndarray:
+        """
+        Read a row range with a plain file read.
+        
+        Unlike slicing the memory map, this doesn't leave pages of the
+        whole file mapped into the process as training progresses.
+        """
+        dtype = np.dtype(self.meta['dtype'])
+        with open(self.path / FEATURES_FILE, 'rb') as f:
+            f.seek(begin * self.n_features * dtype.itemsize)
+            data = np.fromfile(f, dtype=dtype, count=(end - begin) * self.n_features)
+        return data.reshape(end - begin, self.n_features)
+    
+    def verify(self) -> bool:
+        """Recompute the feature file checksum and compare it with the header."""
+        digest = hashlib.sha256()
+        with open(self.path / FEATURES_FILE, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest() == self.meta['sha256']
+    
+    def chunk_rows(self, max_memory_mb: float, copies: int = 10) -> int:
+        """
+        Rows per chunk that keep training within a memory budget.
+        
+        Args:
+            max_memory_mb: Budget for one chunk and its working copies
+            copies: float64 copies of a chunk alive at once (raw, scaled,
+                projected, IncrementalPCA SVD factors and estimator temporaries)
+        
+        Returns:
+            Number of rows (at least 1)
+        """
+        bytes_per_row = max(self.n_features, 1) * 8 * copies
+        return max(1, int(max_memory_mb * 1024 * 1024) // bytes_per_row)
+    
+    def iter_chunks(
+        self,
+        chunk_rows: int,
+        split: Optional[str] = None,
+        shuffle: bool = False,
+        random_state: int = 42
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Iterate over the matrix in chunks read from disk.
+        
+        Rows are divided into equally sized chunks (sizes differ by at
+        most one), so no trailing chunk is much smaller than chunk_rows.
+        
+        Args:
+            chunk_rows: Maximum rows per chunk
+            split: Only rows of this split ('train' or 'test')
+            shuffle: Shuffle chunk order and rows within each chunk
+            random_state: Seed for shuffling
+        
+        Yields:
+            (X, y): float64 features and speaker labels of one chunk
+        """
+        indices = np.arange(self.n_rows) if split is None else np.flatnonzero(self.splits == split)
+        if len(indices) == 0:
+            return
+        speakers = self.speakers
+        chunks = np.array_split(indices, -(-len(indices) // chunk_rows))
+        rng = np.random.default_rng(random_state)
+        order = rng.permutation(len(chunks)) if shuffle else range(len(chunks))
+        for i in order:
+            chunk = chunks[i]
+            X = self._read_rows(chunk[0], chunk[-1] + 1)[chunk - chunk[0]].astype(np.float64)
+            y = speakers[chunk]
+            if shuffle:
+                perm = rng.permutation(len(chunk))
+                X, y = X[perm], y[perm]
+            yield X, y
@@ -0,0 +1,234 @@
+"""
+Hierarchical speaker classifier for large speaker counts.
+Speakers are grouped into clusters of acoustically similar voices by
+k-means over their standardized mean feature vectors. A nearest-class-mean
+router picks the most likely clusters for a clip, and a small per-cluster
+classifier (SVC by default) makes the final decision. A prediction then
+evaluates O(max_cluster_size²) one-vs-one classifiers instead of
+O(n_speakers²), and each cluster classifier trains on a fraction of the
+data. update() retrains only the clusters whose speakers changed.
+"""
+import hashlib
+import math
+from typing import Dict, List
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.cluster import KMeans
+from sklearn.svm import SVC
+
+from online_model import NearestClassMeanClassifier
+
+
+def _group_rows(y: np.ndarray) -> Dict[str, np.ndarray]:
+    """Row indices of every label (one pass instead of a mask per label)."""
+    labels, inverse = np.unique(y, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    return dict(zip(labels, np.split(order, np.cumsum(np.bincount(inverse))[:-1])))
+
+
+def _speaker_digest(rows: np.ndarray) -> str:
+    """Order-independent fingerprint of one speaker's training rows."""
+    digests = sorted(hashlib.sha256(np.ascontiguousarray(row).tobytes()).digest() for row in rows)
+    return hashlib.sha256(b''.join(digests)).hexdigest()
+
+
+def _fit_leaf(estimator, X, y):
+    """Fit one cluster's classifier (None for a single-speaker cluster)."""
+    if len(np.unique(y)) < 2:
+        return None
+    return clone(estimator).fit(X, y)
+
+
+class HierarchicalSpeakerClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Cluster router plus one classifier per cluster of similar speakers.
+    
+    predict_proba combines both stages: P(speaker) = P(cluster) *
+    P(speaker | cluster) over the n_routes most likely clusters,
+    renormalized. Speakers outside the routed clusters get probability 0.
+    """
+    
+    def __init__(
+        self,
+        leaf_estimator=None,
+        max_cluster_size: int = 16,
+        n_routes: int = 2,
+        router_temperature: float = 0.1,
+        n_jobs=None,
+        random_state: int = 42
+    ):
+        """
+        Args:
+            leaf_estimator: Classifier cloned for every cluster (default: RBF SVC with probabilities)
+            max_cluster_size: Maximum speakers per cluster
+            n_routes: Clusters whose classifier is evaluated per clip
+            router_temperature: Softmax temperature of the nearest-class-mean router
+            n_jobs: Clusters trained in parallel (joblib)
+            random_state: Seed for k-means and the default leaf estimator
+        """
+        self.leaf_estimator = leaf_estimator
+        self.max_cluster_size = max_cluster_size
+        self.n_routes = n_routes
+        self.router_temperature = router_temperature
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+    
+    def _leaf_template(self):
+        if self.leaf_estimator is not None:
+            return self.leaf_estimator
+        return SVC(kernel='rbf', probability=True, random_state=self.random_state)
+    
+    def _partition(self, speakers: np.ndarray, centroids: np.ndarray) -> List[np.ndarray]:
+        """Split speakers into clusters of at most max_cluster_size by recursive k-means."""
+        if len(speakers) <= self.max_cluster_size:
+            return [speakers]
+        n_clusters = math.ceil(len(speakers) / self.max_cluster_size)
+        assignment = KMeans(n_clusters=n_clusters, n_init=4, random_state=self.random_state).fit_predict(centroids)
+        if len(np.unique(assignment)) < 2:
+            # Indistinguishable centroids: split in order
+            return [speakers[i:i + self.max_cluster_size] for i in range(0, len(speakers), self.max_cluster_size)]
+        clusters = []
+        for cluster in np.unique(assignment):
+            mask = assignment == cluster
+            clusters += self._partition(speakers[mask], centroids[mask])
+        return clusters
+    
+    def _fit_router(self, X, y):
+        """Refit the router (a single pass over the data) and return each speaker's centroid."""
+        self.router_ = NearestClassMeanClassifier(temperature=self.router_temperature).fit(X, y)
+        self.classes_ = self.router_.classes_
+        return dict(zip(self.classes_, self.router_.centroids_))
+    
+    def fit(self, X, y):
+        """Cluster the speakers and train every cluster's classifier."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        self._fit_router(X, y)
+        self.clusters_ = self._partition(self.classes_, self.router_.centroids_)
+        self.leaves_ = [None] * len(self.clusters_)
+        groups = _group_rows(y)
+        self._fit_clusters(X, y, groups, list(range(len(self.clusters_))))
+        self.speaker_digests_ = {speaker: _speaker_digest(X[rows]) for speaker, rows in groups.items()}
+        self.last_update_ = {
+            'retrained_clusters': len(self.clusters_),
+            'n_clusters': len(self.clusters_),
+            'changed_speakers': [],
+            'new_speakers': [str(s) for s in self.classes_],
+            'removed_speakers': []
+        }
+        return self
+    
+    def update(self, X, y):
+        """
+        Refit on the full training set, retraining only affected clusters.
+        
+        A cluster is retrained when one of its speakers has new, changed or
+        removed samples. New speakers join the cluster with the nearest
+        mean centroid, and a cluster that grows beyond max_cluster_size is
+        split again. Other cluster classifiers are kept as they are.
+        
+        Args:
+            X: Complete training matrix (not only the new samples)
+            y: Labels
+        
+        Returns:
+            self (see last_update_ for what was retrained)
+        """
+        if not hasattr(self, 'leaves_'):
+            return self.fit(X, y)
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        groups = _group_rows(y)
+        digests = {speaker: _speaker_digest(X[rows]) for speaker, rows in groups.items()}
+        known = {speaker for members in self.clusters_ for speaker in members}
+        new_speakers = [speaker for speaker in sorted(digests) if speaker not in known]
+        changed = {
+            speaker for speaker, digest in digests.items()
+            if speaker in known and self.speaker_digests_.get(speaker) != digest
+        }
+        removed = set(self.speaker_digests_) - set(digests)
+        
+        centroids = self._fit_router(X, y)
+        clusters = [[speaker for speaker in members if speaker in digests] for members in self.clusters_]
+        affected = {
+            cluster for cluster, members in enumerate(self.clusters_)
+            if any(speaker in changed or speaker in removed for speaker in members)
+        }
+        for speaker in new_speakers:
+            candidates = [cluster for cluster, members in enumerate(clusters) if members]
+            if not candidates:
+                clusters.append([speaker])
+                affected.add(len(clusters) - 1)
+                continue
+            means = np.array([np.mean([centroids[s] for s in clusters[c]], axis=0) for c in candidates])
+            nearest = candidates[int(np.argmin(np.sum((means - centroids[speaker]) ** 2, axis=1)))]
+            clusters[nearest].append(speaker)
+            affected.add(nearest)
+        
+        previous_leaves = self.leaves_ + [None] * (len(clusters) - len(self.leaves_))
+        self.clusters_, self.leaves_, retrain = [], [], []
+        for cluster, members in enumerate(clusters):
+            if not members:
+                continue
+            members = np.array(sorted(members))
+            if cluster not in affected:
+                self.clusters_.append(members)
+                self.leaves_.append(previous_leaves[cluster])
+                continue
+            for part in self._partition(members, np.array([centroids[s] for s in members])):
+                retrain.append(len(self.clusters_))
+                self.clusters_.append(part)
+                self.leaves_.append(None)
+        self._fit_clusters(X, y, groups, retrain)
+        self.speaker_digests_ = digests
+        self.last_update_ = {
+            'retrained_clusters': len(retrain),
+            'n_clusters': len(self.clusters_),
+            'changed_speakers': sorted(str(s) for s in changed),
+            'new_speakers': [str(s) for s in new_speakers],
+            'removed_speakers': sorted(str(s) for s in removed)
+        }
+        return self
+    
+    def _fit_clusters(self, X, y, groups: Dict[str, np.ndarray], retrain: List[int]):
+        """Train the classifiers of the given clusters in parallel and rebuild the routing tables."""
+        rows = [np.concatenate([groups[speaker] for speaker in self.clusters_[cluster]]) for cluster in retrain]
+        template = self._leaf_template()
+        fitted = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_leaf)(template, X[cluster_rows], y[cluster_rows]) for cluster_rows in rows
+        )
+        for cluster, leaf in zip(retrain, fitted):
+            self.leaves_[cluster] = leaf
+        
+        # Router class -> cluster membership, and each cluster's columns in classes_
+        self.membership_ = np.zeros((len(self.classes_), len(self.clusters_)))
+        self.columns_ = []
+        for cluster, members in enumerate(self.clusters_):
+            leaf = self.leaves_[cluster]
+            self.membership_[np.searchsorted(self.classes_, members), cluster] = 1.0
+            self.columns_.append(np.searchsorted(self.classes_, members if leaf is None else leaf.classes_))
+    
+    @property
+    def n_clusters_(self) -> int:
+        return len(self.clusters_)
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities from the routed clusters (one classifier call per cluster and batch)."""
+        X = np.asarray(X, dtype=np.float64)
+        cluster_proba = self.router_.predict_proba(X) @ self.membership_
+        n_routes = min(self.n_routes, len(self.clusters_))
+        routes = np.argsort(-cluster_proba, axis=1)[:, :n_routes]
+        probabilities = np.zeros((len(X), len(self.classes_)))
+        for cluster in np.unique(routes):
+            rows = np.flatnonzero((routes == cluster).any(axis=1))
+            leaf = self.leaves_[cluster]
+            leaf_proba = np.ones((len(rows), 1)) if leaf is None else leaf.predict_proba(X[rows])
+            probabilities[rows[:, None], self.columns_[cluster]] = leaf_proba * cluster_proba[rows, cluster][:, None]
+        total = probabilities.sum(axis=1, keepdims=True)
+        return probabilities / np.maximum(total, np.finfo(np.float64).tiny)
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the most likely speaker."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
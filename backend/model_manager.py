@@ -5,20 +5,73 @@ Handles loading, inference, and model operations.
 import os
 import pickle
 import json
+import tempfile
+import threading
 from typing import Dict, Optional, List, Tuple
 import numpy as np
 from pathlib import Path
 
+from audio_processor import normalize_feature_config
+from compiled_model import compiled_path, file_version, load_compiled
+
 
 class ModelManager:
     """Manage speaker identification models."""
     
-    def __init__(self, models_dir: str = "models"):
+    def __init__(
+        self,
+        models_dir: str = "models",
+        n_jobs: Optional[int] = None,
+        student_max_drop: Optional[float] = None,
+        use_compiled: bool = True
+    ):
+        """
+        Args:
+            models_dir: Directory with trained models
+            n_jobs: Override n_jobs of loaded models (None keeps the pickled value)
+            student_max_drop: Serve a distilled student instead of its teacher when
+                its test accuracy is at most this much lower (None disables)
+            use_compiled: Serve the compiled predictor (model file + '.compiled',
+                see compile_models.py) instead of the pickled model when it is up to date
+        """
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(exist_ok=True)
+        self.n_jobs = n_jobs
+        self.student_max_drop = student_max_drop
+        self.use_compiled = use_compiled
         self.models: Dict[str, any] = {}
+        self.model_backends: Dict[str, str] = {}  # 'sklearn', 'compiled' or 'pytorch' per loaded model
         self.speakers: List[str] = []
         self.model_metadata: Dict[str, Dict] = {}  # Model metadata cache
+        self.model_versions: Dict[str, str] = {}  # Content hash of each loaded model file
+        self.cascade_stats: Dict[str, Dict[str, int]] = {}  # Per cascade: answered/escalated counts
+        self.holdout_results: Dict[str, Dict] = {}  # Latest holdout evaluation per model (evaluation.py)
+        self._stats_lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+    
+    def model_lock(self, model_name: str) -> threading.Lock:
+        """
+        Lock serializing in-place updates of one model.
+        
+        Hold it across copying, updating and update_model(), so concurrent
+        updates of the same model build on each other instead of the last
+        writer discarding the other's samples.
+        """
+        with self._stats_lock:
+            return self._model_locks.setdefault(model_name, threading.Lock())
+    
+    def _replace_file(self, path: Path, write, mode: str = 'wb', **kwargs):
+        """Write a file through a uniquely named temporary file in the same directory and rename it."""
+        with tempfile.NamedTemporaryFile(mode, dir=path.parent, prefix=path.name + '.', suffix='.tmp',
+                                         delete=False, **kwargs) as f:
+            tmp_path = f.name
+            try:
+                write(f)
+            except BaseException:
+                f.close()
+                os.unlink(tmp_path)
+                raise
+        os.replace(tmp_path, path)
     
     def load_model(self, model_name: str, model_type: str = "sklearn"):
         """
@@ -33,17 +86,28 @@ class ModelManager:
         if not model_path.exists():
             raise FileNotFoundError(f"Model not found: {model_path}")
         
+        version = self._file_version(model_path)
         if model_type == "sklearn":
-            with open(model_path, 'rb') as f:
-                self.models[model_name] = pickle.load(f)
+            compiled = self._load_compiled(model_path, version) if self.use_compiled else None
+            if compiled is not None:
+                self.models[model_name] = compiled
+                model_type = "compiled"
+            else:
+                with open(model_path, 'rb') as f:
+                    model = pickle.load(f)
+                self._apply_n_jobs(model)
+                self.models[model_name] = model
         elif model_type == "pytorch":
-            # TODO: Implement PyTorch model loading
-            raise NotImplementedError("PyTorch model loading not yet implemented")
+            # TorchScript export from train_model.py (int8 quantized TDNN)
+            from torch_model import TorchSpeakerModel
+            self.models[model_name] = TorchSpeakerModel(str(model_path), n_threads=self.n_jobs)
         elif model_type == "onnx":
             # TODO: Implement ONNX model loading
             raise NotImplementedError("ONNX model loading not yet implemented")
         else:
             raise ValueError(f"Unknown model type: {model_type}")
+        self.model_versions[model_name] = version
+        self.model_backends[model_name] = model_type
         
         # Load metadata if available
         metadata_path = self.models_dir / f"{model_name}.meta"
@@ -56,25 +120,68 @@ class ModelManager:
         
         print(f"Loaded model: {model_name} (type: {model_type})")
     
+    @staticmethod
+    def _file_version(path: Path) -> str:
+        """Short SHA-256 of a model file, identifies the exact model that served a request."""
+        return file_version(path)
+    
+    @staticmethod
+    def _load_compiled(model_path: Path, version: str):
+        """
+        Compiled predictor of a model file, if one exists and was compiled from this version.
+        
+        Returns:
+            CompiledSVC / CompiledForest, or None (the pickled model is served)
+        """
+        path = compiled_path(model_path)
+        if not path.exists():
+            return None
+        try:
+            compiled, source_version = load_compiled(path)
+        except Exception as e:
+            print(f"Warning: Could not load {path.name}: {e}")
+            return None
+        if source_version != version:
+            print(f"Warning: {path.name} is stale (model changed since it was compiled), serving the pickled model")
+            return None
+        return compiled
+    
+    def _apply_n_jobs(self, model):
+        """Replace n_jobs (e.g. -1 from training) on a model and its sub-estimators."""
+        if self.n_jobs is None or not hasattr(model, 'get_params'):
+            return
+        overrides = {
+            name: self.n_jobs
+            for name in model.get_params(deep=True)
+            if name == 'n_jobs' or name.endswith('__n_jobs')
+        }
+        if overrides:
+            model.set_params(**overrides)
+    
     def load_all_available_models(self):
-        """Tüm mevcut sklearn modellerini yükle (MFCC ve Mel destekli)."""
+        """Tüm mevcut sklearn ve PyTorch modellerini yükle (MFCC ve Mel destekli)."""
         # Tüm olası model dosyalarını bul
         model_patterns = [
-            'svm_speaker_model*.pkl',
-            'random_forest_speaker_model*.pkl',
-            'neural_network_speaker_model*.pkl',
-            'adaboost_speaker_model*.pkl'
+            ('svm_speaker_model*.pkl', 'sklearn'),
+            ('random_forest_speaker_model*.pkl', 'sklearn'),
+            ('neural_network_speaker_model*.pkl', 'sklearn'),
+            ('adaboost_speaker_model*.pkl', 'sklearn'),
+            ('ncm_speaker_model*.pkl', 'sklearn'),
+            ('sgd_speaker_model*.pkl', 'sklearn'),
+            ('hierarchical_speaker_model*.pkl', 'sklearn'),
+            ('*_student_speaker_model*.pkl', 'sklearn'),
+            ('tdnn_speaker_model*.pt', 'pytorch')
         ]
         
         loaded_count = 0
-        for pattern in model_patterns:
+        for pattern, model_type in model_patterns:
             # Glob ile tüm eşleşen dosyaları bul
             import glob
             model_files = list(self.models_dir.glob(pattern))
             for model_path in model_files:
                 model_file = model_path.name
                 try:
-                    self.load_model(model_file, model_type='sklearn')
+                    self.load_model(model_file, model_type=model_type)
                     loaded_count += 1
                 except Exception as e:
                     print(f"Warning: Could not load {model_file}: {e}")
@@ -94,6 +201,13 @@ class ModelManager:
         else:
             print("Speaker labels file not found")
     
+    def save_speaker_labels(self, speakers: List[str], labels_file: str = "speaker_labels.txt"):
+        """Write speaker labels to file and keep them in memory."""
+        labels_path = self.models_dir / labels_file
+        with open(labels_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(speakers))
+        self.speakers = list(speakers)
+    
     def predict(
         self, 
         features: np.ndarray, 
@@ -111,88 +225,343 @@ class ModelManager:
         Returns:
             Dictionary with predictions and confidence scores
         """
+        return self.predict_batch([features], model_name=model_name, top_k=top_k)[0]
+    
+    def predict_batch(
+        self,
+        features_list: List[np.ndarray],
+        model_name: Optional[str] = None,
+        top_k: int = 3
+    ) -> List[Dict]:
+        """
+        Predict speakers for several feature arrays with one model call.
+        
+        Args:
+            features_list: Extracted features, one entry per clip
+            model_name: Name of model to use
+            top_k: Number of top predictions to return
+            
+        Returns:
+            One prediction dictionary per entry of features_list
+        """
         if not self.models:
-            return {
+            return [{
                 "error": "No models loaded",
                 "predictions": []
-            }
+            } for _ in features_list]
         
         # Use best model if not specified
         if model_name is None:
             model_name = self.get_best_model()
             if model_name is None:
-                return {
+                return [{
                     "error": "No models available",
                     "predictions": []
-                }
+                } for _ in features_list]
         
+        model_name = self.get_serving_model(model_name)
         model = self.models.get(model_name)
         if model is None:
-            return {
+            return [{
                 "error": f"Model {model_name} not found",
                 "predictions": []
-            }
+            } for _ in features_list]
         
         # Check if we have a real model or need placeholder
+        cascade_info = [None] * len(features_list)
+        models_used = [model_name] * len(features_list)
         if hasattr(model, 'predict_proba'):
             # REAL MODEL INFERENCE (SVM, etc.)
-            # Flatten features for SVM (expects 1D array)
-            if len(features.shape) > 1:
-                features_flat = features.flatten()
-            else:
-                features_flat = features
+            # Flatten features for SVM (expects one 1D row per clip)
+            X = np.array([np.asarray(features).flatten() for features in features_list])
             
-            # Get probabilities for all classes
-            probabilities = model.predict_proba([features_flat])[0]
-            
-            # Get class names
-            class_names = model.classes_
-            
-            # Get top K predictions
-            top_indices = np.argsort(probabilities)[::-1][:top_k]
+            cascade = self.get_cascade(model_name)
+            if cascade is not None:
+                # Cheap stage first, the requested model only for uncertain clips
+                rows, cascade_info = self._predict_cascade(X, model_name, model, cascade)
+                models_used = [info["model"] for info in cascade_info]
+            else:
+                # Get probabilities for all classes (single call for the whole batch)
+                rows = [(probabilities, model.classes_) for probabilities in model.predict_proba(X)]
             
-            predictions = []
-            for idx in top_indices:
-                speaker_id = class_names[idx]
-                confidence = float(probabilities[idx])
+            predictions_batch = []
+            for probabilities, class_names in rows:
+                # Get top K predictions
+                top_indices = np.argsort(probabilities)[::-1][:top_k]
                 
-                # Use class_names directly (already has the correct names)
-                predictions.append({
-                    "speaker_id": speaker_id,
-                    "confidence": confidence,
-                    "speaker_name": str(speaker_id)  # Use the class name directly
-                })
+                predictions = []
+                for idx in top_indices:
+                    speaker_id = class_names[idx]
+                    confidence = float(probabilities[idx])
+                    
+                    # Use class_names directly (already has the correct names)
+                    predictions.append({
+                        "speaker_id": speaker_id,
+                        "confidence": confidence,
+                        "speaker_name": str(speaker_id)  # Use the class name directly
+                    })
+                predictions_batch.append(predictions)
         else:
             # PLACEHOLDER PREDICTIONS (no model loaded)
-            predictions = [
+            predictions_batch = [[
                 {
                     "speaker_id": f"speaker_{i+1:02d}",
                     "confidence": float(np.random.uniform(0.7, 0.95)),
                     "speaker_name": f"Speaker {i+1}" if i < len(self.speakers) else f"speaker_{i+1:02d}"
                 }
                 for i in range(min(top_k, len(self.speakers)))
-            ]
+            ] for _ in features_list]
         
-        return {
-            "model_used": model_name,
-            "predictions": predictions,
-            "timestamp_ms": float(np.mean(features) * 1000) if len(features) > 0 else 0
-        }
+        results = []
+        for features, predictions, used, info in zip(features_list, predictions_batch, models_used, cascade_info):
+            result = {
+                "model_used": used,
+                "predictions": predictions,
+                "timestamp_ms": float(np.mean(features) * 1000) if len(features) > 0 else 0
+            }
+            if info is not None:
+                result["cascade"] = info
+            results.append(result)
+        return results
+    
+    def get_cascade(self, model_name: str) -> Optional[Dict]:
+        """
+        Cascade configuration of a model, if it has a usable one.
+        
+        The 'cascade' entry of a model's metadata names a cheaper stage model
+        (same feature type and shape) and the thresholds its top-1 confidence
+        and top-1/top-2 margin must reach for its answer to be kept:
+        {"stage_model": "...", "min_confidence": 0.9, "min_margin": 0.0}
+        
+        Returns:
+            The configuration, or None (no cascade or stage model not loaded)
+        """
+        cascade = self.model_metadata.get(model_name, {}).get('cascade')
+        if not cascade or cascade.get('stage_model') not in self.models:
+            return None
+        return cascade
+    
+    def _predict_cascade(self, X: np.ndarray, model_name: str, model, cascade: Dict):
+        """
+        Run the stage model on all rows and model_name only on rows it is unsure about.
+        
+        Returns:
+            Per-row (probabilities, class labels) and per-row cascade info
+        """
+        stage_name = cascade['stage_model']
+        stage_model = self.models[stage_name]
+        stage_proba = stage_model.predict_proba(X)
+        
+        top2 = np.sort(stage_proba, axis=1)[:, ::-1][:, :2]
+        confidence = top2[:, 0]
+        margin = top2[:, 0] - top2[:, 1] if top2.shape[1] > 1 else top2[:, 0]
+        escalate = (confidence < cascade.get('min_confidence', 0.0)) | (margin < cascade.get('min_margin', 0.0))
+        
+        rows = [(probabilities, stage_model.classes_) for probabilities in stage_proba]
+        if escalate.any():
+            final_proba = model.predict_proba(X[escalate])
+            for i, probabilities in zip(np.flatnonzero(escalate), final_proba):
+                rows[i] = (probabilities, model.classes_)
+        
+        with self._stats_lock:
+            stats = self.cascade_stats.setdefault(model_name, {"requests": 0, "escalated": 0})
+            stats["requests"] += len(X)
+            stats["escalated"] += int(escalate.sum())
+        
+        info = [
+            {
+                "stage": 2 if escalated else 1,
+                "model": model_name if escalated else stage_name,
+                "escalated": bool(escalated),
+                "stage_model": stage_name,
+                "stage_confidence": float(confidence[i]),
+                "stage_margin": float(margin[i])
+            }
+            for i, escalated in enumerate(escalate)
+        ]
+        return rows, info
+    
+    def get_cascade_stats(self) -> Dict[str, Dict]:
+        """
+        Escalation statistics of every model served through a cascade.
+        
+        Returns:
+            Per model: stage model, thresholds, requests, escalated count and rate
+        """
+        with self._stats_lock:
+            stats = {name: dict(counts) for name, counts in self.cascade_stats.items()}
+        for name, counts in stats.items():
+            counts["escalation_rate"] = counts["escalated"] / counts["requests"] if counts["requests"] else 0.0
+            counts["config"] = self.model_metadata.get(name, {}).get('cascade')
+        return stats
+    
+    def set_cascade(
+        self,
+        model_name: str,
+        stage_model: Optional[str],
+        min_confidence: float = 0.9,
+        min_margin: float = 0.0
+    ):
+        """
+        Configure (or remove) the cascade of a model and persist it in its metadata.
+        
+        Args:
+            model_name: Expensive model that answers escalated requests
+            stage_model: Cheap model tried first (None removes the cascade)
+            min_confidence: Minimum top-1 probability of the stage model
+            min_margin: Minimum difference between its top-1 and top-2 probabilities
+        
+        Raises:
+            ValueError: If a model is not loaded or the models use different features
+        """
+        if model_name not in self.models:
+            raise ValueError(f"Model {model_name} not found")
+        metadata = dict(self.model_metadata.get(model_name, {}))
+        if stage_model is None:
+            metadata.pop('cascade', None)
+        else:
+            if stage_model not in self.models:
+                raise ValueError(f"Model {stage_model} not found")
+            if stage_model == model_name:
+                raise ValueError("A model can't be its own cascade stage")
+            stage_metadata = self.model_metadata.get(stage_model, {})
+            for key in ('feature_type', 'feature_shape'):
+                if stage_metadata.get(key) != metadata.get(key):
+                    raise ValueError(
+                        f"{stage_model} and {model_name} use different {key}: "
+                        f"{stage_metadata.get(key)} != {metadata.get(key)}"
+                    )
+            if self.get_feature_config(stage_model) != self.get_feature_config(model_name):
+                raise ValueError(
+                    f"{stage_model} and {model_name} use different feature_config: "
+                    f"{self.get_feature_config(stage_model)} != {self.get_feature_config(model_name)}"
+                )
+            metadata['cascade'] = {
+                'stage_model': stage_model,
+                'min_confidence': float(min_confidence),
+                'min_margin': float(min_margin)
+            }
+        self._write_metadata(model_name, metadata)
+        with self._stats_lock:
+            self.cascade_stats.pop(model_name, None)
+    
+    def _write_metadata(self, model_name: str, metadata: Dict):
+        """Atomically write a model's metadata file and update the cache."""
+        metadata_path = self.models_dir / f"{model_name}.meta"
+        self._replace_file(metadata_path, lambda f: json.dump(metadata, f, indent=2), 'w', encoding='utf-8')
+        self.model_metadata[model_name] = metadata
+    
+    def predict_proba(
+        self,
+        X: np.ndarray,
+        model_name: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Raw class probabilities for a feature matrix in one model call.
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            model_name: Name of model to use (best model if not specified)
+            
+        Returns:
+            Probabilities (n_samples, n_classes), class labels and the model used
+        """
+        if model_name is None:
+            model_name = self.get_best_model()
+        if model_name is None:
+            raise ValueError("No models loaded")
+        model_name = self.get_serving_model(model_name)
+        model = self.models.get(model_name)
+        if model is None:
+            raise ValueError(f"Model {model_name} not found")
+        if not hasattr(model, 'predict_proba'):
+            raise ValueError(f"Model {model_name} does not provide probabilities")
+        return model.predict_proba(X), np.asarray(model.classes_), model_name
+    
+    def get_feature_type(self, model_name: Optional[str]) -> str:
+        """
+        Get the feature type a model was trained on.
+        
+        Args:
+            model_name: Name of the model
+            
+        Returns:
+            Feature type from the model metadata ('mfcc' if unknown)
+        """
+        metadata = self.model_metadata.get(model_name, {}) if model_name else {}
+        return metadata.get('feature_type', 'mfcc')
+    
+    def get_feature_config(self, model_name: Optional[str]) -> Dict[str, int]:
+        """
+        Get the feature settings a model was trained with.
+        
+        Args:
+            model_name: Name of the model
+            
+        Returns:
+            sample_rate, n_mfcc, hop_length and target_length_ms from the model
+            metadata (AudioProcessor defaults for models trained before they were recorded)
+        """
+        metadata = self.model_metadata.get(model_name, {}) if model_name else {}
+        return normalize_feature_config(metadata.get('feature_config'))
     
     def list_models(self) -> List[str]:
         """List available models."""
         return list(self.models.keys())
     
+    def set_holdout_results(self, results: Dict[str, Dict]):
+        """Replace the holdout evaluation results (from HoldoutEvaluator)."""
+        self.holdout_results = dict(results)
+    
+    def get_holdout_result(self, model_name: str) -> Optional[Dict]:
+        """
+        Holdout evaluation of a loaded model, if it was scored in its current version.
+        
+        Returns:
+            Metrics dictionary, or None
+        """
+        result = self.holdout_results.get(model_name)
+        if result is None or result.get('model_version') != self.model_versions.get(model_name):
+            return None
+        return result
+    
+    def get_model_accuracy(self, model_name: str) -> Optional[float]:
+        """Holdout accuracy of a model, or its training-time test accuracy if not evaluated yet."""
+        result = self.get_holdout_result(model_name)
+        if result is not None:
+            return result.get('accuracy')
+        return self.model_metadata.get(model_name, {}).get('test_accuracy')
+    
     def get_best_model(self) -> Optional[str]:
         """
         Get the best model based on test accuracy.
         
+        Models with a current holdout evaluation are ranked by holdout
+        accuracy (ties go to the lower single-sample latency), since those
+        numbers come from the same files for every model. Once any model has
+        a holdout result, models without one are not candidates: this
+        includes models the evaluator skips because they weren't trained on
+        the manifest split, whose training-time accuracy isn't comparable.
+        Until any model has been evaluated, the test accuracy recorded at
+        training time is used for all models.
+        
         Returns:
             Name of the best model, or None if no models available
         """
         if not self.models:
             return None
         
+        evaluated = {}
+        for model_name in list(self.models.keys()):
+            result = self.get_holdout_result(model_name)
+            if result is not None:
+                evaluated[model_name] = result
+        if evaluated:
+            return min(
+                evaluated,
+                key=lambda name: (-evaluated[name]['accuracy'], evaluated[name].get('inference_ms_single', 0.0))
+            )
+        
         best_model = None
         best_accuracy = -1.0
         
@@ -210,9 +579,62 @@ class ModelManager:
         
         return best_model
     
+    def get_serving_model(self, model_name: str) -> str:
+        """
+        Resolve the model that actually serves requests for model_name.
+        
+        With student_max_drop set, the fastest loaded student distilled from
+        model_name whose accuracy_delta is within the allowed drop is used.
+        
+        Args:
+            model_name: Requested (teacher) model
+            
+        Returns:
+            Name of the student model, or model_name itself
+        """
+        if self.student_max_drop is None:
+            return model_name
+        
+        candidates = [
+            (metadata.get('inference_ms_single', float('inf')), name)
+            for name, metadata in self.model_metadata.items()
+            if name in self.models
+            and metadata.get('distilled_from') == model_name
+            and metadata.get('accuracy_delta', -1.0) >= -self.student_max_drop
+        ]
+        return min(candidates)[1] if candidates else model_name
+    
+    def update_model(self, model_name: str, model, metadata_updates: Optional[Dict] = None):
+        """
+        Persist an updated model and swap it in for serving.
+        
+        The pickle and metadata are written to uniquely named temporary
+        files and renamed, so readers never see a partially written model.
+        Callers that derive the model from the served one hold model_lock().
+        
+        Args:
+            model_name: Name of the model file
+            model: Updated model object
+            metadata_updates: Metadata fields to add or overwrite
+        """
+        model_path = self.models_dir / model_name
+        self._replace_file(model_path, lambda f: pickle.dump(model, f))
+        
+        metadata = dict(self.model_metadata.get(model_name, {}))
+        metadata.update(metadata_updates or {})
+        self._write_metadata(model_name, metadata)
+        
+        self._apply_n_jobs(model)
+        self.models[model_name] = model
+        self.model_versions[model_name] = self._file_version(model_path)
+        self.model_backends[model_name] = "sklearn"
+        print(f"Updated model: {model_name}")
+    
     def unload_model(self, model_name: str):
         """Unload a model from memory."""
         if model_name in self.models:
             del self.models[model_name]
+            self.model_versions.pop(model_name, None)
+            self.model_backends.pop(model_name, None)
             print(f"Unloaded model: {model_name}")
 
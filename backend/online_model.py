@@ -0,0 +1,113 @@
+"""
+Incrementally trainable speaker models.
+Nearest-class-mean classifier that supports adding samples and new
+speakers through partial_fit, so enrollment doesn't need a full retrain.
+"""
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+
+class NearestClassMeanClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Nearest-class-mean classifier with online updates.
+    
+    Keeps per-class feature sums and counts plus running per-feature
+    mean/variance for standardization. partial_fit only adds to these
+    statistics, so new samples and new classes cost O(n_samples * n_features).
+    """
+    
+    def __init__(self, temperature: float = 0.1):
+        """
+        Args:
+            temperature: Softmax temperature applied to the mean squared
+                standardized distance to each class centroid
+        """
+        self.temperature = temperature
+    
+    def fit(self, X, y):
+        """Fit from scratch (discards previous statistics)."""
+        for attr in ('n_samples_seen_', 'mean_', 'var_', 'class_sums_', 'class_counts_', 'classes_'):
+            if hasattr(self, attr):
+                delattr(self, attr)
+        return self.partial_fit(X, y)
+    
+    def partial_fit(self, X, y, classes=None):
+        """
+        Add samples (possibly of unseen classes) to the model.
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            y: Labels
+            classes: Ignored, accepted for sklearn API compatibility
+        
+        Returns:
+            self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError("X must be 2D with one row per label")
+        
+        n_new = len(X)
+        if n_new == 0:
+            return self
+        
+        if not hasattr(self, 'n_samples_seen_'):
+            self.n_samples_seen_ = 0
+            self.mean_ = np.zeros(X.shape[1])
+            self.var_ = np.zeros(X.shape[1])
+            self.class_sums_ = {}
+            self.class_counts_ = {}
+        elif X.shape[1] != self.mean_.shape[0]:
+            raise ValueError(f"Expected {self.mean_.shape[0]} features, got {X.shape[1]}")
+        
+        # Merge running mean/variance with the new batch (Chan et al.)
+        batch_mean = X.mean(axis=0)
+        batch_var = X.var(axis=0)
+        n_total = self.n_samples_seen_ + n_new
+        delta = batch_mean - self.mean_
+        self.var_ = (
+            self.var_ * self.n_samples_seen_ + batch_var * n_new
+            + delta ** 2 * self.n_samples_seen_ * n_new / n_total
+        ) / n_total
+        self.mean_ = self.mean_ + delta * n_new / n_total
+        self.n_samples_seen_ = n_total
+        
+        for label in np.unique(y):
+            rows = X[y == label]
+            self.class_sums_[label] = self.class_sums_.get(label, 0.0) + rows.sum(axis=0)
+            self.class_counts_[label] = self.class_counts_.get(label, 0) + len(rows)
+        
+        self.classes_ = np.array(sorted(self.class_sums_))
+        self._update_centroids()
+        return self
+    
+    def _update_centroids(self):
+        """Recompute standardized class centroids from the running statistics."""
+        self.scale_ = np.sqrt(self.var_)
+        self.scale_[self.scale_ == 0] = 1.0
+        centroids = np.array([
+            self.class_sums_[label] / self.class_counts_[label] for label in self.classes_
+        ])
+        self.centroids_ = (centroids - self.mean_) / self.scale_
+    
+    def decision_function(self, X) -> np.ndarray:
+        """Negative mean squared standardized distance to each class centroid."""
+        X = (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+        distances = (
+            np.sum(X ** 2, axis=1)[:, None]
+            - 2 * X @ self.centroids_.T
+            + np.sum(self.centroids_ ** 2, axis=1)[None, :]
+        )
+        return -distances / X.shape[1]
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities (softmax over centroid distances)."""
+        logits = self.decision_function(X) / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the class with the nearest centroid."""
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
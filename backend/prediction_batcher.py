@@ -0,0 +1,146 @@
+"""
+Dynamic micro-batching for concurrent prediction requests.
+Collects feature vectors from in-flight requests for a few milliseconds
+(or until a batch is full) and runs one batched inference per model.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_manager import ModelManager
+
+
+class _PendingPrediction:
+    """A queued request waiting for its batch to run."""
+
+    def __init__(self, features: np.ndarray, top_k: int, future: asyncio.Future):
+        self.features = features
+        self.top_k = top_k
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class PredictionBatcher:
+    """Batch concurrent ModelManager predictions per model."""
+
+    def __init__(
+        self,
+        model_manager: ModelManager,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        stats_window: int = 1000
+    ):
+        """
+        Args:
+            model_manager: Manager used for batched inference
+            max_batch_size: Run a batch as soon as it has this many items
+            max_wait_ms: Maximum time the first item of a batch waits
+            stats_window: Number of recent requests kept for wait-time stats
+        """
+        self.model_manager = model_manager
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: Dict[Tuple, List[_PendingPrediction]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._queue_waits_ms: Deque[float] = deque(maxlen=stats_window)
+        self._batch_count = 0
+        self._request_count = 0
+
+    async def predict(
+        self,
+        features: np.ndarray,
+        model_name: Optional[str] = None,
+        top_k: int = 3
+    ) -> Dict:
+        """
+        Queue features for batched prediction and wait for the result.
+
+        Args:
+            features: Extracted features
+            model_name: Name of model to use (best model if None)
+            top_k: Number of top predictions to return
+
+        Returns:
+            Prediction dictionary as returned by ModelManager.predict,
+            plus the time spent waiting in the queue
+        """
+        if model_name is None:
+            model_name = self.model_manager.get_best_model()
+
+        loop = asyncio.get_running_loop()
+        item = _PendingPrediction(features, top_k, loop.create_future())
+
+        # Only features of the same shape can share a predict_proba call
+        key = (model_name, features.shape)
+        queue = self._pending.setdefault(key, [])
+        queue.append(item)
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif len(queue) == 1:
+            self._timers[key] = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+
+        return await item.future
+
+    def _flush(self, key: Tuple):
+        """Take the pending batch for a key and schedule its inference."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(key[0], batch))
+
+    async def _run_batch(self, model_name: Optional[str], batch: List[_PendingPrediction]):
+        """Run one batched inference off the event loop and resolve the callers."""
+        started_at = time.perf_counter()
+        queue_waits = [(started_at - item.enqueued_at) * 1000 for item in batch]
+        self._queue_waits_ms.extend(queue_waits)
+        self._batch_count += 1
+        self._request_count += len(batch)
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                None,
+                self.model_manager.predict_batch,
+                [item.features for item in batch],
+                model_name,
+                max(item.top_k for item in batch)
+            )
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, result, queue_wait_ms in zip(batch, results, queue_waits):
+            result["predictions"] = result["predictions"][:item.top_k]
+            result["queue_wait_ms"] = queue_wait_ms
+            result["batch_size"] = len(batch)
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dictionary with batch counts and queue-wait percentiles (ms)
+        """
+        waits = np.array(self._queue_waits_ms) if self._queue_waits_ms else np.zeros(1)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self._batch_count,
+            "requests": self._request_count,
+            "mean_batch_size": self._request_count / self._batch_count if self._batch_count else 0.0,
+            "queue_wait_ms": {
+                "mean": float(np.mean(waits)),
+                "p50": float(np.percentile(waits, 50)),
+                "p95": float(np.percentile(waits, 95)),
+                "max": float(np.max(waits))
+            }
+        }
@@ -0,0 +1,251 @@
+"""
+Append-only binary audit log of predictions.
+Records are fixed-size numpy structured rows written by a background
+thread in batches, so the request path only enqueues a tuple. A JSON
+sidecar stores the record dtype, which lets the log be read back with
+np.fromfile/np.memmap for aggregate queries.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Latency stages recorded for every prediction (milliseconds)
+LATENCY_STAGES = ("upload_ms", "features_ms", "queue_ms", "inference_ms", "total_ms")
+
+
+def record_dtype(top_k: int = 3) -> np.dtype:
+    """Structured dtype of one log record."""
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("status", "u1"),
+        ("model", "S64"),
+        ("model_version", "S16"),
+        ("feature_type", "S16"),
+        ("audio_sha256", "u1", (32,)),
+        ("audio_bytes", "<u4"),
+        ("duration_ms", "<f4"),
+        ("batch_size", "<u2"),
+        ("speakers", "S64", (top_k,)),
+        ("probabilities", "<f4", (top_k,)),
+        *[(stage, "<f4") for stage in LATENCY_STAGES],
+    ])
+
+
+def encode_field(text: str, size: int = 64) -> bytes:
+    """UTF-8 encode text and truncate it to size bytes on a character boundary."""
+    return str(text).encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+class PredictionLog:
+    """Batched, non-blocking writer and reader for the prediction log."""
+    
+    def __init__(
+        self,
+        log_path: str = "logs/predictions.bin",
+        top_k: int = 3,
+        flush_interval_s: float = 1.0,
+        max_batch: int = 1024
+    ):
+        """
+        Args:
+            log_path: Binary log file (the dtype sidecar is log_path + '.dtype.json')
+            top_k: Number of predictions stored per record
+            flush_interval_s: Maximum time a record waits before being written
+            max_batch: Write as soon as this many records are queued
+        """
+        self.log_path = Path(log_path)
+        self.dtype_path = self.log_path.with_name(self.log_path.name + ".dtype.json")
+        self.top_k = top_k
+        self.dtype = record_dtype(top_k)
+        self.flush_interval_s = flush_interval_s
+        self.max_batch = max_batch
+        self.dropped = 0
+        self.written = 0
+        
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._check_sidecar()
+        
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+        self._thread.start()
+    
+    def _check_sidecar(self):
+        """Write the dtype sidecar; set aside a log written with another layout."""
+        descr = {"descr": np.lib.format.dtype_to_descr(self.dtype), "itemsize": self.dtype.itemsize}
+        if self.dtype_path.exists():
+            with open(self.dtype_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing == json.loads(json.dumps(descr)):
+                return
+            if self.log_path.exists():
+                suffix = time.strftime("%Y%m%d%H%M%S")
+                os.replace(self.log_path, self.log_path.with_name(f"{self.log_path.name}.{suffix}"))
+                os.replace(self.dtype_path, self.dtype_path.with_name(f"{self.log_path.name}.{suffix}.dtype.json"))
+        with open(self.dtype_path, "w", encoding="utf-8") as f:
+            json.dump(descr, f)
+    
+    def log(
+        self,
+        model: str,
+        predictions: List[Dict],
+        model_version: str = "",
+        feature_type: str = "",
+        audio_sha256: str = "",
+        audio_bytes: int = 0,
+        duration_ms: float = 0.0,
+        batch_size: int = 1,
+        status: int = STATUS_OK,
+        **latencies_ms: float
+    ):
+        """
+        Queue one prediction record (never blocks on I/O).
+        
+        Args:
+            model: Model that produced the prediction
+            predictions: Top-k predictions (speaker_name, confidence)
+            model_version: Version of the model file
+            feature_type: Feature type used
+            audio_sha256: Hex SHA-256 of the uploaded audio
+            audio_bytes: Upload size
+            duration_ms: Decoded audio duration
+            batch_size: Size of the inference batch the request ran in
+            status: STATUS_OK or STATUS_ERROR
+            **latencies_ms: Stage latencies, keys from LATENCY_STAGES
+        """
+        self._queue.put((
+            time.time(), status, model, model_version, feature_type, audio_sha256,
+            audio_bytes, duration_ms, batch_size, predictions, latencies_ms
+        ))
+    
+    def _to_record(self, item) -> tuple:
+        """Convert a queued tuple to a record of self.dtype."""
+        (timestamp, status, model, model_version, feature_type, audio_sha256,
+         audio_bytes, duration_ms, batch_size, predictions, latencies_ms) = item
+        predictions = predictions[:self.top_k]
+        speakers = [encode_field(p.get("speaker_name", "")) for p in predictions]
+        probabilities = [float(p.get("confidence", 0.0)) for p in predictions]
+        padding = self.top_k - len(predictions)
+        digest = np.frombuffer(bytes.fromhex(audio_sha256), dtype=np.uint8) if audio_sha256 else np.zeros(32, np.uint8)
+        return (
+            timestamp, status, encode_field(model or ""), encode_field(model_version or "", 16),
+            encode_field(feature_type or "", 16), digest, audio_bytes, duration_ms, min(batch_size, 65535),
+            speakers + [b""] * padding, probabilities + [np.nan] * padding,
+            *[latencies_ms.get(stage, np.nan) for stage in LATENCY_STAGES]
+        )
+    
+    def _run(self):
+        """Writer thread: collect records and append them in batches."""
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                if self._stop.is_set():
+                    deadline = 0  # drain without waiting
+            if batch:
+                self._write(batch)
+    
+    def _write(self, batch: list):
+        """Append a batch of queued records to the log file (records that can't be converted are skipped)."""
+        converted = []
+        for item in batch:
+            try:
+                converted.append(np.array(self._to_record(item), dtype=self.dtype))
+            except Exception as e:
+                self.dropped += 1
+                print(f"Warning: Skipped invalid prediction log record: {e}")
+        if not converted:
+            return
+        try:
+            records = np.stack(converted)
+            with open(self.log_path, "ab") as f:
+                f.write(records.tobytes())
+            self.written += len(records)
+        except Exception as e:
+            self.dropped += len(converted)
+            print(f"Warning: Could not write {len(converted)} prediction log record(s): {e}")
+    
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the writer thread."""
+        self._stop.set()
+        self._thread.join(timeout)
+    
+    def read(self) -> np.ndarray:
+        """Memory-map all complete records written so far."""
+        if not self.log_path.exists():
+            return np.zeros(0, dtype=self.dtype)
+        count = self.log_path.stat().st_size // self.dtype.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.log_path, dtype=self.dtype, mode="r", shape=(count,))
+    
+    def get_stats(self, since: Optional[float] = None, model: Optional[str] = None) -> Dict:
+        """
+        Aggregate statistics over the log.
+        
+        Args:
+            since: Only include records with a unix timestamp >= since
+            model: Only include records of this model
+        
+        Returns:
+            Dictionary with counts, per-speaker/per-model counts, confidence
+            distribution and latency percentiles per stage
+        """
+        records = self.read()
+        mask = np.ones(len(records), dtype=bool)
+        if since is not None:
+            mask &= records["timestamp"] >= since
+        if model is not None:
+            mask &= records["model"] == encode_field(model)
+        records = records[mask]
+        ok = records[(records["status"] == STATUS_OK) & ~np.isnan(records["probabilities"][:, 0])]
+        
+        speakers, speaker_counts = np.unique(ok["speakers"][:, 0], return_counts=True)
+        models, model_counts = np.unique(records["model"], return_counts=True)
+        confidence = ok["probabilities"][:, 0].astype(np.float64)
+        histogram, edges = np.histogram(confidence, bins=10, range=(0.0, 1.0))
+        
+        latency = {}
+        for stage in LATENCY_STAGES:
+            values = ok[stage].astype(np.float64)
+            values = values[~np.isnan(values)]
+            if len(values):
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                latency[stage] = {
+                    "mean": float(values.mean()), "p50": float(p50), "p95": float(p95),
+                    "p99": float(p99), "max": float(values.max())
+                }
+        
+        return {
+            "records": int(len(records)),
+            "errors": int(len(records) - len(ok)),
+            "first_timestamp": float(records["timestamp"].min()) if len(records) else None,
+            "last_timestamp": float(records["timestamp"].max()) if len(records) else None,
+            "per_speaker": {s.decode("utf-8", "replace"): int(c) for s, c in zip(speakers, speaker_counts)},
+            "per_model": {m.decode("utf-8", "replace"): int(c) for m, c in zip(models, model_counts)},
+            "confidence": {
+                "mean": float(confidence.mean()) if len(confidence) else None,
+                "p10": float(np.percentile(confidence, 10)) if len(confidence) else None,
+                "p50": float(np.percentile(confidence, 50)) if len(confidence) else None,
+                "histogram": histogram.tolist(),
+                "bin_edges": edges.round(2).tolist()
+            },
+            "latency_ms": latency,
+            "writer": {"written": self.written, "dropped": self.dropped, "queued": self._queue.qsize()}
+        }
@@ -0,0 +1,166 @@
+"""
+Persistent hyperparameter search history.
+Every candidate evaluated by train_model.py --tune is stored in a local
+SQLite database with its parameters, fold scores, fit time and a
+fingerprint of the training data, so later runs can skip candidates
+already evaluated on the same data and start from the best candidates
+of earlier runs on a grown dataset.
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_type TEXT NOT NULL,
+    feature_type TEXT NOT NULL,
+    dataset_fingerprint TEXT NOT NULL,
+    n_samples INTEGER NOT NULL,
+    cv_splits INTEGER NOT NULL,
+    params_key TEXT NOT NULL,
+    fold_scores TEXT NOT NULL,
+    mean_score REAL,
+    std_score REAL,
+    fit_time_s REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_lookup
+    ON candidates (model_type, feature_type, cv_splits, dataset_fingerprint);
+"""
+
+
+def dataset_fingerprint(X: np.ndarray, y: np.ndarray) -> str:
+    """SHA-256 of a training matrix and its labels."""
+    digest = hashlib.sha256()
+    X = np.ascontiguousarray(X)
+    digest.update(f"{X.shape}:{X.dtype}".encode())
+    digest.update(X.tobytes())
+    digest.update("\n".join(str(label) for label in y).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode(value):
+    """JSON-safe form of a parameter value (tuples are kept distinct from lists)."""
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict) and "__tuple__" in value:
+        return tuple(_decode(v) for v in value["__tuple__"])
+    return value
+
+
+def params_key(params: Dict) -> str:
+    """Canonical identifier of a parameter combination."""
+    return json.dumps({name: _encode(value) for name, value in params.items()}, sort_keys=True)
+
+
+class SearchHistory:
+    """SQLite store of evaluated hyperparameter candidates."""
+    
+    def __init__(self, db_path: str = "models/search_history.sqlite"):
+        """
+        Args:
+            db_path: Database file (created if missing)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Parallel training processes may write at the same time
+        self._conn = sqlite3.connect(str(self.db_path), timeout=60)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+    
+    def record(
+        self,
+        model_type: str,
+        feature_type: str,
+        fingerprint: str,
+        n_samples: int,
+        cv_splits: int,
+        params: Dict,
+        fold_scores: List[float],
+        fit_time_s: float
+    ):
+        """Store one evaluated candidate."""
+        scores = [float(s) for s in fold_scores]
+        valid = [s for s in scores if not math.isnan(s)]
+        # A failed fold makes the candidate unusable, like sklearn's NaN mean
+        complete = bool(scores) and len(valid) == len(scores)
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO candidates (model_type, feature_type, dataset_fingerprint, n_samples, cv_splits, "
+                "params_key, fold_scores, mean_score, std_score, fit_time_s, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    model_type, feature_type, fingerprint, n_samples, cv_splits,
+                    params_key(params), json.dumps([None if math.isnan(s) else s for s in scores]),
+                    float(np.mean(valid)) if complete else None,
+                    float(np.std(valid)) if complete else None,
+                    float(fit_time_s), time.time()
+                )
+            )
+    
+    def _row_to_candidate(self, row: sqlite3.Row) -> Dict:
+        return {
+            "params": {name: _decode(value) for name, value in json.loads(row["params_key"]).items()},
+            "params_key": row["params_key"],
+            "fold_scores": json.loads(row["fold_scores"]),
+            "mean_score": row["mean_score"],
+            "std_score": row["std_score"],
+            "fit_time_s": row["fit_time_s"]
+        }
+    
+    def evaluated(self, model_type: str, feature_type: str, fingerprint: str, cv_splits: int) -> Dict[str, Dict]:
+        """
+        Candidates already evaluated on exactly this dataset and CV setup.
+        
+        Returns:
+            Candidates by params_key (latest evaluation wins)
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM candidates WHERE model_type = ? AND feature_type = ? AND cv_splits = ? "
+            "AND dataset_fingerprint = ? ORDER BY id",
+            (model_type, feature_type, cv_splits, fingerprint)
+        ).fetchall()
+        return {row["params_key"]: self._row_to_candidate(row) for row in rows}
+    
+    def top_candidates(
+        self,
+        model_type: str,
+        feature_type: str,
+        limit: int = 3,
+        exclude_fingerprint: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Best distinct candidates from earlier runs on other datasets.
+        
+        Each parameter combination is ranked by the score of its most
+        recent evaluation, so results on the latest data count most.
+        
+        Returns:
+            Up to limit candidates, best first
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM candidates WHERE model_type = ? AND feature_type = ? AND dataset_fingerprint != ? "
+            "AND mean_score IS NOT NULL ORDER BY id DESC",
+            (model_type, feature_type, exclude_fingerprint or "")
+        ).fetchall()
+        latest: Dict[str, sqlite3.Row] = {}
+        for row in rows:
+            latest.setdefault(row["params_key"], row)
+        ranked = sorted(latest.values(), key=lambda row: -row["mean_score"])
+        return [self._row_to_candidate(row) for row in ranked[:limit]]
+    
+    def close(self):
+        self._conn.close()
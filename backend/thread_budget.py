@@ -0,0 +1,76 @@
+"""
+Thread budget for inference workers.
+Caps the BLAS/OpenMP, numba, torch and joblib thread pools of a server process so
+that several uvicorn workers don't oversubscribe the CPU.
+
+Examples:
+    SPEAKER_ID_THREADS=2 uvicorn app:app --workers 4   # many workers x few threads
+    SPEAKER_ID_THREADS=8 uvicorn app:app --workers 1   # one worker x many threads
+
+Without SPEAKER_ID_THREADS the budget is cpu_count // WEB_CONCURRENCY.
+"""
+import os
+import sys
+from typing import Optional
+
+# Read by OpenBLAS/MKL/OpenMP/numba when their pools are first created
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+)
+
+
+def resolve_thread_budget(
+    threads: Optional[int] = None,
+    workers: Optional[int] = None
+) -> int:
+    """
+    Determine the number of threads each worker may use.
+
+    Args:
+        threads: Explicit budget (defaults to SPEAKER_ID_THREADS)
+        workers: Number of worker processes (defaults to WEB_CONCURRENCY)
+
+    Returns:
+        Threads per worker (at least 1)
+    """
+    if threads is None and os.environ.get("SPEAKER_ID_THREADS"):
+        threads = int(os.environ["SPEAKER_ID_THREADS"])
+    if threads is None:
+        if workers is None:
+            workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+        threads = (os.cpu_count() or 1) // max(1, workers)
+    return max(1, threads)
+
+
+def apply_thread_budget(threads: int) -> None:
+    """
+    Limit native thread pools of this process to the given size.
+
+    Call before numpy/sklearn/librosa are imported so the environment
+    variables take effect; pools that are already loaded are limited
+    through threadpoolctl and numba's runtime API.
+
+    Args:
+        threads: Threads per worker
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+    if "numba" in sys.modules:
+        numba = sys.modules["numba"]
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+    
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
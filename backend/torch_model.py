@@ -0,0 +1,208 @@
+"""
+CPU-friendly neural speaker model (TDNN over MFCC frames).
+Handles training, dynamic int8 quantization, TorchScript export and
+sklearn-style inference wrappers used by train_model.py and ModelManager.
+"""
+import io
+import json
+from typing import List, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+# Extra file stored inside the TorchScript archive
+METADATA_FILE = "speaker_model.json"
+
+
+class TDNN(nn.Module):
+    """
+    Small time-delay neural network with statistics pooling.
+    
+    Dilated 1D convolutions over MFCC frames, mean/std pooling over time
+    and a linear embedding + classifier head. Works for any clip length.
+    """
+    
+    def __init__(self, n_features: int, n_classes: int, channels: int = 64, embedding_dim: int = 64):
+        super().__init__()
+        self.frame_layers = nn.Sequential(
+            nn.Conv1d(n_features, channels, kernel_size=5, dilation=1),
+            nn.ReLU(),
+            nn.BatchNorm1d(channels),
+            nn.Conv1d(channels, channels, kernel_size=3, dilation=2),
+            nn.ReLU(),
+            nn.BatchNorm1d(channels),
+            nn.Conv1d(channels, channels, kernel_size=3, dilation=3),
+            nn.ReLU(),
+            nn.BatchNorm1d(channels),
+        )
+        self.embedding = nn.Linear(2 * channels, embedding_dim)
+        self.classifier = nn.Linear(embedding_dim, n_classes)
+        # Input normalization (set from training data)
+        self.register_buffer("feature_mean", torch.zeros(n_features))
+        self.register_buffer("feature_std", torch.ones(n_features))
+    
+    def logits(self, x: torch.Tensor) -> torch.Tensor:
+        """Class scores for input of shape (batch, frames, n_features)."""
+        x = (x - self.feature_mean) / self.feature_std
+        h = self.frame_layers(x.transpose(1, 2))
+        stats = torch.cat([h.mean(dim=2), h.std(dim=2)], dim=1)
+        return self.classifier(torch.relu(self.embedding(stats)))
+    
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Class probabilities for input of shape (batch, frames, n_features)."""
+        return torch.softmax(self.logits(x), dim=1)
+
+
+def export_module(model: TDNN, quantize: bool = True) -> torch.jit.ScriptModule:
+    """
+    Convert a trained TDNN to a TorchScript module for CPU inference.
+    
+    Args:
+        model: Trained model
+        quantize: Apply dynamic int8 quantization to the linear layers
+    
+    Returns:
+        Scripted module in eval mode
+    """
+    model = model.cpu().eval()
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    return torch.jit.script(model)
+
+
+class TDNNClassifier(ClassifierMixin, BaseEstimator):
+    """
+    sklearn-style estimator around TDNN for train_model.py.
+    
+    Accepts the flattened MFCC rows used by the other models and reshapes
+    them to (frames, n_features). After fit, predictions run on the
+    exported (quantized, TorchScript) module, so evaluation measures what
+    the server will load.
+    """
+    
+    def __init__(
+        self,
+        n_features: int = 13,
+        channels: int = 64,
+        embedding_dim: int = 64,
+        epochs: int = 40,
+        batch_size: int = 32,
+        learning_rate: float = 1e-3,
+        quantize: bool = True,
+        random_state: int = 42
+    ):
+        self.n_features = n_features
+        self.channels = channels
+        self.embedding_dim = embedding_dim
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.quantize = quantize
+        self.random_state = random_state
+    
+    def _to_frames(self, X) -> torch.Tensor:
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[1] % self.n_features != 0:
+            raise ValueError(f"Feature size {X.shape[1]} is not a multiple of n_features={self.n_features}")
+        return torch.from_numpy(X.reshape(len(X), -1, self.n_features))
+    
+    def fit(self, X, y):
+        """Train the network and export it for inference."""
+        torch.manual_seed(self.random_state)
+        self.classes_, y_idx = np.unique(np.asarray(y), return_inverse=True)
+        frames = self._to_frames(X)
+        targets = torch.from_numpy(y_idx.astype(np.int64))
+        
+        model = TDNN(self.n_features, len(self.classes_), self.channels, self.embedding_dim)
+        model.feature_mean.copy_(frames.reshape(-1, self.n_features).mean(dim=0))
+        model.feature_std.copy_(frames.reshape(-1, self.n_features).std(dim=0).clamp_min(1e-6))
+        
+        optimizer = torch.optim.Adam(model.parameters(), lr=self.learning_rate)
+        loss_fn = nn.CrossEntropyLoss()
+        generator = torch.Generator().manual_seed(self.random_state)
+        model.train()
+        for _ in range(self.epochs):
+            order = torch.randperm(len(frames), generator=generator)
+            for start in range(0, len(frames), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                if len(batch) < 2:
+                    continue  # BatchNorm needs more than one sample
+                optimizer.zero_grad()
+                loss = loss_fn(model.logits(frames[batch]), targets[batch])
+                loss.backward()
+                optimizer.step()
+        
+        self.module_ = export_module(model, quantize=self.quantize)
+        return self
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities from the exported module."""
+        with torch.inference_mode():
+            return self.module_(self._to_frames(X)).numpy().astype(np.float64)
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the most likely class."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def export(self, path: str):
+        """Save the TorchScript module with class labels for ModelManager."""
+        metadata = {"classes": [str(c) for c in self.classes_], "n_features": self.n_features}
+        torch.jit.save(self.module_, path, _extra_files={METADATA_FILE: json.dumps(metadata)})
+    
+    def __getstate__(self):
+        # ScriptModules can't be pickled directly (needed for parallel training)
+        state = self.__dict__.copy()
+        if "module_" in state:
+            buffer = io.BytesIO()
+            torch.jit.save(state["module_"], buffer)
+            state["module_"] = buffer.getvalue()
+        return state
+    
+    def __setstate__(self, state):
+        if isinstance(state.get("module_"), bytes):
+            state["module_"] = torch.jit.load(io.BytesIO(state["module_"]), map_location="cpu")
+        self.__dict__.update(state)
+
+
+class TorchSpeakerModel:
+    """Serving wrapper for an exported TorchScript speaker model."""
+    
+    def __init__(self, model_path: str, n_threads: Optional[int] = None):
+        """
+        Args:
+            model_path: Path to the exported .pt file
+            n_threads: Intra-op threads for torch (None keeps torch's default)
+        """
+        extra_files = {METADATA_FILE: ""}
+        self.module = torch.jit.load(model_path, map_location="cpu", _extra_files=extra_files)
+        self.module.eval()
+        metadata = json.loads(extra_files[METADATA_FILE])
+        self.classes_ = np.array(metadata["classes"])
+        self.n_features = metadata["n_features"]
+        if n_threads is not None:
+            torch.set_num_threads(n_threads)
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for one or more flattened MFCC rows.
+        
+        Args:
+            X: Array-like of shape (n_samples, frames * n_features)
+        
+        Returns:
+            Probabilities (n_samples, n_classes)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        frames = torch.from_numpy(X.reshape(len(X), -1, self.n_features))
+        with torch.inference_mode():
+            return self.module(frames).numpy().astype(np.float64)
+    
+    def predict(self, X) -> np.ndarray:
+        """Predict the most likely class."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    @property
+    def classes(self) -> List[str]:
+        return self.classes_.tolist()
@@ -0,0 +1,128 @@
+"""
+Düz SVM ile hiyerarşik model (konuşmacı kümeleri + küme başına SVM) karşılaştırması.
+Gerçek veri setinde az sayıda konuşmacı olduğu için konuşmacılar sentetik olarak
+üretilir: her konuşmacı özellik uzayında rastgele bir merkez, örnekleri bu merkez
+etrafında gürültülü vektörlerdir. Her konuşmacı sayısı için eğitim süresi, tek
+örnek gecikmesi, doğruluk ve yeni bir konuşmacı eklendiğinde hiyerarşik modelin
+güncelleme süresi (sadece etkilenen küme yeniden eğitilir) ölçülür.
+
+Örnek:
+    python benchmark_hierarchical.py --speakers 16,64,256 --max-cluster-size 16
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import numpy as np
+from train_model import create_model, measure_inference_time  # type: ignore
+
+
+def synthetic_speakers(n_speakers: int, n_samples: int, n_features: int, noise: float, seed: int = 42):
+    """
+    Sentetik konuşmacılar: rastgele merkezler etrafında gürültülü örnekler.
+    
+    Returns:
+        X_train, y_train, X_test, y_test (test: konuşmacı başına n_samples // 3 örnek)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_speakers, n_features))
+    labels = np.array([f"speaker_{i:05d}" for i in range(n_speakers)])
+    
+    def sample(count):
+        index = np.repeat(np.arange(n_speakers), count)
+        return centers[index] + rng.normal(scale=noise, size=(len(index), n_features)), labels[index]
+    
+    X_train, y_train = sample(n_samples)
+    X_test, y_test = sample(max(1, n_samples // 3))
+    return X_train, y_train, X_test, y_test
+
+
+def fit_timed(model, X, y) -> float:
+    """Eğitim süresi (s)."""
+    start = time.perf_counter()
+    model.fit(X, y)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Düz SVM / hiyerarşik model ölçeklenme karşılaştırması')
+    parser.add_argument(
+        '--speakers',
+        type=str,
+        default='16,64,256',
+        help='Virgülle ayrılmış konuşmacı sayıları (default: 16,64,256)'
+    )
+    parser.add_argument('--samples', type=int, default=12, help='Konuşmacı başına eğitim örneği (default: 12)')
+    parser.add_argument('--features', type=int, default=78, help='Özellik boyutu (default: 78, mfcc_stats)')
+    parser.add_argument('--noise', type=float, default=0.8, help='Örnek gürültüsü (default: 0.8)')
+    parser.add_argument(
+        '--max-cluster-size',
+        type=int,
+        default=16,
+        help='Hiyerarşik modelde küme başına en fazla konuşmacı (default: 16)'
+    )
+    parser.add_argument(
+        '--flat-limit',
+        type=int,
+        default=512,
+        help='Düz SVM bu konuşmacı sayısının üstünde atlanır (default: 512)'
+    )
+    args = parser.parse_args()
+    
+    results = []
+    for n_speakers in [int(n) for n in args.speakers.split(',') if n.strip()]:
+        print(f"⏱️  {n_speakers} speakers...")
+        X_train, y_train, X_test, y_test = synthetic_speakers(
+            n_speakers, args.samples, args.features, args.noise
+        )
+        row = {'speakers': n_speakers}
+        
+        hierarchical = create_model('hierarchical').set_params(max_cluster_size=args.max_cluster_size)
+        row['hier_fit_s'] = fit_timed(hierarchical, X_train, y_train)
+        row['hier_acc'] = float(np.mean(hierarchical.predict(X_test) == y_test))
+        row['hier_ms'] = measure_inference_time(hierarchical, X_test)['inference_ms_single']
+        row['clusters'] = hierarchical.n_clusters_
+        
+        # Yeni bir konuşmacı: sadece en yakın küme yeniden eğitilir
+        X_new, y_new, _, _ = synthetic_speakers(1, args.samples, args.features, args.noise, seed=n_speakers)
+        y_new = np.array(['new_speaker'] * len(y_new))
+        start = time.perf_counter()
+        hierarchical.update(np.vstack([X_train, X_new]), np.concatenate([y_train, y_new]))
+        row['update_s'] = time.perf_counter() - start
+        row['retrained'] = hierarchical.last_update_['retrained_clusters']
+        
+        if n_speakers <= args.flat_limit:
+            flat = create_model('svm')
+            row['flat_fit_s'] = fit_timed(flat, X_train, y_train)
+            row['flat_acc'] = float(np.mean(flat.predict(X_test) == y_test))
+            row['flat_ms'] = measure_inference_time(flat, X_test)['inference_ms_single']
+        results.append(row)
+    
+    print(f"\n📊 Flat SVM vs hierarchical (max {args.max_cluster_size} speakers per cluster):")
+    print(f"   {'':>8} {'':>8} | {'flat SVM':^23} | {'hierarchical':^43}")
+    print(f"   {'speakers':>8} {'clusters':>8} | {'fit s':>7} {'acc':>7} {'ms':>7} | "
+          f"{'fit s':>7} {'acc':>7} {'ms':>7} {'update s':>9} {'retrained':>9}")
+    for row in results:
+        if 'flat_fit_s' in row:
+            flat = f"{row['flat_fit_s']:>7.2f} {row['flat_acc']*100:>6.1f}% {row['flat_ms']:>7.3f}"
+        else:
+            flat = f"{'-':>7} {'-':>7} {'-':>7}"
+        print(f"   {row['speakers']:>8} {row['clusters']:>8} | {flat} | "
+              f"{row['hier_fit_s']:>7.2f} {row['hier_acc']*100:>6.1f}% {row['hier_ms']:>7.3f} "
+              f"{row['update_s']:>9.2f} {row['retrained']:>9}")
+
+
+if __name__ == "__main__":
+    main()
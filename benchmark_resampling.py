@@ -0,0 +1,145 @@
+"""
+Yeniden örnekleme (resampling) kalite seviyeleri için doğruluk/hız karşılaştırması.
+Her ses dosyası orijinal örnekleme hızında bir kez çözülür, ardından her seviye
+ile 16 kHz'e indirilip aynı train/test bölmesi üzerinde model eğitilir.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import numpy as np
+import librosa
+from sklearn.model_selection import train_test_split
+from audio_processor import AudioProcessor, RESAMPLE_QUALITY  # type: ignore
+from train_model import create_model  # type: ignore
+
+AUDIO_EXTENSIONS = ('*.wav', '*.mp3', '*.m4a', '*.webm', '*.ogg')
+
+
+def load_native_corpus(data_dir: Path):
+    """
+    Tüm ses dosyalarını orijinal örnekleme hızında (mono) yükle.
+
+    Returns:
+        (audio, native_sr, speaker) üçlülerinin listesi
+    """
+    corpus = []
+    for speaker_folder in sorted(d for d in data_dir.iterdir() if d.is_dir()):
+        audio_files = []
+        for pattern in AUDIO_EXTENSIONS:
+            audio_files.extend(speaker_folder.glob(pattern))
+        for audio_file in sorted(audio_files):
+            try:
+                audio, sr = librosa.load(str(audio_file), sr=None, mono=True)
+            except Exception as e:
+                print(f"     ⚠️  Failed to load {audio_file.name}: {e}")
+                continue
+            corpus.append((audio, sr, speaker_folder.name))
+    return corpus
+
+
+def benchmark_tier(corpus, quality: str, model_type: str):
+    """
+    Tek bir kalite seviyesi için resampling süresi ve model doğruluğunu ölç.
+
+    Returns:
+        Sonuç sözlüğü ve özellik matrisi
+    """
+    processor = AudioProcessor(resample_quality=quality)
+    features_list = []
+    labels_list = []
+    resample_time = 0.0
+
+    for audio, native_sr, speaker in corpus:
+        start = time.perf_counter()
+        audio_16k = librosa.resample(
+            audio, orig_sr=native_sr, target_sr=processor.sample_rate, res_type=processor.res_type
+        )
+        resample_time += time.perf_counter() - start
+
+        audio_16k = processor.preprocess_audio(audio_16k)
+        features_list.append(processor.extract_mfcc(audio_16k).flatten())
+        labels_list.append(speaker)
+
+    X = np.array(features_list)
+    y = np.array(labels_list)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    model = create_model(model_type)
+    model.fit(X_train, y_train)
+
+    return {
+        'quality': quality,
+        'res_type': processor.res_type,
+        'resample_ms_per_file': resample_time / len(corpus) * 1000,
+        'test_accuracy': float(model.score(X_test, y_test))
+    }, X
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resampling kalite seviyesi karşılaştırması')
+    parser.add_argument('--data-dir', type=str, default='data/raw', help='Ses verisi dizini')
+    parser.add_argument(
+        '--model',
+        type=str,
+        default='svm',
+        choices=['svm', 'random_forest', 'neural_network', 'adaboost'],
+        help='Karşılaştırmada kullanılacak model tipi (default: svm)'
+    )
+    parser.add_argument(
+        '--qualities',
+        type=str,
+        default=','.join(RESAMPLE_QUALITY.keys()),
+        help='Virgülle ayrılmış kalite seviyeleri (default: hepsi)'
+    )
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    if not data_dir.exists():
+        print(f"❌ Error: {data_dir} directory not found!")
+        return
+
+    print("📂 Decoding corpus at native sample rate...")
+    corpus = load_native_corpus(data_dir)
+    if not corpus:
+        print("❌ Error: No valid audio files found!")
+        return
+    native_rates = sorted({sr for _, sr, _ in corpus})
+    print(f"   {len(corpus)} files, native sample rates: {native_rates}")
+
+    results = []
+    reference = None
+    for quality in args.qualities.split(','):
+        quality = quality.strip()
+        print(f"\n⏱️  Benchmarking '{quality}'...")
+        result, X = benchmark_tier(corpus, quality, args.model)
+        if reference is None:
+            reference = X
+        # Özelliklerin ilk seviyeye göre sapması (MFCC birimi)
+        result['max_feature_diff'] = float(np.max(np.abs(X - reference)))
+        results.append(result)
+
+    print(f"\n📊 Resampling comparison ({args.model}):")
+    print(f"   {'quality':<8} {'res_type':<10} {'ms/file':>8} {'accuracy':>9} {'max Δfeat':>10}")
+    for r in results:
+        print(f"   {r['quality']:<8} {r['res_type']:<10} {r['resample_ms_per_file']:>8.2f} "
+              f"{r['test_accuracy']*100:>8.2f}% {r['max_feature_diff']:>10.4f}")
+    print("\n💡 Seçilen seviyeyi sunucuda SPEAKER_ID_RESAMPLE_QUALITY ile,")
+    print("   eğitimde train_model.py --resample-quality ile ayarlayın.")
+
+
+if __name__ == "__main__":
+    main()
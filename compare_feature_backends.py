@@ -0,0 +1,161 @@
+"""
+Özellik hesaplama backend'lerinin (librosa / numpy) karşılaştırması.
+Aynı dosyalar için çözülen ses, MFCC, Mel ve MFCC istatistiklerinin librosa
+referansıyla toleransı içinde olduğunu doğrular; ayrıca import süresi, bellek
+(RSS) ve ilk istek gecikmesini ölçer. Fark tolerans dışındaysa çıkış kodu 1'dir.
+"""
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import numpy as np
+from audio_processor import AudioProcessor  # type: ignore
+
+AUDIO_EXTENSIONS = ('*.wav', '*.mp3', '*.m4a', '*.webm', '*.ogg')
+
+# Ayrı bir süreçte: import + ilk özellik çıkarımı süresi ve bellek kullanımı
+STARTUP_PROBE = """
+import json, sys, time
+sys.path.insert(0, {backend_dir!r})
+start = time.perf_counter()
+from audio_processor import AudioProcessor
+processor = AudioProcessor(feature_backend={backend!r})
+import_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+audio = processor.load_audio({file_path!r}, target_length_ms=processor.TARGET_LENGTH_MS)
+processor.extract_features(processor.preprocess_audio(audio), feature_type='mfcc')
+first_ms = (time.perf_counter() - start) * 1000
+try:
+    # VmHWM: peak RSS of this process (ru_maxrss would include the parent's after fork)
+    with open('/proc/self/status') as f:
+        max_rss_mb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+except OSError:  # not Linux
+    max_rss_mb = float('nan')
+print(json.dumps({{
+    'import_ms': import_ms,
+    'first_request_ms': first_ms,
+    'max_rss_mb': max_rss_mb,
+    'librosa_imported': 'librosa' in sys.modules,
+    'numba_imported': 'numba' in sys.modules
+}}))
+"""
+
+
+def relative_error(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """En büyük mutlak farkın referansın en büyük mutlak değerine oranı."""
+    if reference.shape != candidate.shape:
+        return float('inf')
+    scale = max(float(np.max(np.abs(reference))), 1e-12)
+    return float(np.max(np.abs(reference - candidate))) / scale
+
+
+def compare_file(reference: AudioProcessor, candidate: AudioProcessor, file_path: str) -> dict:
+    """Tek dosya için backend'ler arası en büyük bağıl farklar."""
+    errors = {}
+    full_ref = reference.load_audio(file_path)
+    full_cand = candidate.load_audio(file_path)
+    errors['audio'] = relative_error(full_ref, full_cand)
+    errors['audio_window'] = relative_error(
+        reference.load_audio(file_path, target_length_ms=reference.TARGET_LENGTH_MS),
+        candidate.load_audio(file_path, target_length_ms=candidate.TARGET_LENGTH_MS)
+    )
+    
+    # Özellikler aynı giriş sinyali üzerinde karşılaştırılır
+    clip = reference.preprocess_audio(full_ref)
+    for feature_type in ('mfcc', 'mel', 'mfcc_stats'):
+        errors[feature_type] = relative_error(
+            reference.extract_features(clip, feature_type),
+            candidate.extract_features(clip, feature_type)
+        )
+    errors['mfcc_stats_full'] = relative_error(
+        reference.extract_features(full_ref, 'mfcc_stats'),
+        candidate.extract_features(full_ref, 'mfcc_stats')
+    )
+    return errors
+
+
+def startup_profile(backend: str, file_path: str) -> dict:
+    """Yeni bir Python sürecinde import süresi, ilk istek ve RSS ölçümü."""
+    code = STARTUP_PROBE.format(backend_dir=str(BACKEND_DIR), backend=backend, file_path=file_path)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='librosa / numpy özellik backend karşılaştırması')
+    parser.add_argument('--data-dir', type=str, default='data/raw', help='Ses verisi dizini')
+    parser.add_argument('--backend', type=str, default='numpy', help='Karşılaştırılacak backend (default: numpy)')
+    parser.add_argument('--max-files', type=int, default=20, help='Karşılaştırılacak dosya sayısı (default: 20)')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help='İzin verilen en büyük bağıl fark (default: 1e-4)')
+    parser.add_argument(
+        '--resample-quality',
+        type=str,
+        default='high',
+        choices=['high', 'medium', 'low', 'fast'],
+        help='Yeniden örnekleme kalitesi (default: high)'
+    )
+    args = parser.parse_args()
+    
+    data_dir = Path(args.data_dir)
+    if not data_dir.exists():
+        print(f"❌ Error: {data_dir} directory not found!")
+        sys.exit(1)
+    audio_files = []
+    for pattern in AUDIO_EXTENSIONS:
+        audio_files.extend(data_dir.glob(f'*/{pattern}'))
+    audio_files = sorted(audio_files)[:args.max_files]
+    if not audio_files:
+        print("❌ Error: No audio files found!")
+        sys.exit(1)
+    
+    reference = AudioProcessor(resample_quality=args.resample_quality, feature_backend='librosa')
+    candidate = AudioProcessor(resample_quality=args.resample_quality, feature_backend=args.backend)
+    
+    print(f"🔍 Comparing '{args.backend}' against librosa on {len(audio_files)} files...")
+    worst = {}
+    for audio_file in audio_files:
+        try:
+            errors = compare_file(reference, candidate, str(audio_file))
+        except Exception as e:
+            print(f"     ⚠️  Failed to compare {audio_file.name}: {e}")
+            continue
+        for name, error in errors.items():
+            worst[name] = max(worst.get(name, 0.0), error)
+    
+    failed = False
+    print(f"\n📊 Max relative difference (tolerance {args.tolerance:g}):")
+    for name, error in worst.items():
+        ok = error <= args.tolerance
+        failed |= not ok
+        print(f"   {'✅' if ok else '❌'} {name:<16} {error:.2e}")
+    
+    print(f"\n⏱️  Startup profile (fresh process, {audio_files[0].name}):")
+    print(f"   {'backend':<8} {'import ms':>10} {'first req ms':>13} {'max RSS MB':>11} {'librosa':>8} {'numba':>6}")
+    for backend in ('librosa', args.backend):
+        profile = startup_profile(backend, str(audio_files[0]))
+        print(f"   {backend:<8} {profile['import_ms']:>10.0f} {profile['first_request_ms']:>13.0f} "
+              f"{profile['max_rss_mb']:>11.0f} {str(profile['librosa_imported']):>8} "
+              f"{str(profile['numba_imported']):>6}")
+    
+    if failed:
+        print("\n❌ Parity check failed")
+        sys.exit(1)
+    print("\n✅ Parity check passed")
+    print("💡 Sunucuda SPEAKER_ID_FEATURE_BACKEND=numpy ile etkinleştirin.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Kaydedilmiş SVM ve Random Forest modellerini diziye dayalı tahmincilere derler.
+Her model için sklearn ile derlenmiş tahmincinin olasılıkları özellik deposundaki
+örnekler üzerinde karşılaştırılır (parity check); fark toleransın içindeyse
+model dosyasının yanına <model>.compiled yazılır ve sunucu (ModelManager) onu
+kullanır. Model yeniden eğitildiğinde train_model.py derlenmiş dosyayı günceller.
+Fark tolerans dışındaysa dosya yazılmaz ve çıkış kodu 1'dir.
+
+Örnek:
+    python compile_models.py                         # models/ altındaki tüm svm/random_forest modelleri
+    python compile_models.py svm_speaker_model.pkl --dtype float64
+"""
+import sys
+import json
+import pickle
+import argparse
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import numpy as np
+from audio_processor import normalize_feature_config  # type: ignore
+from compiled_model import (  # type: ignore
+    PARITY_TOLERANCE, check_parity, compile_model, compiled_path, file_version, save_compiled
+)
+from feature_store import FeatureStore  # type: ignore
+from train_model import feature_store_name, measure_inference_time  # type: ignore
+
+MODEL_PATTERNS = ('svm_speaker_model*.pkl', 'random_forest_speaker_model*.pkl')
+
+
+def parity_inputs(metadata: dict, n_features: int, store_dir: Path, max_samples: int) -> tuple:
+    """
+    Parity check için giriş örnekleri: modelin özellik deposundaki satırlar.
+    
+    Depo yoksa veya boyutu uyuşmuyorsa rastgele girişler kullanılır.
+    
+    Returns:
+        (X, kaynak açıklaması)
+    """
+    feature_type = metadata.get('feature_type', 'mfcc')
+    feature_config = normalize_feature_config(metadata.get('feature_config'))
+    store = FeatureStore(str(store_dir / feature_store_name(feature_type, feature_config)))
+    if store.exists and store.n_rows and store.n_features == n_features:
+        step = max(1, store.n_rows // max_samples)
+        return np.array(store.features()[::step][:max_samples]), f'{store.path}'
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(max_samples, n_features)), 'random inputs (no matching feature store)'
+
+
+def compile_file(model_path: Path, dtype, tolerance: float, store_dir: Path, max_samples: int) -> bool:
+    """
+    Tek bir modeli derle, sklearn ile karşılaştır ve parity sağlanırsa kaydet.
+    
+    Returns:
+        Parity check geçtiyse True
+    """
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    metadata_path = model_path.with_name(model_path.name + '.meta')
+    metadata = {}
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    
+    try:
+        compiled = compile_model(model, dtype=dtype)
+    except ValueError as e:
+        print(f"   ⚠️  Skipped: {e}")
+        return True
+    
+    X, source = parity_inputs(metadata, model.n_features_in_, store_dir, max_samples)
+    parity = check_parity(model, compiled, X, tolerance)
+    ok = parity['ok']
+    print(f"   Parity on {len(X)} rows ({source}):")
+    print(f"   {'✅' if ok else '❌'} max |Δp| {parity['max_diff']:.2e} (tolerance {tolerance:g}), "
+          f"same predictions {parity['same_labels'] * 100:.1f}%")
+    
+    reference = measure_inference_time(model, X)
+    fast = measure_inference_time(compiled, X)
+    print(f"   {'':<9} {'ms/sample batched':>18} {'ms single':>10}")
+    print(f"   {'sklearn':<9} {reference['inference_ms_per_sample_batched']:>18.4f} "
+          f"{reference['inference_ms_single']:>10.3f}")
+    print(f"   {'compiled':<9} {fast['inference_ms_per_sample_batched']:>18.4f} "
+          f"{fast['inference_ms_single']:>10.3f}  "
+          f"({reference['inference_ms_single'] / max(fast['inference_ms_single'], 1e-9):.1f}x single)")
+    
+    if not ok:
+        return False
+    output = compiled_path(model_path)
+    save_compiled(compiled, output, file_version(model_path))
+    print(f"   💾 {output} ({output.stat().st_size / 1024:.0f} KB)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SVM / Random Forest modellerini dizi tabanlı tahmincilere derle')
+    parser.add_argument('models', nargs='*', help='Model dosyaları (default: models/ altındaki svm ve random_forest)')
+    parser.add_argument('--models-dir', type=str, default='models', help='Model dizini (default: models)')
+    parser.add_argument(
+        '--dtype',
+        type=str,
+        default='float32',
+        choices=['float32', 'float64'],
+        help='SVM destek vektörlerinin ve kernel hesabının hassasiyeti (default: float32)'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=PARITY_TOLERANCE,
+        help=f'sklearn ile izin verilen en büyük olasılık farkı (default: {PARITY_TOLERANCE:g})'
+    )
+    parser.add_argument('--samples', type=int, default=256, help='Parity check örnek sayısı (default: 256)')
+    parser.add_argument(
+        '--feature-store',
+        type=str,
+        default='data/features',
+        help='Parity check girişleri için özellik deposu kök dizini (default: data/features)'
+    )
+    args = parser.parse_args()
+    
+    models_dir = Path(args.models_dir)
+    if args.models:
+        model_paths = [Path(m) if Path(m).exists() else models_dir / m for m in args.models]
+    else:
+        model_paths = sorted({path for pattern in MODEL_PATTERNS for path in models_dir.glob(pattern)})
+    if not model_paths:
+        print(f"❌ Error: No SVM or Random Forest models found in {models_dir}")
+        sys.exit(1)
+    
+    failed = []
+    for model_path in model_paths:
+        print(f"\n⚙️  Compiling {model_path.name}...")
+        if not compile_file(model_path, np.dtype(args.dtype), args.tolerance, Path(args.feature_store), args.samples):
+            failed.append(model_path.name)
+    
+    if failed:
+        print(f"\n❌ Parity check failed: {', '.join(failed)} (not written)")
+        sys.exit(1)
+    print("\n✅ Done. Sunucu derlenmiş tahmincileri model yüklenirken kullanır "
+          "(kapatmak için SPEAKER_ID_USE_COMPILED=0).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Parçalı (sharded) özellik çıkarımı.
+Manifest'teki dosyalar içerik hash'ine göre deterministik olarak N parçaya bölünür;
+her parça ayrı bir süreçte veya makinede --shard i/N ile işlenip kendi özellik
+dosyasına (SHA-256 checksum ile) yazılır. --merge parçaları checksum'larını
+doğrulayarak train_model.py'nin kullandığı özellik deposunda birleştirir.
+Varsayılan dışı özellik ayarları (--sample-rate, --n-mfcc, --hop-length,
+--target-length-ms) train_model.py'deki ile aynı depo adına birleştirilir.
+
+Örnek:
+    python extract_features.py --shard 0/4      # her worker kendi parçası için
+    python extract_features.py --merge --num-shards 4
+    python extract_features.py --local-workers 4  # tüm parçalar yerelde + merge
+    python extract_features.py --local-workers 4 --n-mfcc 20  # train_model.py --n-mfcc 20 için
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+from audio_processor import AudioProcessor, normalize_feature_config  # type: ignore
+from dataset_catalog import DatasetCatalog, assign_shard  # type: ignore
+from feature_store import FeatureStore  # type: ignore
+from train_model import feature_store_name  # type: ignore
+
+SUPPORTED_FEATURE_TYPES = ['mfcc', 'mfcc_stats']
+
+
+def parse_shard(value: str):
+    """'i/N' biçimindeki parça argümanını (i, N) olarak döndür."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz parça: {value} (beklenen: i/N, ör. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Geçersiz parça: {value} (0 <= i < N olmalı)")
+    return index, count
+
+
+def shard_path(shards_dir: Path, store_name: str, index: int, count: int) -> Path:
+    """Bir parçanın özellik deposu dizini (store_name: feature_store_name(...))."""
+    return shards_dir / store_name / f'shard_{index:04d}_of_{count:04d}'
+
+
+def extract_shard(
+    index: int,
+    count: int,
+    feature_type: str = 'mfcc',
+    resample_quality: str = 'high',
+    data_dir: str = 'data/raw',
+    shards_dir: str = 'data/features/shards',
+    feature_config: dict = None
+) -> dict:
+    """
+    Tek bir parçanın özelliklerini çıkar ve diske yaz.
+    
+    Parça, manifest'teki dosyaların assign_shard(hash, N) == i olanlarıdır; aynı
+    manifest ile her makinede aynı dosyalar seçilir.
+    
+    Args:
+        feature_config: sample_rate, n_mfcc, hop_length, target_length_ms (None: varsayılanlar)
+    
+    Returns:
+        Parça özeti (yol, satır sayısı, başarısız dosyalar, checksum, süre)
+    """
+    start = time.perf_counter()
+    catalog = DatasetCatalog(data_dir)
+    entries = [entry for entry in catalog.entries() if assign_shard(entry['hash'], count) == index]
+    feature_config = normalize_feature_config(feature_config)
+    processor = AudioProcessor.from_config(feature_config, resample_quality=resample_quality)
+    store_name = feature_store_name(feature_type, feature_config)
+    
+    def report_error(entry, error):
+        print(f"     ⚠️  [{index}/{count}] Failed to process {entry['path']}: {error}")
+    
+    store = FeatureStore.build(
+        str(shard_path(Path(shards_dir), store_name, index, count)), catalog, entries, processor,
+        feature_type, on_error=report_error, extra_meta={'shard': [index, count]}
+    )
+    return {
+        'shard': f'{index}/{count}',
+        'path': str(store.path),
+        'rows': store.n_rows,
+        'failed': len(store.meta['failed']),
+        'sha256': store.meta['sha256'],
+        'time_s': time.perf_counter() - start
+    }
+
+
+def merge_shards(
+    count: int,
+    feature_type: str = 'mfcc',
+    resample_quality: str = 'high',
+    data_dir: str = 'data/raw',
+    shards_dir: str = 'data/features/shards',
+    store_dir: str = 'data/features',
+    feature_config: dict = None
+) -> FeatureStore:
+    """
+    Parçaları checksum'larını doğrulayarak tek bir özellik deposunda birleştir.
+    
+    Sonuç store_dir/<feature_store_name(feature_type, feature_config)> altına
+    yazılır; manifest ve ayarlar değişmediyse train_model.py özellikleri yeniden
+    çıkarmadan bu depoyu kullanır.
+    
+    Raises:
+        ValueError: Eksik, bozuk veya uyumsuz parça varsa
+    """
+    feature_config = normalize_feature_config(feature_config)
+    store_name = feature_store_name(feature_type, feature_config)
+    paths = [shard_path(Path(shards_dir), store_name, i, count) for i in range(count)]
+    stores = [FeatureStore(str(path)) for path in paths]
+    missing = [str(store.path) for store in stores if not store.exists]
+    if missing:
+        raise ValueError(f"Eksik parça(lar): {', '.join(missing)}")
+    
+    # Manifest parçalardan sonra değiştiyse uyar (train_model.py eksikleri kendisi çıkarır)
+    catalog = DatasetCatalog(data_dir)
+    processor = AudioProcessor.from_config(feature_config, resample_quality=resample_quality)
+    for i, store in enumerate(stores):
+        entries = [entry for entry in catalog.entries() if assign_shard(entry['hash'], count) == i]
+        if not store.matches(entries, processor, feature_type):
+            print(f"⚠️  Warning: {store.path} does not match the current manifest and settings")
+    
+    return FeatureStore.merge(str(Path(store_dir) / store_name), stores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parçalı özellik çıkarımı ve birleştirme')
+    parser.add_argument('--shard', type=parse_shard, default=None, help='İşlenecek parça: i/N (ör. 0/4)')
+    parser.add_argument('--merge', action='store_true', help='Parçaları özellik deposunda birleştir')
+    parser.add_argument(
+        '--local-workers',
+        type=int,
+        default=None,
+        help='Tüm parçaları bu kadar yerel süreçle çıkar ve birleştir'
+    )
+    parser.add_argument(
+        '--num-shards',
+        type=int,
+        default=None,
+        help='Parça sayısı N (--merge ve --local-workers için; default: worker sayısı)'
+    )
+    parser.add_argument(
+        '--feature',
+        type=str,
+        default='mfcc',
+        choices=SUPPORTED_FEATURE_TYPES,
+        help='Özellik tipi (default: mfcc)'
+    )
+    parser.add_argument(
+        '--resample-quality',
+        type=str,
+        default='high',
+        help="Yeniden örnekleme kalitesi: 'high', 'medium', 'low', 'fast' veya herhangi bir librosa "
+             "res_type (default: high, bkz. benchmark_resampling.py)"
+    )
+    parser.add_argument(
+        '--sample-rate',
+        type=int,
+        default=AudioProcessor.SAMPLE_RATE,
+        help=f'Özellik çıkarımı örnekleme hızı (default: {AudioProcessor.SAMPLE_RATE})'
+    )
+    parser.add_argument(
+        '--n-mfcc',
+        type=int,
+        default=AudioProcessor.N_MFCC,
+        help=f'MFCC katsayı sayısı (default: {AudioProcessor.N_MFCC})'
+    )
+    parser.add_argument(
+        '--hop-length',
+        type=int,
+        default=AudioProcessor.HOP_LENGTH,
+        help=f'FFT hop uzunluğu (default: {AudioProcessor.HOP_LENGTH})'
+    )
+    parser.add_argument(
+        '--target-length-ms',
+        type=int,
+        default=AudioProcessor.TARGET_LENGTH_MS,
+        help=f'Sabit boyutlu özellikler için pencere uzunluğu, ms (default: {AudioProcessor.TARGET_LENGTH_MS})'
+    )
+    parser.add_argument('--data-dir', type=str, default='data/raw', help='Ses verisi dizini')
+    parser.add_argument(
+        '--shards-dir',
+        type=str,
+        default='data/features/shards',
+        help='Parça dosyalarının dizini (default: data/features/shards)'
+    )
+    parser.add_argument(
+        '--feature-store',
+        type=str,
+        default='data/features',
+        help='Birleştirilmiş özellik deposunun kök dizini (default: data/features)'
+    )
+    parser.add_argument(
+        '--sync-manifest',
+        action='store_true',
+        help='Önce data/raw dizinini manifest\'e ekle (parçalara bölmeden önce bir kez çalıştırın)'
+    )
+    args = parser.parse_args()
+    
+    if args.shard is None and not args.merge and args.local_workers is None:
+        parser.error('--shard, --merge veya --local-workers gerekli')
+    
+    if args.sync_manifest:
+        added = DatasetCatalog(args.data_dir).sync()
+        print(f"🗂️  Manifest updated: {added} new files")
+    
+    common = {
+        'feature_type': args.feature,
+        'resample_quality': args.resample_quality,
+        'data_dir': args.data_dir,
+        'shards_dir': args.shards_dir,
+        'feature_config': {
+            'sample_rate': args.sample_rate,
+            'n_mfcc': args.n_mfcc,
+            'hop_length': args.hop_length,
+            'target_length_ms': args.target_length_ms
+        }
+    }
+    
+    if args.shard is not None:
+        index, count = args.shard
+        print(f"📂 Extracting shard {index}/{count} ({args.feature})...")
+        summary = extract_shard(index, count, **common)
+        print(f"✅ {summary['rows']} rows ({summary['failed']} failed) in {summary['time_s']:.1f}s")
+        print(f"💾 {summary['path']} (sha256 {summary['sha256'][:16]}...)")
+    
+    count = args.num_shards or args.local_workers or (args.shard[1] if args.shard else None)
+    if args.local_workers is not None:
+        print(f"⚙️  Extracting {count} shards in {args.local_workers} local processes...")
+        with ProcessPoolExecutor(max_workers=args.local_workers) as executor:
+            futures = [executor.submit(extract_shard, i, count, **common) for i in range(count)]
+            for future in futures:
+                summary = future.result()
+                print(f"   ✅ {summary['shard']}: {summary['rows']} rows ({summary['failed']} failed), "
+                      f"{summary['time_s']:.1f}s")
+    
+    if args.merge or args.local_workers is not None:
+        if count is None:
+            parser.error('--merge için --num-shards gerekli')
+        print(f"\n🔗 Merging {count} shards...")
+        try:
+            store = merge_shards(count, store_dir=args.feature_store, **common)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        print(f"✅ Merged {store.n_rows} rows x {store.n_features} features into {store.path}")
+        options = ''.join(
+            f" --{option.replace('_', '-')} {value}" for option, value in common['feature_config'].items()
+            if value != normalize_feature_config()[option]
+        )
+        print(f"💡 Eğitim için: python train_model.py --feature {args.feature} --feature-store {args.feature_store}{options}")
+
+
+if __name__ == "__main__":
+    main()
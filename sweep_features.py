@@ -0,0 +1,260 @@
+"""
+Özellik ayarları taraması (sample rate, MFCC sayısı, hop uzunluğu, pencere uzunluğu).
+Her ses dosyası bir kez çözülür; her örnekleme hızı için bir kez yeniden örneklenir
+ve tüm ayar kombinasyonları bu sesi yeniden kullanır. Her kombinasyon için doğruluk,
+özellik çıkarım süresi, tahmin gecikmesi ve model boyutu ölçülür ve Pareto
+sınırı (hiçbir ölçütte daha kötü olmadan iyileştirilemeyen ayarlar) raporlanır.
+
+Seçilen ayarla eğitilen modelin metadata'sına feature_config kaydedilir; sunucu
+o modelin özelliklerini aynı ayarlarla çıkarır.
+"""
+import sys
+import json
+import time
+import pickle
+import argparse
+from itertools import product
+from pathlib import Path
+
+# Add backend directory to Python path
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Windows encoding fix
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import numpy as np
+from audio_decoder import decode_file  # type: ignore
+from audio_processor import AudioProcessor  # type: ignore
+from dataset_catalog import DatasetCatalog  # type: ignore
+from train_model import create_model, measure_inference_time, split_dataset  # type: ignore
+
+# Küçükten büyüğe daha iyi: doğruluk hariç tüm ölçütler
+OBJECTIVES = ('feature_ms_per_file', 'inference_ms_single', 'model_size_kb')
+
+
+def parse_int_list(value: str) -> list:
+    """Virgülle ayrılmış tamsayı listesi."""
+    try:
+        return [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz liste: {value} (ör. 256,512,1024)")
+
+
+def load_native_corpus(catalog: DatasetCatalog, processor: AudioProcessor, max_files: int = None):
+    """
+    Manifest'teki dosyaları orijinal örnekleme hızında (mono) bir kez çöz.
+    
+    Returns:
+        (audio, native_sr, speaker, split) dörtlülerinin listesi
+    """
+    corpus = []
+    for entry in catalog.entries()[:max_files]:
+        file_path = str(catalog.file_path(entry))
+        try:
+            decoded = decode_file(file_path)
+            if decoded is not None:
+                audio, native_sr = processor.features.to_mono(decoded[0]), decoded[1]
+            else:
+                # Sadece librosa'nın çözebildiği dosyalar: varsayılan hızda yükle
+                audio, native_sr = processor.load_audio(file_path), processor.sample_rate
+        except Exception as e:
+            print(f"     ⚠️  Failed to load {entry['path']}: {e}")
+            continue
+        corpus.append((audio, native_sr, entry['speaker'], entry['split']))
+    return corpus
+
+
+def resample_corpus(corpus, processor: AudioProcessor):
+    """
+    Korpusu processor.sample_rate hızına getir.
+    
+    Returns:
+        Yeniden örneklenmiş sesler ve dosya başına ortalama süre (ms)
+    """
+    start = time.perf_counter()
+    audios = [
+        processor.features.resample(audio, native_sr, processor.sample_rate, processor.res_type)
+        for audio, native_sr, _, _ in corpus
+    ]
+    return audios, (time.perf_counter() - start) * 1000 / len(corpus)
+
+
+def evaluate_config(audios, y, splits, processor: AudioProcessor, feature_type: str, model_type: str) -> dict:
+    """
+    Tek bir ayar için özellik çıkar, model eğit ve ölç.
+    
+    Returns:
+        Doğruluk, dosya başına özellik süresi, tahmin gecikmesi ve model boyutu
+    """
+    length_independent = processor.is_length_independent(feature_type)
+    start = time.perf_counter()
+    rows = []
+    for audio in audios:
+        if not length_independent:
+            audio = processor.preprocess_audio(audio)
+        rows.append(processor.extract_features(audio, feature_type=feature_type).flatten())
+    feature_ms = (time.perf_counter() - start) * 1000 / len(audios)
+    
+    X = np.array(rows)
+    X_train, X_test, y_train, y_test, _ = split_dataset(X, y, splits)
+    model = create_model(model_type)
+    model.fit(X_train, y_train)
+    
+    return {
+        **processor.feature_config(),
+        'n_features': X.shape[1],
+        'test_accuracy': float(model.score(X_test, y_test)),
+        'feature_ms_per_file': feature_ms,
+        **measure_inference_time(model, X_test),
+        'model_size_kb': len(pickle.dumps(model)) / 1024
+    }
+
+
+def pareto_frontier(results: list) -> list:
+    """
+    Başka bir sonuç tarafından domine edilmeyen sonuçların indeksleri.
+    
+    a, b'yi domine eder: doğruluğu en az b kadar yüksek, diğer ölçütlerde en az
+    b kadar düşük ve en az bir ölçütte kesin daha iyi.
+    """
+    def dominates(a, b):
+        no_worse = a['test_accuracy'] >= b['test_accuracy'] and all(a[k] <= b[k] for k in OBJECTIVES)
+        better = a['test_accuracy'] > b['test_accuracy'] or any(a[k] < b[k] for k in OBJECTIVES)
+        return no_worse and better
+    
+    return [
+        i for i, result in enumerate(results)
+        if not any(dominates(other, result) for j, other in enumerate(results) if j != i)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Özellik ayarları taraması (doğruluk / gecikme Pareto sınırı)')
+    parser.add_argument('--data-dir', type=str, default='data/raw', help='Ses verisi dizini')
+    parser.add_argument(
+        '--model',
+        type=str,
+        default='svm',
+        choices=['svm', 'random_forest', 'neural_network', 'adaboost', 'ncm', 'sgd'],
+        help='Taramada kullanılacak model tipi (default: svm)'
+    )
+    parser.add_argument(
+        '--feature',
+        type=str,
+        default='mfcc',
+        choices=['mfcc', 'mfcc_stats'],
+        help='Özellik tipi (default: mfcc)'
+    )
+    parser.add_argument(
+        '--sample-rates',
+        type=parse_int_list,
+        default=[AudioProcessor.SAMPLE_RATE],
+        help=f'Virgülle ayrılmış örnekleme hızları (default: {AudioProcessor.SAMPLE_RATE})'
+    )
+    parser.add_argument(
+        '--n-mfcc',
+        type=parse_int_list,
+        default=[13, 20],
+        help='Virgülle ayrılmış MFCC sayıları (default: 13,20)'
+    )
+    parser.add_argument(
+        '--hop-lengths',
+        type=parse_int_list,
+        default=[256, 512, 1024],
+        help='Virgülle ayrılmış hop uzunlukları (default: 256,512,1024)'
+    )
+    parser.add_argument(
+        '--target-lengths-ms',
+        type=parse_int_list,
+        default=[1000, 2000, 3000],
+        help='Virgülle ayrılmış pencere uzunlukları, ms (default: 1000,2000,3000; mfcc_stats için yok sayılır)'
+    )
+    parser.add_argument(
+        '--resample-quality',
+        type=str,
+        default='high',
+        help="Yeniden örnekleme kalitesi: 'high', 'medium', 'low', 'fast' veya herhangi bir librosa "
+             "res_type (default: high, bkz. benchmark_resampling.py)"
+    )
+    parser.add_argument('--max-files', type=int, default=None, help='Kullanılacak en fazla dosya sayısı')
+    parser.add_argument('--output', type=str, default=None, help='Sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args()
+    
+    data_dir = Path(args.data_dir)
+    if not data_dir.exists():
+        print(f"❌ Error: {data_dir} directory not found!")
+        sys.exit(1)
+    catalog = DatasetCatalog(str(data_dir))
+    if len(catalog) == 0:
+        catalog.sync()
+    
+    print("📂 Decoding corpus at native sample rate...")
+    base = AudioProcessor(resample_quality=args.resample_quality)
+    corpus = load_native_corpus(catalog, base, args.max_files)
+    if not corpus:
+        print("❌ Error: No valid audio files found!")
+        sys.exit(1)
+    y = np.array([speaker for _, _, speaker, _ in corpus])
+    splits = np.array([split for _, _, _, split in corpus])
+    print(f"   {len(corpus)} files, {len(np.unique(y))} speakers")
+    
+    target_lengths = args.target_lengths_ms
+    if AudioProcessor.is_length_independent(args.feature):
+        # Havuzlanmış özellikler tüm klibi kullanır, pencere uzunluğu etkisiz
+        target_lengths = [AudioProcessor.TARGET_LENGTH_MS]
+    
+    results = []
+    for sample_rate in args.sample_rates:
+        processor = AudioProcessor(sample_rate=sample_rate, resample_quality=args.resample_quality)
+        audios, resample_ms = resample_corpus(corpus, processor)
+        for n_mfcc, hop_length, target_length_ms in product(args.n_mfcc, args.hop_lengths, target_lengths):
+            processor = AudioProcessor(
+                sample_rate=sample_rate,
+                resample_quality=args.resample_quality,
+                n_mfcc=n_mfcc,
+                hop_length=hop_length,
+                target_length_ms=target_length_ms
+            )
+            print(f"⏱️  {sample_rate} Hz, {n_mfcc} MFCC, hop {hop_length}, {target_length_ms} ms...")
+            result = evaluate_config(audios, y, splits, processor, args.feature, args.model)
+            # Yeniden örnekleme her ayarda tekrar edilmez ama istek başına ödenir
+            result['feature_ms_per_file'] += resample_ms
+            results.append(result)
+    
+    frontier = set(pareto_frontier(results))
+    for i, result in enumerate(results):
+        result['pareto'] = i in frontier
+    
+    print(f"\n📊 Feature configuration sweep ({args.model}, {args.feature}; ★ = Pareto frontier):")
+    print(f"     {'rate':>6} {'mfcc':>5} {'hop':>5} {'len ms':>7} {'dims':>6} {'accuracy':>9} "
+          f"{'feat ms':>8} {'infer ms':>9} {'size KB':>8}")
+    for result in sorted(results, key=lambda r: (-r['test_accuracy'], r['feature_ms_per_file'])):
+        print(f"   {'★' if result['pareto'] else ' '} {result['sample_rate']:>6} {result['n_mfcc']:>5} "
+              f"{result['hop_length']:>5} {result['target_length_ms']:>7} {result['n_features']:>6} "
+              f"{result['test_accuracy']*100:>8.2f}% {result['feature_ms_per_file']:>8.2f} "
+              f"{result['inference_ms_single']:>9.3f} {result['model_size_kb']:>8.1f}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'model_type': args.model, 'feature_type': args.feature, 'results': results}, f, indent=2)
+        print(f"\n💾 Results written to: {args.output}")
+    
+    # En yüksek doğruluklu sınır noktalarından en ucuz özellik çıkarımı olanı
+    best_accuracy = max(result['test_accuracy'] for result in results)
+    chosen = min(
+        (result for result in results if result['pareto'] and result['test_accuracy'] == best_accuracy),
+        key=lambda r: r['feature_ms_per_file']
+    )
+    print("\n💡 Seçilen ayarla eğitmek için (ayar model metadata'sına kaydedilir):")
+    print(f"   python train_model.py --model {args.model} --feature {args.feature} "
+          f"--sample-rate {chosen['sample_rate']} --n-mfcc {chosen['n_mfcc']} "
+          f"--hop-length {chosen['hop_length']} --target-length-ms {chosen['target_length_ms']}")
+
+
+if __name__ == "__main__":
+    main()
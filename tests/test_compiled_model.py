@@ -0,0 +1,84 @@
+"""
+Parity of the compiled SVM and random forest predictors with sklearn.
+
+    python -m pytest tests/
+"""
+import sys
+from pathlib import Path
+
+# Add backend directory to Python path
+BACKEND_DIR = Path(__file__).resolve().parents[1] / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.svm import SVC
+
+from compiled_model import (  # type: ignore
+    SMALL_BATCH, check_parity, compile_model, file_version, load_compiled, save_compiled
+)
+
+N_FEATURES = 12
+
+
+def make_data(n_classes: int, string_labels: bool, n_per_class: int = 30, seed: int = 0):
+    """Noisy Gaussian clusters, one per class."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=2.0, size=(n_classes, N_FEATURES))
+    y = np.repeat(np.arange(n_classes), n_per_class)
+    X = centers[y] + rng.normal(size=(len(y), N_FEATURES))
+    if string_labels:
+        y = np.array([f"speaker_{label}" for label in y])
+    return X, y
+
+
+def assert_parity(model, compiled, X):
+    # Batches at and below SMALL_BATCH take the per-row coupling path, larger ones the batched one
+    for rows in (X[:1], X[:SMALL_BATCH], X[:SMALL_BATCH + 1], X):
+        parity = check_parity(model, compiled, rows)
+        assert parity['ok'], parity
+    np.testing.assert_array_equal(compiled.classes_, model.classes_)
+
+
+@pytest.mark.parametrize("n_classes", [2, 5])
+@pytest.mark.parametrize("string_labels", [False, True])
+@pytest.mark.parametrize("kernel", ["rbf", "linear", "poly"])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_svc_parity(n_classes, string_labels, kernel, dtype):
+    X, y = make_data(n_classes, string_labels)
+    model = SVC(kernel=kernel, probability=True, random_state=0).fit(X, y)
+    compiled = compile_model(model, dtype=dtype)
+    assert_parity(model, compiled, make_data(n_classes, string_labels, seed=1)[0])
+
+
+@pytest.mark.parametrize("n_classes", [2, 5])
+@pytest.mark.parametrize("string_labels", [False, True])
+@pytest.mark.parametrize("estimator", [RandomForestClassifier, ExtraTreesClassifier])
+def test_forest_parity(n_classes, string_labels, estimator):
+    X, y = make_data(n_classes, string_labels)
+    model = estimator(n_estimators=25, max_depth=None, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    assert_parity(model, compiled, make_data(n_classes, string_labels, seed=1)[0])
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: SVC(kernel="rbf", probability=True, random_state=0),
+    lambda: RandomForestClassifier(n_estimators=10, random_state=0),
+])
+def test_save_load_round_trip(tmp_path, make_model):
+    X, y = make_data(3, string_labels=True)
+    model = make_model().fit(X, y)
+    model_file = tmp_path / "model.pkl"
+    model_file.write_bytes(b"model")
+    path = tmp_path / "model.pkl.compiled"
+    save_compiled(compile_model(model), path, file_version(model_file))
+    
+    loaded, source_version = load_compiled(path)
+    assert source_version == file_version(model_file)
+    assert_parity(model, loaded, make_data(3, string_labels=True, seed=1)[0])
+
+
+def test_unsupported_model():
+    with pytest.raises(ValueError):
+        compile_model(object())
@@ -1,11 +1,16 @@
 """
 Konuşmacı tanıma modeli eğitim scripti.
 Farklı ML algoritmaları ile MFCC özellikleri üzerinde eğitim yapar.
-Desteklenen modeller: SVM, Random Forest, Neural Network, AdaBoost
+Desteklenen modeller: SVM, Random Forest, Neural Network, AdaBoost, NCM, SGD, TDNN (PyTorch),
+Hierarchical (konuşmacı kümeleri + küme başına SVM; çok sayıda konuşmacı için)
+--streaming ile özellikler diskten parça parça okunarak bellekten büyük veri setleri de eğitilebilir.
 """
 import sys
 import os
+import json
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Add backend directory to Python path
@@ -25,22 +30,55 @@ import pickle
 from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier
 from sklearn.neural_network import MLPClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline, make_pipeline
 from sklearn.model_selection import (
     train_test_split, 
     StratifiedKFold, 
     cross_val_score,
     GridSearchCV,
-    RandomizedSearchCV
+    ParameterGrid,
+    ParameterSampler
 )
 from sklearn.metrics import classification_report, confusion_matrix, precision_score, recall_score, f1_score
-from audio_processor import AudioProcessor  # type: ignore
+from audio_processor import AudioProcessor, normalize_feature_config  # type: ignore
+from compiled_model import (  # type: ignore
+    CompiledSVC, check_parity, compile_model, compiled_path, file_version, load_compiled, save_compiled
+)
+from dataset_catalog import DatasetCatalog  # type: ignore
+from feature_store import FeatureStore  # type: ignore
+from hierarchical_model import HierarchicalSpeakerClassifier  # type: ignore
+from online_model import NearestClassMeanClassifier  # type: ignore
+from search_history import SearchHistory, dataset_fingerprint, params_key  # type: ignore
+
+# mfcc: 3 saniyelik klibin kare kare düzleştirilmiş MFCC'leri (1222 boyut)
+# mfcc_stats: MFCC + delta istatistikleri (78 boyut, klip uzunluğundan bağımsız)
+SUPPORTED_FEATURE_TYPES = ['mfcc', 'mfcc_stats']
+
+# TorchScript (.pt) olarak kaydedilen modeller; kare dizisi gerektirdiği için sadece 'mfcc' ile
+TORCH_MODEL_TYPES = ['tdnn']
+
+# partial_fit destekleyen modeller (--streaming ile diskten parça parça eğitilebilir)
+STREAMING_MODEL_TYPES = ['sgd', 'ncm', 'neural_network']
+
+# Mevcut modeli güncelleyebilen modeller (sadece konuşmacıları değişen kümeler yeniden eğitilir)
+INCREMENTAL_MODEL_TYPES = ['hierarchical']
+
+# Tuning adaylarının kalıcı geçmişi (bkz. backend/search_history.py)
+DEFAULT_SEARCH_HISTORY = 'models/search_history.sqlite'
+
+# Derlenmiş tahminci güncellenirken parity check yapılan en fazla örnek (compile_models.py --samples)
+PARITY_SAMPLES = 256
 
 def create_model(model_type: str, random_state: int = 42):
     """
     Model oluştur.
     
     Args:
-        model_type: Model tipi ('svm', 'random_forest', 'neural_network', 'adaboost')
+        model_type: Model tipi ('svm', 'random_forest', 'neural_network', 'adaboost', 'ncm', 'sgd', 'tdnn',
+            'hierarchical')
         random_state: Rastgelelik durumu
         
     Returns:
@@ -75,20 +113,55 @@ def create_model(model_type: str, random_state: int = 42):
             learning_rate=1.0,
             random_state=random_state
         )
+    elif model_type == 'ncm':
+        # partial_fit ile yeni konuşmacı eklenebilir (tam yeniden eğitim gerekmez)
+        return NearestClassMeanClassifier(temperature=0.1)
+    elif model_type == 'sgd':
+        # Lojistik regresyon (SGD); akış modunda partial_fit ile parça parça eğitilir
+        return make_pipeline(
+            StandardScaler(),
+            SGDClassifier(loss='log_loss', alpha=0.0001, random_state=random_state)
+        )
+    elif model_type == 'tdnn':
+        # PyTorch TDNN; eğitim sonrası int8 quantize edilip TorchScript'e çevrilir
+        from torch_model import TDNNClassifier  # type: ignore
+        return TDNNClassifier(n_features=AudioProcessor.N_MFCC, random_state=random_state)
+    elif model_type == 'hierarchical':
+        # NCM yönlendirici + en fazla 16 konuşmacılık kümeler başına SVM (OvO maliyeti küme boyutuyla sınırlı)
+        return HierarchicalSpeakerClassifier(
+            leaf_estimator=SVC(kernel='rbf', probability=True, random_state=random_state),
+            max_cluster_size=16,
+            n_routes=2,
+            n_jobs=-1,
+            random_state=random_state
+        )
     else:
         raise ValueError(f"Bilinmeyen model tipi: {model_type}")
 
 
 def get_model_filename(model_type: str, feature_type: str = 'mfcc') -> str:
-    """Model dosya adını döndür (sadece MFCC kullanılıyor)."""
+    """
+    Model dosya adını döndür (MFCC için sonek yok, diğer özellikler için sonek eklenir).
+    PyTorch modelleri TorchScript olarak .pt uzantısıyla kaydedilir.
+    """
     base_names = {
         'svm': 'svm',
         'random_forest': 'random_forest',
         'neural_network': 'neural_network',
-        'adaboost': 'adaboost'
+        'adaboost': 'adaboost',
+        'ncm': 'ncm',
+        'sgd': 'sgd',
+        'tdnn': 'tdnn',
+        'hierarchical': 'hierarchical'
     }
     base_name = base_names.get(model_type, 'model')
-    return f'{base_name}_speaker_model.pkl'
+    if model_type.endswith('_student'):
+        # Damıtılmış öğrenci modeller: {öğretmen}_student_speaker_model.pkl
+        base_name = model_type
+    extension = '.pt' if model_type in TORCH_MODEL_TYPES else '.pkl'
+    if feature_type != 'mfcc':
+        return f'{base_name}_speaker_model_{feature_type}{extension}'
+    return f'{base_name}_speaker_model{extension}'
 
 
 def get_hyperparameter_grid(model_type: str):
@@ -126,6 +199,25 @@ def get_hyperparameter_grid(model_type: str):
             'n_estimators': [25, 50, 100],
             'learning_rate': [0.5, 1.0, 1.5, 2.0]
         }
+    elif model_type == 'ncm':
+        return {
+            'temperature': [0.03, 0.1, 0.3, 1.0]
+        }
+    elif model_type == 'sgd':
+        return {
+            'sgdclassifier__alpha': [0.00001, 0.0001, 0.001, 0.01]
+        }
+    elif model_type == 'tdnn':
+        return {
+            'channels': [32, 64],
+            'learning_rate': [0.0003, 0.001, 0.003]
+        }
+    elif model_type == 'hierarchical':
+        return {
+            'max_cluster_size': [8, 16, 32],
+            'n_routes': [1, 2, 3],
+            'leaf_estimator__C': [1, 10, 100]
+        }
     else:
         return {}
 
@@ -154,70 +246,92 @@ def perform_cross_validation(model, X, y, cv_folds: int = 5):
     }
 
 
-def train_speaker_model(
-    model_type: str = 'svm', 
-    feature_type: str = 'mfcc',
-    use_cv: bool = False,
-    cv_folds: int = 5,
-    use_tuning: bool = False,
-    tuning_method: str = 'grid',
-    n_iter: int = 20
-):
+MODEL_NAMES = {
+    'svm': 'SVM (Support Vector Machine)',
+    'random_forest': 'Random Forest',
+    'neural_network': 'Neural Network (MLP)',
+    'adaboost': 'AdaBoost',
+    'ncm': 'Nearest Class Mean (online, partial_fit)',
+    'sgd': 'SGD Logistic Regression (partial_fit)',
+    'tdnn': 'TDNN (PyTorch, int8 TorchScript)',
+    'hierarchical': 'Hierarchical (speaker clusters + per-cluster SVM)'
+}
+
+FEATURE_NAMES = {
+    'mfcc': 'MFCC (Mel-Frequency Cepstral Coefficients)',
+    'mfcc_stats': 'MFCC Statistics (mean/std + delta, uzunluktan bağımsız)',
+    'mel': 'Mel-Spectrogram'
+}
+
+
+def parse_model_types(model_arg) -> list:
     """
-    Ana eğitim fonksiyonu.
+    --model argümanını model tipi listesine çevir.
     
     Args:
-        model_type: Model tipi ('svm', 'random_forest', 'neural_network', 'adaboost')
-        feature_type: Özellik tipi ('mfcc' - Mel desteği kaldırıldı)
-        use_cv: Cross-validation kullan (default: False)
-        cv_folds: Cross-validation fold sayısı (default: 5)
-        use_tuning: Hyperparameter tuning kullan (default: False)
-        tuning_method: Tuning yöntemi ('grid' veya 'random', default: 'grid')
-        n_iter: RandomizedSearchCV için iterasyon sayısı (default: 20)
-    """
-    model_names = {
-        'svm': 'SVM (Support Vector Machine)',
-        'random_forest': 'Random Forest',
-        'neural_network': 'Neural Network (MLP)',
-        'adaboost': 'AdaBoost'
-    }
+        model_arg: 'svm', 'all' veya virgülle ayrılmış liste ('svm,random_forest')
     
-    feature_names = {
-        'mfcc': 'MFCC (Mel-Frequency Cepstral Coefficients)',
-        'mel': 'Mel-Spectrogram'
-    }
+    Returns:
+        Model tipleri listesi
+    """
+    if isinstance(model_arg, (list, tuple)):
+        model_types = list(model_arg)
+    elif model_arg == 'all':
+        model_types = list(MODEL_NAMES.keys())
+    else:
+        model_types = [m.strip() for m in model_arg.split(',') if m.strip()]
     
-    # Validate feature type (only MFCC supported)
-    if feature_type not in ['mfcc']:
-        print(f"⚠️  Warning: feature_type '{feature_type}' not supported. Using 'mfcc' instead.")
-        feature_type = 'mfcc'
+    unknown = [m for m in model_types if m not in MODEL_NAMES]
+    if unknown or not model_types:
+        raise ValueError(
+            f"Bilinmeyen model tipi: {', '.join(unknown)} "
+            f"(geçerli: {', '.join(MODEL_NAMES)}, all)"
+        )
+    return model_types
+
+
+def feature_store_name(feature_type: str, feature_config: dict) -> str:
+    """
+    Özellik deposunun alt dizini: varsayılan ayarlarda özellik tipi, diğer
+    ayarlarda sonuna ayar etiketi eklenir (ayar denemeleri varsayılan depoyu ezmez).
+    """
+    if feature_config == normalize_feature_config():
+        return feature_type
+    return (f"{feature_type}_sr{feature_config['sample_rate']}_n{feature_config['n_mfcc']}"
+            f"_hop{feature_config['hop_length']}_len{feature_config['target_length_ms']}")
+
+
+def prepare_feature_store(
+    data_dir: Path,
+    feature_type: str = 'mfcc',
+    resample_quality: str = 'high',
+    sync_manifest: bool = False,
+    store_dir: Path = Path('data/features'),
+    feature_config: dict = None
+):
+    """
+    Manifest'teki tüm ses dosyalarının özelliklerini diskteki özellik deposuna yaz.
     
-    print("🎤 Speaker Identification Model Training")
-    print("=" * 50)
-    print(f"📦 Model Tipi: {model_names.get(model_type, model_type)}")
-    print(f"🎵 Özellik Tipi: {feature_names.get(feature_type, feature_type)}")
-    if use_cv:
-        print(f"🔄 Cross-Validation: ✅ ({cv_folds} folds)")
-    else:
-        print(f"🔄 Cross-Validation: ❌")
-    if use_tuning:
-        print(f"🎯 Hyperparameter Tuning: ✅ ({tuning_method})")
-    else:
-        print(f"🎯 Hyperparameter Tuning: ❌")
-    print("=" * 50)
+    Depo manifest ve özellik ayarları değişmediyse yeniden kullanılır; değiştiyse
+    sadece yeni dosyaların özellikleri çıkarılır. Bellekte aynı anda tek bir
+    dosyanın özellikleri tutulur.
     
-    # Yollar
-    data_dir = Path("data/raw")
-    models_dir = Path("models")
-    models_dir.mkdir(exist_ok=True)
+    Args:
+        data_dir: Ses verisi dizini (data/raw)
+        feature_type: Özellik tipi
+        resample_quality: Yeniden örnekleme kalitesi
+        sync_manifest: Manifest'te olmayan dosyaları önce kataloğa ekle
+        store_dir: Özellik depolarının kök dizini (özellik tipi başına bir alt dizin)
+        feature_config: AudioProcessor özellik ayarları (None: varsayılanlar)
     
+    Returns:
+        FeatureStore veya hata durumunda None
+    """
     # Audio processor
-    processor = AudioProcessor()
+    processor = AudioProcessor.from_config(feature_config, resample_quality=resample_quality)
     
-    # Veri yükleme
-    print("\n📂 Loading audio files...")
-    features_list = []
-    labels_list = []
+    # Veri yükleme (manifest üzerinden, her çalıştırmada dizin taranmaz)
+    print("\n📂 Loading audio files from manifest...")
     
     if not data_dir.exists():
         print(f"❌ Error: {data_dir} directory not found!")
@@ -228,82 +342,208 @@ def train_speaker_model(
         print("    utt_0002.wav")
         print("  speaker_02/")
         print("    utt_0001.wav")
-        return
+        return None
+    
+    # İlk çalıştırmada (veya istenirse) mevcut dosyaları manifest'e ekle
+    catalog = DatasetCatalog(str(data_dir))
+    if sync_manifest or len(catalog) == 0:
+        added = catalog.sync()
+        print(f"🗂️  Manifest updated: {added} new files ({catalog.manifest_path})")
     
-    # Find all directories (not just speaker_* prefix)
-    speaker_folders = sorted([d for d in data_dir.iterdir() if d.is_dir()])
+    entries = catalog.entries()
+    speakers = sorted({entry['speaker'] for entry in entries})
     
-    if len(speaker_folders) == 0:
-        print(f"❌ Error: No speaker folders found in {data_dir}")
+    if len(speakers) == 0:
+        print(f"❌ Error: No speaker files found in {catalog.manifest_path}")
         print("Expected folders like: speaker_01, speaker_02, etc.")
-        return
+        return None
     
-    print(f"Found {len(speaker_folders)} speakers:")
+    print(f"Found {len(speakers)} speakers:")
+    for speaker_name in speakers:
+        speaker_files = sum(1 for entry in entries if entry['speaker'] == speaker_name)
+        print(f"  ✅ {speaker_name}: {speaker_files} files")
     
-    for speaker_folder in speaker_folders:
-        speaker_name = speaker_folder.name
-        # Support multiple audio formats
-        audio_files = (list(speaker_folder.glob('*.wav')) + 
-                      list(speaker_folder.glob('*.mp3')) +
-                      list(speaker_folder.glob('*.m4a')) +
-                      list(speaker_folder.glob('*.webm')) +
-                      list(speaker_folder.glob('*.ogg')))
-        
-        if len(audio_files) == 0:
-            print(f"  ⚠️  {speaker_name}: No audio files found")
-            continue
-        
-        print(f"  ✅ {speaker_name}: {len(audio_files)} files")
+    store = FeatureStore(str(store_dir / feature_store_name(feature_type, processor.feature_config())))
+    if store.matches(entries, processor, feature_type):
+        print(f"♻️  Using cached features: {store.path} ({store.n_rows} rows)")
+    else:
+        # Yükle, ön işle (mfcc için 3 saniyeye normalize et), özellikleri çıkar ve diske yaz
+        def report_error(entry, error):
+            print(f"     ⚠️  Failed to process {entry['path']}: {error}")
         
-        # Her ses dosyasını işle
-        for audio_file in audio_files:
-            try:
-                # Yükle ve ön işle
-                audio = processor.load_audio(str(audio_file))
-                audio = processor.preprocess_audio(audio)  # 3 saniyeye normalize et
-                
-                # Özellikleri çıkar (sadece MFCC kullanılıyor)
-                features = processor.extract_mfcc(audio)
-                
-                # Düzleştir (ML modelleri için)
-                features_flat = features.flatten()
-                
-                features_list.append(features_flat)
-                labels_list.append(speaker_name)
-                
-            except Exception as e:
-                print(f"     ⚠️  Failed to process {audio_file.name}: {e}")
-                continue
-    
-    if len(features_list) == 0:
+        store = FeatureStore.build(
+            str(store.path), catalog, entries, processor, feature_type, on_error=report_error
+        )
+        print(f"💾 Features written to: {store.path} "
+              f"({store.n_rows} rows, {store.meta['reused_rows']} reused from cache)")
+    
+    if store.n_rows == 0:
         print("\n❌ Error: No valid audio files found!")
-        return
+        return None
+    return store
+
+
+def load_dataset(
+    data_dir: Path,
+    feature_type: str = 'mfcc',
+    resample_quality: str = 'high',
+    sync_manifest: bool = False,
+    store_dir: Path = Path('data/features'),
+    feature_config: dict = None
+):
+    """
+    Manifest'teki tüm ses dosyalarından özellik matrisini oluştur.
     
-    # NumPy dizilerine çevir
-    X = np.array(features_list)
-    y = np.array(labels_list)
+    Özellikler önce diskteki depoya yazılır ve matris oradan tek seferde okunur
+    (Python listesi + np.array kopyası yapılmaz).
     
-    print(f"\n📊 Dataset Statistics:")
-    print(f"   Total samples: {len(X)}")
-    print(f"   Features per sample: {X.shape[1]}")
-    print(f"   Unique speakers: {len(np.unique(y))}")
+    Args:
+        data_dir: Ses verisi dizini (data/raw)
+        feature_type: Özellik tipi
+        resample_quality: Yeniden örnekleme kalitesi
+        sync_manifest: Manifest'te olmayan dosyaları önce kataloğa ekle
+        store_dir: Özellik depolarının kök dizini
+        feature_config: AudioProcessor özellik ayarları (None: varsayılanlar)
     
-    # Check if we have at least 2 speakers
-    if len(np.unique(y)) < 2:
-        print("\n❌ Error: Need at least 2 different speakers!")
-        print("Please add audio files for another speaker before training.")
-        print("Model training requires multiple classes.")
-        return
+    Returns:
+        (X, y, splits) veya hata durumunda None
+    """
+    store = prepare_feature_store(data_dir, feature_type, resample_quality, sync_manifest, store_dir, feature_config)
+    if store is None:
+        return None
+    return np.array(store.features()), store.speakers, store.splits
+
+
+def split_dataset(X, y, splits):
+    """
+    Manifest'teki sabit split'i uygula; yetersizse stratified split kullan.
+    
+    Returns:
+        X_train, X_test, y_train, y_test, split_source
+    """
+    train_mask = splits == 'train'
+    if train_mask.all() or not train_mask.any() or len(np.unique(y[train_mask])) < 2:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        return X_train, X_test, y_train, y_test, 'random'
+    return X[train_mask], X[~train_mask], y[train_mask], y[~train_mask], 'manifest'
+
+
+def search_hyperparameters(
+    model_type: str,
+    X_train,
+    y_train,
+    param_grid: dict,
+    cv,
+    tuning_method: str = 'grid',
+    n_iter: int = 20,
+    feature_type: str = 'mfcc',
+    history: SearchHistory = None,
+    warm_start: int = 3
+):
+    """
+    Arama geçmişini kullanan hyperparameter araması.
+    
+    Aynı veri ve CV ayarıyla daha önce değerlendirilmiş adaylar yeniden
+    eğitilmez, skorları geçmişten alınır. Random aramada önceki çalışmaların
+    (ör. veri seti büyümeden önce) en iyi warm_start adayı önce denenir,
+    kalan bütçe ParameterSampler ile daha önce denenmemiş adaylarla doldurulur.
+    
+    Returns:
+        En iyi parametrelerle eğitilmiş model, en iyi parametreler ve CV skoru
+    """
+    cv_splits = cv.get_n_splits()
+    fingerprint = dataset_fingerprint(X_train, y_train)
+    done = history.evaluated(model_type, feature_type, fingerprint, cv_splits) if history else {}
+    
+    seeds = []
+    if tuning_method == 'grid':
+        candidates = list(ParameterGrid(param_grid))
+    else:  # random
+        if history and warm_start > 0:
+            seeds = [
+                c['params'] for c in history.top_candidates(
+                    model_type, feature_type, limit=warm_start, exclude_fingerprint=fingerprint
+                )
+                if all(name in param_grid for name in c['params'])
+            ]
+        # Grid'in rastgele bir permütasyonu; ilk n_iter farklı aday kullanılır
+        sampled = ParameterSampler(param_grid, n_iter=len(ParameterGrid(param_grid)), random_state=42)
+        candidates, seen = [], set()
+        for params in seeds + list(sampled):
+            key = params_key(params)
+            if key not in seen and len(candidates) < n_iter:
+                seen.add(key)
+                candidates.append(params)
+    
+    keys = [params_key(params) for params in candidates]
+    todo = [params for params, key in zip(candidates, keys) if key not in done]
+    print(f"   {len(candidates)} candidates: {len(candidates) - len(todo)} from search history, "
+          f"{len(todo)} to evaluate" + (f" ({len(seeds)} seeded from earlier runs)" if seeds else ""))
+    
+    scores = {key: done[key]['mean_score'] for key in keys if key in done}
+    if todo:
+        # Her aday tek noktalı bir grid; refit en iyi aday seçildikten sonra yapılır
+        search = GridSearchCV(
+            create_model(model_type),
+            [{name: [value] for name, value in params.items()} for params in todo],
+            cv=cv,
+            scoring='accuracy',
+            n_jobs=-1,
+            verbose=1,
+            refit=False
+        )
+        search.fit(X_train, y_train)
+        results = search.cv_results_
+        for i, params in enumerate(todo):
+            fold_scores = [results[f'split{j}_test_score'][i] for j in range(cv_splits)]
+            mean_score = float(results['mean_test_score'][i])
+            scores[params_key(params)] = None if np.isnan(mean_score) else mean_score
+            if history:
+                history.record(
+                    model_type, feature_type, fingerprint, len(y_train), cv_splits, params,
+                    fold_scores, results['mean_fit_time'][i] * cv_splits
+                )
     
-    # Veriyi böl
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    # Başarısız adaylar (NaN skor) en kötü sayılır; eşitlikte ilk aday kazanır
+    best_index = max(
+        range(len(candidates)),
+        key=lambda i: (scores[keys[i]] is not None, scores[keys[i]] or 0.0, -i)
     )
+    best_params = candidates[best_index]
+    best_score = scores[keys[best_index]]
+    if best_score is None:
+        raise ValueError(f"All {len(candidates)} hyperparameter candidates failed for {model_type}")
+    model = create_model(model_type).set_params(**best_params)
+    model.fit(X_train, y_train)
+    return model, best_params, best_score
+
+
+def fit_model(
+    model_type: str,
+    X_train,
+    y_train,
+    use_cv: bool = False,
+    cv_folds: int = 5,
+    use_tuning: bool = False,
+    tuning_method: str = 'grid',
+    n_iter: int = 20,
+    feature_type: str = 'mfcc',
+    search_history: str = DEFAULT_SEARCH_HISTORY,
+    warm_start: int = 3,
+    previous_model=None
+):
+    """
+    Cross-validation, hyperparameter tuning (istenirse) ve eğitim.
     
-    print(f"\n🔬 Train/Test Split:")
-    print(f"   Training samples: {len(X_train)}")
-    print(f"   Test samples: {len(X_test)}")
+    Tuning'de değerlendirilen her aday search_history veritabanına kaydedilir
+    (None: kayıt yok); bkz. search_hyperparameters. previous_model (mevcut
+    hiyerarşik model) verilirse sadece konuşmacıları değişen kümeler yeniden eğitilir.
     
+    Returns:
+        Eğitilmiş model, CV sonuçları, en iyi parametreler ve eğitim süresi (s)
+    """
     # Cross-validation (eğer istenirse)
     cv_results = None
     if use_cv:
@@ -314,6 +554,8 @@ def train_speaker_model(
         print(f"   CV Std: {cv_results['cv_std']:.4f} ({cv_results['cv_std']*100:.2f}%)")
         print(f"   CV Scores: {[f'{s:.4f}' for s in cv_results['cv_scores']]}")
     
+    start_time = time.perf_counter()
+    
     # Hyperparameter tuning (eğer istenirse)
     best_params = None
     if use_tuning:
@@ -324,124 +566,706 @@ def train_speaker_model(
             print(f"   ⚠️  No hyperparameter grid defined for {model_type}, skipping tuning")
             use_tuning = False
         else:
-            base_model = create_model(model_type)
             cv = StratifiedKFold(n_splits=min(5, cv_folds), shuffle=True, random_state=42)
-            
-            if tuning_method == 'grid':
-                search = GridSearchCV(
-                    base_model, 
-                    param_grid, 
-                    cv=cv, 
-                    scoring='accuracy',
-                    n_jobs=-1,
-                    verbose=1
-                )
-            else:  # random
-                search = RandomizedSearchCV(
-                    base_model,
-                    param_grid,
-                    cv=cv,
-                    scoring='accuracy',
-                    n_iter=n_iter,
-                    n_jobs=-1,
-                    random_state=42,
-                    verbose=1
+            history = SearchHistory(search_history) if search_history else None
+            try:
+                model, best_params, best_score = search_hyperparameters(
+                    model_type, X_train, y_train, param_grid, cv, tuning_method, n_iter,
+                    feature_type, history, warm_start
                 )
-            
-            print(f"   Searching through {len(param_grid)} parameter combinations...")
-            search.fit(X_train, y_train)
-            best_params = search.best_params_
-            model = search.best_estimator_
+            finally:
+                if history is not None:
+                    history.close()
             
             print(f"   ✅ Best parameters found:")
             for param, value in best_params.items():
                 print(f"      {param}: {value}")
-            print(f"   Best CV Score: {search.best_score_:.4f} ({search.best_score_*100:.2f}%)")
+            print(f"   Best CV Score: {best_score:.4f} ({best_score*100:.2f}%)")
     
     # Model oluştur ve eğit (tuning yapılmadıysa)
-    if not use_tuning:
-        print(f"\n🤖 Training {model_names.get(model_type, model_type)} model...")
+    if not use_tuning and previous_model is not None:
+        print(f"\n🌳 Updating {MODEL_NAMES.get(model_type, model_type)} model (changed clusters only)...")
+        model = previous_model.update(X_train, y_train)
+        update = model.last_update_
+        print(f"   Retrained clusters: {update['retrained_clusters']} / {update['n_clusters']}")
+        print(f"   New speakers: {len(update['new_speakers'])}, changed: {len(update['changed_speakers'])}, "
+              f"removed: {len(update['removed_speakers'])}")
+    elif not use_tuning:
+        print(f"\n🤖 Training {MODEL_NAMES.get(model_type, model_type)} model...")
         model = create_model(model_type)
         model.fit(X_train, y_train)
     
+    fit_time = time.perf_counter() - start_time
+    return model, cv_results, best_params, fit_time
+
+
+def measure_inference_time(model, X, repeats: int = 20) -> dict:
+    """
+    Tahmin süresini ölç (toplu ve tek örnek).
+    
+    Returns:
+        Örnek başına toplu tahmin süresi ve tek örnek gecikmesi (ms)
+    """
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(X)
+    
+    single_times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X[i % len(X):i % len(X) + 1])
+        single_times.append((time.perf_counter() - start) * 1000)
+    
+    return {
+        'inference_ms_per_sample_batched': float(batch_ms),
+        'inference_ms_single': float(np.median(single_times))
+    }
+
+
+def evaluate_model(model, X_train, y_train, X_test, y_test) -> dict:
+    """
+    Modeli test kümesinde değerlendir.
+    
+    Returns:
+        Metadata'ya yazılacak metrikler (doğruluk, precision/recall/F1, confusion matrix, süreler)
+    """
     # Değerlendirme
     train_score = model.score(X_train, y_train)
     test_score = model.score(X_test, y_test)
     
-    print(f"\n📈 Model Performance:")
-    print(f"   Train Accuracy: {train_score:.4f} ({train_score*100:.2f}%)")
-    print(f"   Test Accuracy: {test_score:.4f} ({test_score*100:.2f}%)")
-    
     # Test tahminleri
     y_pred = model.predict(X_test)
     
-    # Detaylı metrikler hesapla
-    
-    # Macro average (tüm sınıflar için ortalama)
-    precision_macro = precision_score(y_test, y_pred, average='macro', zero_division=0)
-    recall_macro = recall_score(y_test, y_pred, average='macro', zero_division=0)
-    f1_macro = f1_score(y_test, y_pred, average='macro', zero_division=0)
-    
-    # Weighted average (sınıf büyüklüğüne göre ağırlıklı)
-    precision_weighted = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall_weighted = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1_weighted = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-    
-    # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
+    metrics = {
+        'test_accuracy': float(test_score),
+        'train_accuracy': float(train_score),
+        **classification_metrics(y_test, y_pred)
+    }
+    metrics.update(measure_inference_time(model, X_test))
+    return metrics
+
+
+def classification_metrics(y_test, y_pred) -> dict:
+    """Precision/recall/F1, confusion matrix ve sınıflandırma raporu."""
+    return {
+        # Macro average (tüm sınıflar için ortalama)
+        'precision_macro': float(precision_score(y_test, y_pred, average='macro', zero_division=0)),
+        'recall_macro': float(recall_score(y_test, y_pred, average='macro', zero_division=0)),
+        'f1_macro': float(f1_score(y_test, y_pred, average='macro', zero_division=0)),
+        # Weighted average (sınıf büyüklüğüne göre ağırlıklı)
+        'precision_weighted': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
+        'recall_weighted': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
+        'f1_weighted': float(f1_score(y_test, y_pred, average='weighted', zero_division=0)),
+        # Confusion matrix (JSON serializable yapmak için liste)
+        'confusion_matrix': confusion_matrix(y_test, y_pred).tolist(),
+        'classification_report': classification_report(y_test, y_pred, zero_division=0)
+    }
+
+
+def print_evaluation(metrics: dict):
+    """Değerlendirme sonuçlarını yazdır."""
+    print(f"\n📈 Model Performance:")
+    print(f"   Train Accuracy: {metrics['train_accuracy']:.4f} ({metrics['train_accuracy']*100:.2f}%)")
+    print(f"   Test Accuracy: {metrics['test_accuracy']:.4f} ({metrics['test_accuracy']*100:.2f}%)")
     
     print(f"\n📋 Classification Report:")
-    print(classification_report(y_test, y_pred))
+    print(metrics['classification_report'])
     
     print(f"\n🎯 Confusion Matrix:")
-    print(cm)
+    print(np.array(metrics['confusion_matrix']))
     
     print(f"\n📊 Detailed Metrics:")
-    print(f"   Precision (Macro): {precision_macro:.4f}")
-    print(f"   Recall (Macro): {recall_macro:.4f}")
-    print(f"   F1-Score (Macro): {f1_macro:.4f}")
+    print(f"   Precision (Macro): {metrics['precision_macro']:.4f}")
+    print(f"   Recall (Macro): {metrics['recall_macro']:.4f}")
+    print(f"   F1-Score (Macro): {metrics['f1_macro']:.4f}")
+
+
+def save_model(model, metadata: dict, models_dir: Path, parity_X=None) -> str:
+    """
+    Modeli ve metadata'sını kaydet.
+    
+    Args:
+        model: Eğitilmiş model
+        metadata: Model metadata'sı
+        models_dir: Model dizini
+        parity_X: Derlenmiş tahminci için parity check girişleri (None: rastgele girişler)
     
-    # Modeli kaydet
-    model_filename = get_model_filename(model_type, feature_type)
+    Returns:
+        Model dosya adı
+    """
+    model_filename = get_model_filename(metadata['model_type'], metadata['feature_type'])
     model_path = models_dir / model_filename
-    with open(model_path, 'wb') as f:
-        pickle.dump(model, f)
+    if metadata['model_type'] in TORCH_MODEL_TYPES:
+        model.export(str(model_path))
+    else:
+        with open(model_path, 'wb') as f:
+            pickle.dump(model, f)
     print(f"\n💾 Model saved to: {model_path}")
     
-    # Model metadata kaydet (detaylı metrikler ile)
-    metadata = {
-        'model_type': model_type,
-        'feature_type': feature_type,
-        'feature_shape': X.shape[1],
-        'num_speakers': len(np.unique(y)),
-        'test_accuracy': float(test_score),
-        'train_accuracy': float(train_score),
-        'precision_macro': float(precision_macro),
-        'recall_macro': float(recall_macro),
-        'f1_macro': float(f1_macro),
-        'precision_weighted': float(precision_weighted),
-        'recall_weighted': float(recall_weighted),
-        'f1_weighted': float(f1_weighted),
-        'confusion_matrix': cm.tolist(),  # JSON serializable yapmak için
-        'speakers': sorted(np.unique(y).tolist())  # Konuşmacı listesi
-    }
-    
-    # Cross-validation sonuçlarını ekle
-    if cv_results:
-        metadata['cross_validation'] = cv_results
-    
-    # Hyperparameter tuning sonuçlarını ekle
-    if best_params:
-        metadata['best_hyperparameters'] = best_params
-        metadata['hyperparameter_tuning_method'] = tuning_method
     metadata_path = models_dir / f'{model_filename}.meta'
+    if metadata_path.exists():
+        # Sunucuda yapılandırılan cascade ayarı yeniden eğitimde korunur
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            cascade = json.load(f).get('cascade')
+        if cascade:
+            metadata['cascade'] = cascade
     with open(metadata_path, 'w', encoding='utf-8') as f:
-        import json
         json.dump(metadata, f, indent=2)
     print(f"📋 Model metadata saved to: {metadata_path}")
     
+    # Derlenmiş tahminci varsa yeni modelden yeniden derle (eskisi sunucuda kullanılmaz);
+    # compile_models.py'deki gibi sadece parity check geçerse yazılır
+    compiled_file = compiled_path(model_path)
+    if compiled_file.exists():
+        previous, _ = load_compiled(compiled_file)
+        dtype = previous.support_vectors.dtype if isinstance(previous, CompiledSVC) else np.float32
+        try:
+            compiled = compile_model(model, dtype=dtype)
+            if parity_X is None:
+                parity_X = np.random.default_rng(42).normal(size=(PARITY_SAMPLES, model.n_features_in_))
+            step = max(1, len(parity_X) // PARITY_SAMPLES)
+            parity = check_parity(model, compiled, np.asarray(parity_X)[::step][:PARITY_SAMPLES])
+            if not parity['ok']:
+                raise ValueError(
+                    f"parity check failed (max |Δp| {parity['max_diff']:.2e}, "
+                    f"same predictions {parity['same_labels'] * 100:.1f}%)"
+                )
+            save_compiled(compiled, compiled_file, file_version(model_path))
+            print(f"⚡ Compiled predictor updated: {compiled_file} (max |Δp| {parity['max_diff']:.2e})")
+        except ValueError as e:
+            compiled_file.unlink()
+            print(f"⚠️  Warning: {e}, removed {compiled_file}")
+    return model_filename
+
+
+def load_previous_model(model_type: str, feature_type: str, feature_config: dict, n_features: int, models_dir: Path):
+    """
+    Aynı özellik ayarlarıyla eğitilmiş mevcut modeli yükle (artımlı güncelleme için).
+    
+    Returns:
+        Model veya None (model yok ya da özellikler uyuşmuyor)
+    """
+    model_path = models_dir / get_model_filename(model_type, feature_type)
+    metadata_path = models_dir / f'{model_path.name}.meta'
+    if not model_path.exists() or not metadata_path.exists():
+        return None
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if (normalize_feature_config(metadata.get('feature_config')) != feature_config
+            or metadata.get('feature_shape') != n_features):
+        print(f"   ⚠️  {model_path.name} was trained with other feature settings, retraining from scratch")
+        return None
+    with open(model_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def distill_model(teacher, teacher_metrics: dict, X_train, y_train, X_test, y_test, n_components: int = 64):
+    """
+    Öğretmen modelin olasılıklarından küçük bir öğrenci model eğit (knowledge distillation).
+    
+    Öğrenci: StandardScaler + PCA + LogisticRegression. Yumuşak etiketler için her
+    eğitim örneği her sınıf için bir kez tekrarlanır ve öğretmenin o sınıfa verdiği
+    olasılıkla ağırlıklandırılır (ağırlıklı cross-entropy ile eşdeğer).
+    
+    Args:
+        teacher: Eğitilmiş öğretmen model (predict_proba desteklemeli)
+        teacher_metrics: Öğretmenin evaluate_model çıktısı
+        n_components: PCA boyutu (özellik ve örnek sayısı ile sınırlanır)
+    
+    Returns:
+        Öğrenci model ve metrikleri (öğretmene göre doğruluk farkı ve gecikme oranı dahil)
+    """
+    start_time = time.perf_counter()
+    soft_labels = teacher.predict_proba(X_train)
+    # İhmal edilebilir olasılıkları at (genişletilmiş veri küçük kalsın)
+    rows, cols = np.nonzero(soft_labels > 1e-3)
+    
+    n_components = min(n_components, X_train.shape[1], len(X_train) - 1)
+    reducer = make_pipeline(StandardScaler(), PCA(n_components=n_components, random_state=42))
+    X_reduced = reducer.fit_transform(X_train)
+    classifier = LogisticRegression(max_iter=1000)
+    classifier.fit(X_reduced[rows], teacher.classes_[cols], sample_weight=soft_labels[rows, cols])
+    student = Pipeline([
+        ('scaler', reducer[0]),
+        ('pca', reducer[1]),
+        ('classifier', classifier)
+    ])
+    fit_time = time.perf_counter() - start_time
+    
+    metrics = evaluate_model(student, X_train, y_train, X_test, y_test)
+    metrics['fit_time_s'] = float(fit_time)
+    metrics['teacher_test_accuracy'] = teacher_metrics['test_accuracy']
+    metrics['accuracy_delta'] = metrics['test_accuracy'] - teacher_metrics['test_accuracy']
+    metrics['latency_ratio'] = metrics['inference_ms_single'] / teacher_metrics['inference_ms_single']
+    metrics['latency_ratio_batched'] = (
+        metrics['inference_ms_per_sample_batched'] / teacher_metrics['inference_ms_per_sample_batched']
+    )
+    metrics['teacher_agreement'] = float(np.mean(student.predict(X_test) == teacher.predict(X_test)))
+    return student, metrics
+
+
+def create_streaming_classifier(model_type: str, random_state: int = 42):
+    """
+    Akış modu için partial_fit destekleyen sınıflandırıcı.
+    
+    Ölçekleme ve PCA akış modunda ayrı (StandardScaler / IncrementalPCA) yapıldığı
+    için create_model'deki pipeline'ın sadece sınıflandırıcı adımı kullanılır.
+    """
+    if model_type not in STREAMING_MODEL_TYPES:
+        raise ValueError(f"{model_type} partial_fit desteklemiyor (akış modu: {', '.join(STREAMING_MODEL_TYPES)})")
+    model = create_model(model_type, random_state)
+    if isinstance(model, Pipeline):
+        model = model[-1]
+    if model_type == 'neural_network':
+        # early_stopping tüm veriden doğrulama kümesi ayırır, partial_fit ile kullanılamaz
+        model.set_params(early_stopping=False)
+    return model
+
+
+def fit_streaming_model(
+    model_type: str,
+    store: FeatureStore,
+    chunk_rows: int,
+    epochs: int = 5,
+    pca_components: int = 64
+):
+    """
+    Modeli diskteki özellik deposundan parça parça eğit (out-of-core).
+    
+    1. geçiş StandardScaler.partial_fit, 2. geçiş IncrementalPCA.partial_fit,
+    sonraki her epoch sınıflandırıcının partial_fit'i. Bellekte aynı anda tek
+    bir parça (chunk_rows satır) bulunur.
+    
+    Args:
+        model_type: STREAMING_MODEL_TYPES içinden model tipi
+        store: Eğitim/test satırlarını içeren özellik deposu
+        chunk_rows: Parça başına satır sayısı
+        epochs: Sınıflandırıcı için veri üzerinden geçiş sayısı
+        pca_components: PCA boyutu (0: PCA yok)
+    
+    Returns:
+        Eğitilmiş pipeline (scaler, [pca], classifier) ve eğitim süresi (s)
+    """
+    start_time = time.perf_counter()
+    train_mask = store.splits == 'train'
+    classes = np.unique(store.speakers[train_mask])
+    n_train = int(train_mask.sum())
+    
+    scaler = StandardScaler()
+    for X_chunk, _ in store.iter_chunks(chunk_rows, split='train'):
+        scaler.partial_fit(X_chunk)
+    steps = [('scaler', scaler)]
+    
+    if pca_components:
+        # IncrementalPCA her partial_fit'te en az n_components satır ister
+        smallest_chunk = n_train // -(-n_train // chunk_rows)
+        n_components = min(pca_components, store.n_features, smallest_chunk)
+        pca = IncrementalPCA(n_components=n_components)
+        for X_chunk, _ in store.iter_chunks(chunk_rows, split='train'):
+            pca.partial_fit(scaler.transform(X_chunk))
+        steps.append(('pca', pca))
+    
+    reducer = Pipeline(steps)
+    classifier = create_streaming_classifier(model_type)
+    for epoch in range(epochs):
+        for X_chunk, y_chunk in store.iter_chunks(chunk_rows, split='train', shuffle=True, random_state=epoch):
+            classifier.partial_fit(reducer.transform(X_chunk), y_chunk, classes=classes)
+    
+    model = Pipeline(steps + [('classifier', classifier)])
+    return model, time.perf_counter() - start_time
+
+
+def evaluate_streaming_model(model, store: FeatureStore, chunk_rows: int) -> dict:
+    """
+    Modeli diskteki test (holdout) satırları üzerinde parça parça değerlendir.
+    
+    Returns:
+        evaluate_model ile aynı metrikler
+    """
+    train_correct = 0
+    for X_chunk, y_chunk in store.iter_chunks(chunk_rows, split='train'):
+        train_correct += int(np.sum(model.predict(X_chunk) == y_chunk))
+    
+    y_test, y_pred = [], []
+    X_sample = None
+    for X_chunk, y_chunk in store.iter_chunks(chunk_rows, split='test'):
+        y_test.append(y_chunk)
+        y_pred.append(model.predict(X_chunk))
+        if X_sample is None:
+            X_sample = X_chunk[:256]  # gecikme ölçümü için küçük bir örnek
+    y_test, y_pred = np.concatenate(y_test), np.concatenate(y_pred)
+    
+    metrics = {
+        'test_accuracy': float(np.mean(y_test == y_pred)),
+        'train_accuracy': train_correct / int(np.sum(store.splits == 'train')),
+        **classification_metrics(y_test, y_pred)
+    }
+    metrics.update(measure_inference_time(model, X_sample))
+    return metrics
+
+
+def peak_memory_mb():
+    """Sürecin en yüksek bellek kullanımı (MB, ölçülemezse None)."""
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+    except (OSError, StopIteration):  # Linux dışı
+        return None
+
+
+def _train_and_evaluate(model_type, X_train, y_train, X_test, y_test, fit_kwargs):
+    """Tek bir model tipini eğit ve değerlendir (ayrı süreçte çalışabilir)."""
+    model, cv_results, best_params, fit_time = fit_model(model_type, X_train, y_train, **fit_kwargs)
+    metrics = evaluate_model(model, X_train, y_train, X_test, y_test)
+    metrics['fit_time_s'] = float(fit_time)
+    return model_type, model, cv_results, best_params, metrics
+
+
+def print_comparison_table(results: list):
+    """Birden fazla modelin karşılaştırma tablosunu yazdır."""
+    print(f"\n🏁 Model Comparison:")
+    print(f"   {'model':<16} {'test acc':>9} {'f1 macro':>9} {'fit (s)':>8} "
+          f"{'batch ms/örnek':>15} {'tek örnek ms':>13}")
+    for model_type, metrics in sorted(results, key=lambda r: -r[1]['test_accuracy']):
+        print(f"   {model_type:<16} {metrics['test_accuracy']*100:>8.2f}% {metrics['f1_macro']:>9.4f} "
+              f"{metrics['fit_time_s']:>8.2f} {metrics['inference_ms_per_sample_batched']:>15.3f} "
+              f"{metrics['inference_ms_single']:>13.3f}")
+
+
+def train_speaker_model(
+    model_type='svm',
+    feature_type: str = 'mfcc',
+    use_cv: bool = False,
+    cv_folds: int = 5,
+    use_tuning: bool = False,
+    tuning_method: str = 'grid',
+    n_iter: int = 20,
+    resample_quality: str = 'high',
+    sync_manifest: bool = False,
+    n_jobs: int = None,
+    distill: bool = False,
+    streaming: bool = False,
+    max_memory_mb: float = 512,
+    epochs: int = 5,
+    pca_components: int = 64,
+    store_dir: str = 'data/features',
+    search_history: str = DEFAULT_SEARCH_HISTORY,
+    warm_start: int = 3,
+    feature_config: dict = None,
+    incremental: bool = True
+):
+    """
+    Ana eğitim fonksiyonu.
+    
+    Özellikler bir kez çıkarılır; birden fazla model tipi istenirse hepsi aynı
+    train/test bölmesi üzerinde paralel süreçlerde eğitilir.
+    
+    Args:
+        model_type: Model tipi ('svm', 'random_forest', 'neural_network', 'adaboost', 'ncm', 'sgd', 'tdnn',
+            'hierarchical'), 'all' veya bunların listesi / virgülle ayrılmış hali
+        feature_type: Özellik tipi ('mfcc' veya 'mfcc_stats' - Mel desteği kaldırıldı)
+        use_cv: Cross-validation kullan (default: False)
+        cv_folds: Cross-validation fold sayısı (default: 5)
+        use_tuning: Hyperparameter tuning kullan (default: False)
+        tuning_method: Tuning yöntemi ('grid' veya 'random', default: 'grid')
+        n_iter: Random aramada denenecek aday sayısı (default: 20)
+        resample_quality: Yeniden örnekleme kalitesi ('high', 'medium', 'low', 'fast')
+        sync_manifest: data/raw altındaki manifest'te olmayan dosyaları önce kataloğa ekle
+        n_jobs: Paralel eğitim süreci sayısı (default: model sayısı)
+        distill: Her model için damıtılmış (hızlı) bir öğrenci model de eğit
+        streaming: Özellikleri diskten parça parça okuyarak eğit (sadece STREAMING_MODEL_TYPES)
+        max_memory_mb: Akış modunda bir parçanın bellek bütçesi (parça boyutunu belirler)
+        epochs: Akış modunda sınıflandırıcı için veri üzerinden geçiş sayısı
+        pca_components: Akış modunda IncrementalPCA boyutu (0: PCA yok)
+        store_dir: Özellik deposu kök dizini
+        search_history: Tuning adaylarının kaydedildiği veritabanı (None: geçmiş kullanılmaz)
+        warm_start: Random aramada önceki çalışmalardan tohumlanacak en iyi aday sayısı
+        feature_config: Özellik ayarları (sample_rate, n_mfcc, hop_length, target_length_ms;
+            eksikler varsayılan). Model metadata'sına kaydedilir, sunucu özellikleri
+            bu ayarlarla çıkarır (bkz. sweep_features.py)
+        incremental: INCREMENTAL_MODEL_TYPES için mevcut modeli güncelle (sadece
+            konuşmacıları değişen kümeler yeniden eğitilir); False: sıfırdan eğit
+    """
+    model_types = parse_model_types(model_type)
+    feature_config = normalize_feature_config(feature_config)
+    
+    # Validate feature type (MFCC tabanlı özellikler destekleniyor)
+    if feature_type not in SUPPORTED_FEATURE_TYPES:
+        print(f"⚠️  Warning: feature_type '{feature_type}' not supported. Using 'mfcc' instead.")
+        feature_type = 'mfcc'
+    
+    torch_types = [m for m in model_types if m in TORCH_MODEL_TYPES]
+    if torch_types and feature_type != 'mfcc':
+        print(f"⚠️  Warning: {', '.join(torch_types)} requires MFCC frames (feature_type 'mfcc'), skipping.")
+        model_types = [m for m in model_types if m not in TORCH_MODEL_TYPES]
+        if not model_types:
+            return
+    if torch_types and feature_config['n_mfcc'] != AudioProcessor.N_MFCC:
+        print(f"⚠️  Warning: {', '.join(torch_types)} is built for {AudioProcessor.N_MFCC} MFCCs, skipping.")
+        model_types = [m for m in model_types if m not in TORCH_MODEL_TYPES]
+        if not model_types:
+            return
+    
+    if streaming:
+        batch_only = [m for m in model_types if m not in STREAMING_MODEL_TYPES]
+        if batch_only:
+            print(f"⚠️  Warning: {', '.join(batch_only)} does not support partial_fit "
+                  f"(streaming: {', '.join(STREAMING_MODEL_TYPES)}), skipping.")
+            model_types = [m for m in model_types if m in STREAMING_MODEL_TYPES]
+            if not model_types:
+                return
+        if use_cv or use_tuning or distill:
+            print("⚠️  Warning: --cv, --tune and --distill need the full matrix in memory, ignored with --streaming.")
+            use_cv = use_tuning = distill = False
+    
+    print("🎤 Speaker Identification Model Training")
+    print("=" * 50)
+    print(f"📦 Model Tipi: {', '.join(MODEL_NAMES.get(m, m) for m in model_types)}")
+    print(f"🎵 Özellik Tipi: {FEATURE_NAMES.get(feature_type, feature_type)}")
+    print(f"🎛️  Özellik Ayarları: {feature_config['sample_rate']} Hz, {feature_config['n_mfcc']} MFCC, "
+          f"hop {feature_config['hop_length']}, {feature_config['target_length_ms']} ms")
+    if use_cv:
+        print(f"🔄 Cross-Validation: ✅ ({cv_folds} folds)")
+    else:
+        print(f"🔄 Cross-Validation: ❌")
+    if use_tuning:
+        print(f"🎯 Hyperparameter Tuning: ✅ ({tuning_method})")
+    else:
+        print(f"🎯 Hyperparameter Tuning: ❌")
+    if streaming:
+        print(f"💽 Streaming: ✅ (max {max_memory_mb:g} MB per chunk, {epochs} epochs)")
+    print("=" * 50)
+    
+    # Yollar
+    data_dir = Path("data/raw")
+    models_dir = Path("models")
+    models_dir.mkdir(exist_ok=True)
+    
+    if streaming:
+        store = prepare_feature_store(
+            data_dir, feature_type, resample_quality, sync_manifest, Path(store_dir), feature_config
+        )
+        if store is not None:
+            train_streaming_models(
+                model_types, store, feature_type, resample_quality, models_dir,
+                max_memory_mb, epochs, pca_components, feature_config
+            )
+        return
+    
+    # Özellikleri bir kez çıkar (tüm modeller aynı matrisi kullanır)
+    dataset = load_dataset(data_dir, feature_type, resample_quality, sync_manifest, Path(store_dir), feature_config)
+    if dataset is None:
+        return
+    X, y, splits = dataset
+    
+    print(f"\n📊 Dataset Statistics:")
+    print(f"   Total samples: {len(X)}")
+    print(f"   Features per sample: {X.shape[1]}")
+    print(f"   Unique speakers: {len(np.unique(y))}")
+    
+    # Check if we have at least 2 speakers
+    if len(np.unique(y)) < 2:
+        print("\n❌ Error: Need at least 2 different speakers!")
+        print("Please add audio files for another speaker before training.")
+        print("Model training requires multiple classes.")
+        return
+    
+    # Veriyi böl (manifest'teki sabit split; yetersizse stratified split)
+    X_train, X_test, y_train, y_test, split_source = split_dataset(X, y, splits)
+    
+    print(f"\n🔬 Train/Test Split ({split_source}):")
+    print(f"   Training samples: {len(X_train)}")
+    print(f"   Test samples: {len(X_test)}")
+    
+    fit_kwargs = {
+        'use_cv': use_cv,
+        'cv_folds': cv_folds,
+        'use_tuning': use_tuning,
+        'tuning_method': tuning_method,
+        'n_iter': n_iter,
+        'feature_type': feature_type,
+        'search_history': search_history,
+        'warm_start': warm_start
+    }
+    # Mevcut hiyerarşik model varsa sıfırdan eğitmek yerine güncellenir
+    model_fit_kwargs = {m: fit_kwargs for m in model_types}
+    if incremental and not use_tuning:
+        for m in model_types:
+            if m in INCREMENTAL_MODEL_TYPES:
+                previous = load_previous_model(m, feature_type, feature_config, X.shape[1], models_dir)
+                model_fit_kwargs[m] = {**fit_kwargs, 'previous_model': previous}
+    
+    if len(model_types) == 1:
+        results = [_train_and_evaluate(
+            model_types[0], X_train, y_train, X_test, y_test, model_fit_kwargs[model_types[0]]
+        )]
+    else:
+        workers = n_jobs or len(model_types)
+        print(f"\n⚙️  Training {len(model_types)} models in {workers} parallel processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_train_and_evaluate, m, X_train, y_train, X_test, y_test, model_fit_kwargs[m])
+                for m in model_types
+            ]
+            results = [future.result() for future in futures]
+    
+    saved_models = []
+    for trained_type, model, cv_results, best_params, metrics in results:
+        if len(model_types) > 1:
+            print(f"\n{'=' * 50}\n📦 {MODEL_NAMES.get(trained_type, trained_type)}")
+        print_evaluation(metrics)
+        
+        # Model metadata (detaylı metrikler ile)
+        metadata = {
+            'model_type': trained_type,
+            'feature_type': feature_type,
+            'feature_shape': X.shape[1],
+            'feature_config': feature_config,
+            'resample_quality': resample_quality,
+            'split_source': split_source,
+            'train_samples': len(X_train),
+            'test_samples': len(X_test),
+            'num_speakers': len(np.unique(y)),
+            **{k: v for k, v in metrics.items() if k != 'classification_report'},
+            'speakers': sorted(np.unique(y).tolist())  # Konuşmacı listesi
+        }
+        
+        # Cross-validation sonuçlarını ekle
+        if cv_results:
+            metadata['cross_validation'] = cv_results
+        
+        # Hiyerarşik model: küme yapısı ve son güncellemede yeniden eğitilen kümeler
+        if isinstance(model, HierarchicalSpeakerClassifier):
+            metadata['hierarchy'] = {
+                'n_clusters': model.n_clusters_,
+                'cluster_sizes': [len(members) for members in model.clusters_],
+                'max_cluster_size': model.max_cluster_size,
+                'n_routes': model.n_routes,
+                'retrained_clusters': model.last_update_['retrained_clusters'],
+                'new_speakers': len(model.last_update_['new_speakers']),
+                'changed_speakers': len(model.last_update_['changed_speakers']),
+                'removed_speakers': len(model.last_update_['removed_speakers'])
+            }
+        
+        # Hyperparameter tuning sonuçlarını ekle
+        if best_params:
+            metadata['best_hyperparameters'] = best_params
+            metadata['hyperparameter_tuning_method'] = tuning_method
+        
+        # Modeli kaydet
+        teacher_filename = save_model(model, metadata, models_dir, parity_X=X_test)
+        saved_models.append(teacher_filename)
+        
+        if distill:
+            print(f"\n🎓 Distilling {trained_type} into a compact student model...")
+            student, student_metrics = distill_model(model, metrics, X_train, y_train, X_test, y_test)
+            print(f"   Test Accuracy: {student_metrics['test_accuracy']*100:.2f}% "
+                  f"(Δ {student_metrics['accuracy_delta']*100:+.2f} puan)")
+            print(f"   Latency: {student_metrics['inference_ms_single']:.3f} ms "
+                  f"({student_metrics['latency_ratio']:.2f}x teacher)")
+            print(f"   Teacher agreement: {student_metrics['teacher_agreement']*100:.2f}%")
+            student_metadata = {
+                **metadata,
+                **{k: v for k, v in student_metrics.items() if k != 'classification_report'},
+                'model_type': f'{trained_type}_student',
+                'distilled_from': teacher_filename
+            }
+            student_metadata.pop('cross_validation', None)
+            student_metadata.pop('best_hyperparameters', None)
+            student_metadata.pop('hyperparameter_tuning_method', None)
+            saved_models.append(save_model(student, student_metadata, models_dir, parity_X=X_test))
+    
+    if len(results) > 1:
+        print_comparison_table([(r[0], r[4]) for r in results])
+    
+    finish_training(saved_models, feature_type, np.unique(y), models_dir)
+
+
+def train_streaming_models(
+    model_types: list,
+    store: FeatureStore,
+    feature_type: str,
+    resample_quality: str,
+    models_dir: Path,
+    max_memory_mb: float = 512,
+    epochs: int = 5,
+    pca_components: int = 64,
+    feature_config: dict = None
+):
+    """
+    Akış modu: modelleri özellik deposundan parça parça eğit ve manifest'teki
+    test kümesinde (holdout) yine parça parça değerlendir.
+    
+    Bellek kullanımı veri seti boyutuna değil max_memory_mb'ye bağlıdır.
+    """
+    speakers = store.speakers
+    train_mask = store.splits == 'train'
+    n_train = int(train_mask.sum())
+    n_test = store.n_rows - n_train
+    
+    print(f"\n📊 Dataset Statistics:")
+    print(f"   Total samples: {store.n_rows}")
+    print(f"   Features per sample: {store.n_features}")
+    print(f"   Unique speakers: {len(np.unique(speakers))}")
+    
+    if len(np.unique(speakers[train_mask])) < 2 or n_test == 0:
+        print("\n❌ Error: Streaming needs at least 2 speakers in the manifest train split and a test split!")
+        return
+    
+    chunk_rows = store.chunk_rows(max_memory_mb)
+    if pca_components and chunk_rows < pca_components:
+        print(f"⚠️  Warning: {chunk_rows} rows per chunk is below the PCA size, using {pca_components}")
+        chunk_rows = pca_components
+    
+    print(f"\n🔬 Train/Test Split (manifest):")
+    print(f"   Training samples: {n_train}")
+    print(f"   Test samples: {n_test}")
+    print(f"   Chunk size: {chunk_rows} rows ({-(-n_train // chunk_rows)} training chunks)")
+    
+    saved_models = []
+    results = []
+    for trained_type in model_types:
+        print(f"\n🤖 Training {MODEL_NAMES.get(trained_type, trained_type)} model (streaming)...")
+        model, fit_time = fit_streaming_model(trained_type, store, chunk_rows, epochs, pca_components)
+        metrics = evaluate_streaming_model(model, store, chunk_rows)
+        metrics['fit_time_s'] = float(fit_time)
+        print_evaluation(metrics)
+        results.append((trained_type, metrics))
+        
+        metadata = {
+            'model_type': trained_type,
+            'feature_type': feature_type,
+            'feature_shape': store.n_features,
+            'feature_config': normalize_feature_config(feature_config),
+            'resample_quality': resample_quality,
+            'split_source': 'manifest',
+            'train_samples': n_train,
+            'test_samples': n_test,
+            'num_speakers': len(np.unique(speakers)),
+            **{k: v for k, v in metrics.items() if k != 'classification_report'},
+            'streaming': {
+                'chunk_rows': chunk_rows,
+                'max_memory_mb': max_memory_mb,
+                'epochs': epochs,
+                'pca_components': model['pca'].n_components_ if 'pca' in model.named_steps else 0
+            },
+            'speakers': sorted(np.unique(speakers).tolist())
+        }
+        saved_models.append(save_model(model, metadata, models_dir))
+    
+    if len(results) > 1:
+        print_comparison_table(results)
+    
+    peak_mb = peak_memory_mb()
+    if peak_mb is not None:
+        print(f"\n🧠 Peak memory: {peak_mb:.0f} MB")
+    finish_training(saved_models, feature_type, np.unique(speakers), models_dir)
+
+
+def finish_training(saved_models: list, feature_type: str, speakers, models_dir: Path):
+    """Konuşmacı etiketlerini kaydet ve backend kullanım bilgisini yazdır."""
     # Speaker labels kaydet
-    unique_speakers = sorted(np.unique(y))
+    unique_speakers = sorted(speakers)
     labels_path = models_dir / 'speaker_labels.txt'
     with open(labels_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(unique_speakers))
@@ -449,11 +1273,15 @@ def train_speaker_model(
     
     print("\n✅ Training complete!")
     print(f"\nNow you can use the model in the backend:")
-    print(f"  - Model file: models/{model_filename}")
+    for model_filename in saved_models:
+        print(f"  - Model file: models/{model_filename}")
     print(f"  - Feature type: {feature_type}")
     print(f"  - Labels: models/speaker_labels.txt")
     print(f"\n💡 Backend'de modeli yüklemek için:")
-    print(f"   model_manager.load_model('{model_filename}', model_type='sklearn')")
+    for model_filename in saved_models:
+        backend_type = 'pytorch' if model_filename.endswith('.pt') else 'sklearn'
+        print(f"   model_manager.load_model('{model_filename}', model_type='{backend_type}')")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Konuşmacı tanıma modeli eğitimi')
@@ -461,15 +1289,15 @@ if __name__ == "__main__":
         '--model',
         type=str,
         default='svm',
-        choices=['svm', 'random_forest', 'neural_network', 'adaboost'],
-        help='Eğitilecek model tipi (default: svm)'
+        help='Eğitilecek model tipi: svm, random_forest, neural_network, adaboost, ncm, sgd, tdnn, '
+             'hierarchical, all veya virgülle ayrılmış liste (default: svm)'
     )
     parser.add_argument(
         '--feature',
         type=str,
         default='mfcc',
-        choices=['mfcc'],  # Mel desteği kaldırıldı
-        help='Kullanılacak özellik tipi: mfcc (default: mfcc, Mel desteği kaldırıldı)'
+        choices=SUPPORTED_FEATURE_TYPES,  # Mel desteği kaldırıldı
+        help='Kullanılacak özellik tipi: mfcc veya mfcc_stats (default: mfcc, Mel desteği kaldırıldı)'
     )
     parser.add_argument(
         '--cv',
@@ -498,17 +1326,139 @@ if __name__ == "__main__":
         '--n-iter',
         type=int,
         default=20,
-        help='RandomizedSearchCV için iterasyon sayısı (default: 20)'
+        help='Random aramada denenecek aday sayısı (default: 20)'
+    )
+    parser.add_argument(
+        '--search-history',
+        type=str,
+        default=DEFAULT_SEARCH_HISTORY,
+        help=f'Tuning adaylarının kaydedildiği veritabanı; değerlendirilmiş adaylar atlanır (default: {DEFAULT_SEARCH_HISTORY})'
+    )
+    parser.add_argument(
+        '--no-search-history',
+        action='store_true',
+        help='Arama geçmişini okuma/yazma, her adayı yeniden değerlendir'
+    )
+    parser.add_argument(
+        '--warm-start',
+        type=int,
+        default=3,
+        help='Random aramada önceki çalışmalardan denenecek en iyi aday sayısı (default: 3)'
+    )
+    parser.add_argument(
+        '--resample-quality',
+        type=str,
+        default='high',
+        help="Yeniden örnekleme kalitesi: 'high', 'medium', 'low', 'fast' veya herhangi bir librosa "
+             "res_type (default: high, bkz. benchmark_resampling.py)"
+    )
+    parser.add_argument(
+        '--sample-rate',
+        type=int,
+        default=AudioProcessor.SAMPLE_RATE,
+        help=f'Özellik çıkarımı örnekleme hızı (default: {AudioProcessor.SAMPLE_RATE}, bkz. sweep_features.py)'
+    )
+    parser.add_argument(
+        '--n-mfcc',
+        type=int,
+        default=AudioProcessor.N_MFCC,
+        help=f'MFCC katsayı sayısı (default: {AudioProcessor.N_MFCC})'
+    )
+    parser.add_argument(
+        '--hop-length',
+        type=int,
+        default=AudioProcessor.HOP_LENGTH,
+        help=f'FFT hop uzunluğu (default: {AudioProcessor.HOP_LENGTH})'
+    )
+    parser.add_argument(
+        '--target-length-ms',
+        type=int,
+        default=AudioProcessor.TARGET_LENGTH_MS,
+        help=f'Sabit boyutlu özellikler için pencere uzunluğu, ms (default: {AudioProcessor.TARGET_LENGTH_MS})'
+    )
+    parser.add_argument(
+        '--sync-manifest',
+        action='store_true',
+        help='data/raw dizinini tarayıp manifest\'te olmayan dosyaları ekle (elle kopyalanan dosyalar için)'
+    )
+    
+    parser.add_argument(
+        '--distill',
+        action='store_true',
+        help='Her modelden yumuşak etiketlerle küçük bir öğrenci model damıt ({model}_student_speaker_model.pkl)'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Özellikleri diskten parça parça okuyarak eğit (bellekten büyük veri setleri; '
+             f'sadece {", ".join(STREAMING_MODEL_TYPES)})'
+    )
+    parser.add_argument(
+        '--max-memory-mb',
+        type=float,
+        default=512,
+        help='Akış modunda bir parçanın bellek bütçesi, MB (default: 512)'
+    )
+    parser.add_argument(
+        '--epochs',
+        type=int,
+        default=5,
+        help='Akış modunda veri üzerinden geçiş sayısı (default: 5)'
+    )
+    parser.add_argument(
+        '--pca-components',
+        type=int,
+        default=64,
+        help='Akış modunda IncrementalPCA boyutu, 0 ile kapatılır (default: 64)'
+    )
+    parser.add_argument(
+        '--feature-store',
+        type=str,
+        default='data/features',
+        help='Diskteki özellik deposunun kök dizini (default: data/features)'
+    )
+    parser.add_argument(
+        '--full-retrain',
+        action='store_true',
+        help='Hiyerarşik modeli güncellemek yerine tüm kümeleriyle sıfırdan eğit'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help='Birden fazla model için paralel eğitim süreci sayısı (default: model sayısı)'
     )
     
     args = parser.parse_args()
+    try:
+        model_types = parse_model_types(args.model)
+    except ValueError as e:
+        parser.error(str(e))
     train_speaker_model(
-        model_type=args.model, 
+        model_type=model_types,
         feature_type=args.feature,
         use_cv=args.cv,
         cv_folds=args.cv_folds,
         use_tuning=args.tune,
         tuning_method=args.tuning_method,
-        n_iter=args.n_iter
+        n_iter=args.n_iter,
+        resample_quality=args.resample_quality,
+        sync_manifest=args.sync_manifest,
+        n_jobs=args.jobs,
+        distill=args.distill,
+        streaming=args.streaming,
+        max_memory_mb=args.max_memory_mb,
+        epochs=args.epochs,
+        pca_components=args.pca_components,
+        store_dir=args.feature_store,
+        search_history=None if args.no_search_history else args.search_history,
+        warm_start=args.warm_start,
+        feature_config={
+            'sample_rate': args.sample_rate,
+            'n_mfcc': args.n_mfcc,
+            'hop_length': args.hop_length,
+            'target_length_ms': args.target_length_ms
+        },
+        incremental=not args.full_retrain
     )
 